@@ -0,0 +1,5 @@
+"""
+Benchmarks of the fetch, transform and ingest path.
+
+Run with `python -m benchmarks --help` from the repository root.
+"""
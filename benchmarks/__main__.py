@@ -0,0 +1,89 @@
+"""Command line interface of the benchmark suite."""
+
+# Import standard modules
+import json
+import logging
+from typing import Optional, Tuple
+
+# Import third-party modules
+import click
+
+# Import local modules
+from .suite import compare, run
+
+
+@click.command()
+@click.option(
+    "--coins", type=click.IntRange(min=1), default=2000, show_default=True,
+    help="Number of coins per snapshot.",
+)
+@click.option(
+    "--dates", type=click.IntRange(min=1), default=3, show_default=True,
+    help="Number of weekly snapshot dates.",
+)
+@click.option(
+    "--seed", type=int, default=0, show_default=True,
+    help="Seed of the synthetic listings.",
+)
+@click.option(
+    "--repeat", type=click.IntRange(min=1), default=3, show_default=True,
+    help="Number of runs of each benchmark.",
+)
+@click.option(
+    "--postgres-url", envvar="CMC_BENCH_POSTGRES_URL",
+    help=(
+        "URL of a scratch PostgreSQL database, whose tables are dropped. "
+        "Defaults to the CMC_BENCH_POSTGRES_URL environment variable."
+    ),
+)
+@click.option(
+    "--only", multiple=True, help="Run this benchmark only; repeatable.",
+)
+@click.option(
+    "--output", type=click.Path(dir_okay=False),
+    help="File where to write the results as JSON.",
+)
+@click.option(
+    "--compare", "baseline", type=click.File(),
+    help="Results of another commit to compare with.",
+)
+def cli(
+    coins: int = 2000,
+    dates: int = 3,
+    seed: int = 0,
+    repeat: int = 3,
+    postgres_url: Optional[str] = None,
+    only: Tuple[str, ...] = (),
+    output: Optional[str] = None,
+    baseline: Optional[click.File] = None,
+) -> None:
+    """Benchmark the fetch, transform and ingest path."""
+    results = run(coins, dates, seed, repeat, postgres_url, only)
+
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+
+    for name, result in results["results"].items():
+        click.echo(
+            f"{name:<24} {result['min'] * 1000:10.1f} ms "
+            f"{result['items_per_second'] or 0:12.0f} listings/s"
+        )
+
+    if baseline is not None:
+        click.echo()
+        for name, before, after, ratio in compare(
+            json.load(baseline), results,
+        ):
+            click.echo(
+                f"{name:<24} {before * 1000:10.1f} ms -> "
+                f"{after * 1000:10.1f} ms {ratio:6.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    # Keep the ingestion quiet
+    logging.basicConfig(level=logging.WARNING)
+
+    cli()
@@ -0,0 +1,340 @@
+"""
+Benchmark suite.
+
+Every benchmark runs on the same deterministic synthetic listings, so that
+the results of two commits can be compared. Results are plain dictionaries
+serialisable to JSON.
+"""
+
+# Import standard modules
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Import third-party modules
+from sqlalchemy.engine import Engine, create_engine
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data.bulk import build_batches
+from cmc_data.columnar import numpy_available
+from cmc_data.data_model import Base
+from cmc_data.ingest import get_data, ingest_data
+from cmc_data.records import decode_listings, loads
+from cmc_data.synthetic import synthetic_snapshots
+
+# Version of the results format
+FORMAT = 1
+
+# Page size of the historical listings endpoint
+LIMIT = 5000
+
+
+class PageClient:
+    """
+    Client serving synthetic listings as serialised API responses.
+
+    The pages are serialised up front, so that `get_data` is measured
+    without the network and without the serialisation.
+
+    Parameters
+    ----------
+        listings : List[dict]
+            The listings of a snapshot date.
+
+        limit : int
+            Number of listings per page. Default `LIMIT`.
+    """
+
+    def __init__(self, listings: List[dict], limit: int = LIMIT) -> None:
+        self.limit = limit
+        self.pages = {
+            start: json.dumps({
+                "status": {"error_code": 0},
+                "data": listings[start - 1:start - 1 + limit],
+            }).encode()
+            for start in range(1, len(listings) + 2, limit)
+        }
+
+    def get_json(self, url: str, params: dict, **kwargs: Any) -> Any:
+        return loads(self.pages[params["start"]])
+
+    def close(self) -> None:
+        pass
+
+
+def measure(
+    function: Callable[[Any], Any],
+    setup: Optional[Callable[[], Any]] = None,
+    repeat: int = 3,
+    items: int = 0,
+) -> Dict[str, Any]:
+    """
+    Time a function, excluding its setup.
+
+    Parameters
+    ----------
+        function : Callable[[Any], Any]
+            The code to time, called with the result of `setup`.
+
+        setup : Callable[[], Any], NoneType
+            Prepare each run, e.g. create an empty database. Default
+            `None`.
+
+        repeat : int
+            Number of runs. Default 3.
+
+        items : int
+            Number of listings processed by a run. Default 0.
+
+    Returns
+    -------
+        Dict[str, Any]
+            The duration of each run in seconds, their minimum, median and
+            mean, and the throughput of the fastest run.
+    """
+    runs = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        started = time.perf_counter()
+        function(state)
+        runs.append(time.perf_counter() - started)
+
+    best = min(runs)
+    return {
+        "runs": runs,
+        "min": best,
+        "median": statistics.median(runs),
+        "mean": statistics.mean(runs),
+        "items": items,
+        "items_per_second": items / best if best else None,
+    }
+
+
+def _database(url: str) -> Callable[[], Engine]:
+    """Return the setup of an empty database at `url`."""
+    def setup() -> Engine:
+        engine = create_engine(url)
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        return engine
+
+    return setup
+
+
+def _ingest(
+    snapshots: List[Tuple[datetime.date, List[dict]]], **options: Any,
+) -> Callable[[Engine], None]:
+    """Return the ingestion of `snapshots` into an engine."""
+    def ingest(engine: Engine) -> None:
+        with Session(engine) as session:
+            for _, listings in snapshots:
+                ingest_data(listings, session=session, **options)
+        engine.dispose()
+
+    return ingest
+
+
+def benchmarks(
+    snapshots: List[Tuple[datetime.date, List[dict]]],
+    sqlite_url: str,
+    postgres_url: Optional[str] = None,
+) -> Dict[str, Tuple[Callable, Optional[Callable]]]:
+    """
+    Build the benchmarks of the fetch, transform and ingest path.
+
+    Parameters
+    ----------
+        snapshots : List[Tuple[datetime.date, List[dict]]]
+            The listings of each date.
+
+        sqlite_url : str
+            URL of the SQLite database, recreated before each run.
+
+        postgres_url : str, NoneType
+            URL of a scratch PostgreSQL database, whose tables are dropped
+            and recreated before each run. If `None`, the PostgreSQL
+            benchmarks are skipped. Default `None`.
+
+    Returns
+    -------
+        Dict[str, Tuple[Callable, Callable]]
+            The function and setup of each benchmark, by name.
+    """
+    clients = [PageClient(listings) for _, listings in snapshots]
+    pages = [listings for _, listings in snapshots]
+    decoded = [decode_listings(listings).listings for listings in pages]
+
+    suite: Dict[str, Tuple[Callable, Optional[Callable]]] = {
+        "get_data": (
+            lambda _: [
+                get_data("synthetic", client, params={"limit": LIMIT})
+                for client in clients
+            ],
+            None,
+        ),
+        "decode": (
+            lambda _: [decode_listings(listings) for listings in pages],
+            None,
+        ),
+        "transform": (
+            lambda _: [build_batches(listings) for listings in decoded],
+            None,
+        ),
+        "write_sqlite_orm": (
+            _ingest(snapshots, copy=False), _database(sqlite_url),
+        ),
+        "write_sqlite_bulk": (
+            _ingest(snapshots, bulk=True, copy=False), _database(sqlite_url),
+        ),
+    }
+    if numpy_available():
+        suite["transform_columnar"] = (
+            lambda _: [
+                build_batches(listings, columnar=True) for listings in decoded
+            ],
+            None,
+        )
+        suite["write_sqlite_columnar"] = (
+            _ingest(snapshots, columnar=True, copy=False),
+            _database(sqlite_url),
+        )
+    if postgres_url:
+        suite["write_postgres_bulk"] = (
+            _ingest(snapshots, bulk=True, copy=False),
+            _database(postgres_url),
+        )
+        suite["write_postgres_copy"] = (
+            _ingest(snapshots, bulk=True, copy=True),
+            _database(postgres_url),
+        )
+
+    return suite
+
+
+def _commit() -> Optional[str]:
+    """Return the checked out commit, if run from a git work tree."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    coins: int = 2000,
+    dates: int = 3,
+    seed: int = 0,
+    repeat: int = 3,
+    postgres_url: Optional[str] = None,
+    only: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """
+    Run the benchmark suite.
+
+    Parameters
+    ----------
+        coins : int
+            Number of coins per snapshot. Default 2000.
+
+        dates : int
+            Number of weekly snapshot dates. Default 3.
+
+        seed : int
+            Seed of the synthetic listings. Default 0.
+
+        repeat : int
+            Number of runs of each benchmark. Default 3.
+
+        postgres_url : str, NoneType
+            URL of a scratch PostgreSQL database. Default `None`.
+
+        only : Iterable[str]
+            Names of the benchmarks to run. If empty, all of them.
+            Default `()`.
+
+    Returns
+    -------
+        Dict[str, Any]
+            The parameters and environment of the run, and the results of
+            each benchmark.
+    """
+    only = set(only)
+    snapshots = list(synthetic_snapshots(
+        coins,
+        [
+            datetime.date(2021, 1, 3) + datetime.timedelta(weeks=week)
+            for week in range(dates)
+        ],
+        seed,
+    ))
+    items = coins * dates
+
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        suite = benchmarks(snapshots, sqlite_url, postgres_url)
+        results = {
+            name: measure(function, setup, repeat, items)
+            for name, (function, setup) in suite.items()
+            if not only or name in only
+        }
+
+    return {
+        "format": FORMAT,
+        "commit": _commit(),
+        "created_at": datetime.datetime.now(
+            datetime.timezone.utc
+        ).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": {
+            "coins": coins,
+            "dates": dates,
+            "seed": seed,
+            "repeat": repeat,
+            "postgres": bool(postgres_url),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any],
+) -> List[Tuple[str, float, float, float]]:
+    """
+    Compare the fastest runs of two result sets.
+
+    Parameters
+    ----------
+        baseline : Dict[str, Any]
+            Results of the reference commit, as returned by `run`.
+
+        current : Dict[str, Any]
+            Results of the commit under test.
+
+    Returns
+    -------
+        List[Tuple[str, float, float, float]]
+            The name, baseline and current durations, and their ratio, of
+            the benchmarks present in both; a ratio above 1 is a slowdown.
+    """
+    return [
+        (
+            name,
+            baseline["results"][name]["min"],
+            result["min"],
+            result["min"] / baseline["results"][name]["min"],
+        )
+        for name, result in current["results"].items()
+        if name in baseline["results"]
+    ]
@@ -0,0 +1,11 @@
+#!/bin/sh
+
+# Activate environment
+if [ -d venv ] && [ -z ${VIRTUAL_ENV+x} ]
+then
+    source ./venv/bin/activate
+fi
+
+# Claim snapshot dates from the work queue shared by every worker, e.g.
+# `docker-compose up --scale worker=4`
+python -m cmc_data worker ${CMC_WORKER_ARGS}
@@ -33,4 +33,8 @@ setuptools.setup(
         "requests>=2.26.0",
         "urllib3>=1.26.7",
     ],
+    extras_require={
+        "columnar": ["numpy>=1.21"],
+        "fast": ["orjson>=3.6"],
+    },
 )
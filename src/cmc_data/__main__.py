@@ -1,16 +1,25 @@
 """TODO: Add description."""
 
 # Import standard modules
+import asyncio
 import datetime as dt
+import json
 import logging
-from random import randint
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional, Tuple,
+)
 
 # Import third-party modules
 import click
 
-# Import local modules
-from . import populate
-from .helpers import get_proxies
+if TYPE_CHECKING:  # pragma: no cover
+    # Import local modules
+    from .client import Client
+    from .proxies import ProxyPool
+
+# The commands import the ingestion modules, and through them `sqlalchemy`
+# and `requests`, when invoked, so that `--help` stays fast.
 
 
 @click.group()
@@ -19,42 +28,774 @@ def cli():
     ...
 
 
+def ingestion_options(function: Callable) -> Callable:
+    """Add the options shared by the `populate-*` commands."""
+    function = client_options(function)
+    options = [
+        click.option(
+            "--bulk/--no-bulk", default=None,
+            help=(
+                "Write each page with set-based upserts in one transaction. "
+                "Defaults to on for SQLite, whose per-entry transactions "
+                "are slow, and off otherwise."
+            ),
+        ),
+        click.option(
+            "--cache-entries", type=int, default=100_000, show_default=True,
+            help="Maximum number of identities cached per reference table.",
+        ),
+        click.option(
+            "--copy/--no-copy", default=None,
+            help=(
+                "Load quotes and market stats through PostgreSQL COPY; "
+                "implies --bulk. Defaults to the CMC_COPY environment "
+                "variable."
+            ),
+        ),
+        click.option(
+            "--columnar", is_flag=True,
+            help=(
+                "Convert the market stats and quotes of each page into "
+                "NumPy columns; implies --bulk."
+            ),
+        ),
+        click.option(
+            "--delta", type=click.Choice(["memory", "table"]),
+            help=(
+                "Skip the market stats and quotes identical to the last "
+                "ingested ones of each coin, remembered for the run only "
+                "('memory') or across runs in a side table ('table'); "
+                "implies --bulk."
+            ),
+        ),
+        click.option(
+            "--rollups", is_flag=True,
+            help=(
+                "Refresh the weekly and monthly per-coin rollups of each "
+                "page in its transaction; implies --bulk."
+            ),
+        ),
+        click.option(
+            "--coin-latest", is_flag=True,
+            help=(
+                "Upsert the newest market stats and quotes of each coin "
+                "into the coin_latest table; implies --bulk."
+            ),
+        ),
+    ]
+    for option in reversed(options):
+        function = option(function)
+
+    return function
+
+
+def client_options(function: Callable) -> Callable:
+    """Add the options of the HTTP client and of its proxy servers."""
+    options = [
+        click.option(
+            "--retries", type=click.IntRange(min=0), default=5,
+            show_default=True,
+            help="Maximum number of retries of a failed HTTP request.",
+        ),
+        click.option(
+            "--timeout", type=float, default=30.0, show_default=True,
+            help="HTTP connect and read timeout in seconds.",
+        ),
+        click.option(
+            "--rate", type=click.FloatRange(min=0, min_open=True),
+            default=0.5, show_default=True,
+            help="Initial number of requests per second per host and proxy.",
+        ),
+        click.option(
+            "--max-rate", type=click.FloatRange(min=0, min_open=True),
+            default=5.0, show_default=True,
+            help="Number of requests per second the rate may grow to.",
+        ),
+        click.option(
+            "--cache-dir", type=click.Path(file_okay=False),
+            envvar="CMC_CACHE_DIR",
+            help=(
+                "Directory where to cache the raw API responses. Defaults "
+                "to the CMC_CACHE_DIR environment variable."
+            ),
+        ),
+        click.option(
+            "--cache-max-mb", type=click.IntRange(min=1), default=2048,
+            show_default=True,
+            help="Maximum size of the response cache in MiB.",
+        ),
+        click.option(
+            "--replay", is_flag=True,
+            help="Ingest from the response cache without using the network.",
+        ),
+        click.option(
+            "--base-url", envvar="CMC_BASE_URL",
+            help=(
+                "Server of the listings, e.g. a local stub server. Defaults "
+                "to the CMC_BASE_URL environment variable, or "
+                "https://web-api.coinmarketcap.com."
+            ),
+        ),
+        click.option(
+            "--proxies/--no-proxies", default=True, show_default=True,
+            help="Send the requests through health-checked proxy servers.",
+        ),
+        click.option(
+            "--proxy-file", type=click.Path(exists=True, dir_okay=False),
+            help=(
+                "Read the candidate proxy servers, one host:port per line, "
+                "instead of scraping sslproxies.org."
+            ),
+        ),
+        click.option(
+            "--proxy-list-url", envvar="CMC_PROXY_LIST_URL",
+            help=(
+                "Page listing the candidate proxy servers like "
+                "sslproxies.org does. Defaults to the CMC_PROXY_LIST_URL "
+                "environment variable, or https://www.sslproxies.org."
+            ),
+        ),
+        click.option(
+            "--proxy-cache", type=click.Path(dir_okay=False),
+            envvar="CMC_PROXY_CACHE",
+            help=(
+                "File where to cache the healthy proxy servers across runs. "
+                "Defaults to the CMC_PROXY_CACHE environment variable."
+            ),
+        ),
+        click.option(
+            "--proxy-ttl", type=click.FloatRange(min=0), default=900.0,
+            show_default=True,
+            help="Seconds before the proxy servers are checked again.",
+        ),
+    ]
+    for option in reversed(options):
+        function = option(function)
+
+    return function
+
+
+def metrics_options(function: Callable) -> Callable:
+    """Add the options exposing the pipeline metrics."""
+    options = [
+        click.option(
+            "--metrics-port", type=click.IntRange(min=0, max=65535),
+            envvar="CMC_METRICS_PORT",
+            help=(
+                "Serve the metrics in the Prometheus text format on this "
+                "port during the run. Defaults to the CMC_METRICS_PORT "
+                "environment variable."
+            ),
+        ),
+        click.option(
+            "--metrics-file", type=click.Path(dir_okay=False),
+            help=(
+                "File where to write the metrics in the Prometheus text "
+                "format at the end of the run, e.g. for the node exporter's "
+                "textfile collector."
+            ),
+        ),
+        click.option(
+            "--metrics-json", type=click.Path(dir_okay=False),
+            help="File where to write the JSON summary of the metrics.",
+        ),
+    ]
+    for option in reversed(options):
+        function = option(function)
+
+    return function
+
+
+@contextmanager
+def exposed_metrics(
+    metrics_port: Optional[int] = None,
+    metrics_file: Optional[str] = None,
+    metrics_json: Optional[str] = None,
+) -> Iterator[None]:
+    """Expose the pipeline metrics during a run and summarise them after."""
+    # Import local modules
+    from . import metrics
+
+    server = metrics.serve(metrics_port) if metrics_port is not None \
+        else None
+    try:
+        yield
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if metrics_file:
+            metrics.write(metrics_file)
+        summary = metrics.summary()
+        if metrics_json:
+            with open(metrics_json, "w", encoding="utf-8") as file:
+                json.dump(summary, file, indent=2)
+                file.write("\n")
+        logging.info("metrics: %s", json.dumps(summary))
+
+
+@contextmanager
+def deferred_schema(bulk_load: bool = False) -> Iterator[None]:
+    """Defer the indexes and foreign keys of the loaded tables if asked."""
+    if not bulk_load:
+        yield
+        return
+
+    # Import local modules
+    from .data_model import get_engine
+    from .data_model.bulkload import bulk_load as defer
+
+    with defer(get_engine()) as dropped:
+        logging.info("bulk load: deferred %d indexes and keys", len(dropped))
+        yield
+
+
+def make_client(options: Dict[str, Any], pool_size: int = 10) -> "Client":
+    """Build the HTTP client from the shared command line options."""
+    # Import local modules
+    from .cache import ResponseCache
+    from .client import Client
+    from .ratelimit import RateLimiter
+
+    cache = None
+    if options["cache_dir"]:
+        cache = ResponseCache(
+            options["cache_dir"],
+            max_bytes=options["cache_max_mb"] * 1024 ** 2,
+            offline=options["replay"],
+        )
+    elif options["replay"]:
+        raise click.UsageError("--replay requires --cache-dir")
+
+    return Client(
+        retries=options["retries"],
+        timeout=options["timeout"],
+        pool_size=pool_size,
+        limiter=RateLimiter(
+            options["rate"],
+            max_rate=max(options["rate"], options["max_rate"]),
+        ),
+        cache=cache,
+    )
+
+
+def ingestion_kwargs(
+    options: Dict[str, Any], shared: bool = False,
+) -> Dict[str, Any]:
+    """
+    Select the `cmc_data.populate` parameters from the options.
+
+    With `shared`, other processes write the database at the same time.
+    """
+    # Import local modules
+    from .columnar import numpy_available
+    from .data_model import get_engine
+    from .data_model.models import CoinLatest, Fingerprint, QuoteRollup
+    from .delta import FingerprintStore
+    from .identity import IdentityCache
+
+    if options["columnar"] and not numpy_available():
+        raise click.UsageError(
+            "--columnar requires NumPy; install the 'columnar' extra"
+        )
+
+    bulk = options["bulk"]
+    if bulk is None:
+        bulk = get_engine().dialect.name == "sqlite"
+
+    # Side tables of databases initialised before them, created once here
+    # rather than in the transaction of every page
+    tables = []
+    if options["delta"] == "table":
+        tables.append(Fingerprint.__table__)
+    if options["rollups"]:
+        tables.append(QuoteRollup.__table__)
+    if options["coin_latest"]:
+        tables.append(CoinLatest.__table__)
+    for table in tables:
+        table.create(get_engine(), checkfirst=True)
+
+    return {
+        "bulk": bulk,
+        "cache": IdentityCache(options["cache_entries"], shared=shared),
+        "copy": options["copy"],
+        "columnar": options["columnar"],
+        "server": options["base_url"],
+        "delta": FingerprintStore(persist=options["delta"] == "table")
+        if options["delta"] else None,
+        "rollups": options["rollups"],
+        "coin_latest": options["coin_latest"],
+    }
+
+
+def make_proxy_pool(
+    client: "Client", options: Dict[str, Any],
+) -> Optional["ProxyPool"]:
+    """Build the proxy pool from the shared command line options."""
+    # Import local modules
+    from .helpers import PROXY_LIST_URL
+    from .proxies import CHECK_URL, ProxyPool, file_source, sslproxies_source
+
+    if not options["proxies"] \
+            or client.cache is not None and client.cache.offline:
+        return None
+
+    if options["proxy_file"]:
+        source = file_source(options["proxy_file"])
+    else:
+        source = sslproxies_source(
+            client, options["proxy_list_url"] or PROXY_LIST_URL,
+        )
+    client.proxy_pool = ProxyPool(
+        source,
+        check_url=options["base_url"] or CHECK_URL,
+        ttl=options["proxy_ttl"],
+        cache_file=options["proxy_cache"],
+    )
+
+    return client.proxy_pool
+
+
+def backfill_options(function: Callable) -> Callable:
+    """Add the options shared by the backfill commands."""
+    options = [
+        click.option(
+            "--start", type=click.DateTime(["%Y-%m-%d"]),
+            default="2013-04-28", show_default=True,
+            help="First snapshot date.",
+        ),
+        click.option(
+            "--end", type=click.DateTime(["%Y-%m-%d"]),
+            help=(
+                "Snapshot date at which to stop, exclusive. Defaults to "
+                "today."
+            ),
+        ),
+        click.option(
+            "--step", type=click.IntRange(min=1), default=7,
+            show_default=True, help="Number of days between snapshots.",
+        ),
+        click.option(
+            "--workers", type=click.IntRange(min=1), default=4,
+            show_default=True,
+            help="Maximum number of snapshots fetched concurrently.",
+        ),
+        click.option(
+            "--queue-size", type=click.IntRange(min=1), default=8,
+            show_default=True,
+            help="Maximum number of fetched pages waiting to be written.",
+        ),
+        click.option(
+            "--attempts", type=click.IntRange(min=1), default=3,
+            show_default=True,
+            help="Maximum number of attempts per snapshot date.",
+        ),
+        click.option(
+            "--retry-backoff", type=click.FloatRange(min=0), default=60.0,
+            show_default=True,
+            help=(
+                "Seconds before retrying a failed date, doubled on each "
+                "attempt."
+            ),
+        ),
+        click.option(
+            "--processes", type=click.IntRange(min=0), default=0,
+            show_default=True,
+            help=(
+                "Number of processes converting the pages into row batches, "
+                "written in bulk; 0 converts them in the writer thread."
+            ),
+        ),
+        click.option(
+            "--chunk-size", type=click.IntRange(min=1), default=1000,
+            show_default=True,
+            help="Maximum number of entries per chunk sent to a process.",
+        ),
+    ]
+    for option in reversed(options):
+        function = option(function)
+
+    return function
+
+
 @cli.command("populate-historical")
-def populate_historical() -> None:
+@ingestion_options
+@backfill_options
+@click.option(
+    "--resume/--no-resume", default=True, show_default=True,
+    help="Record each date in the checkpoint table and skip complete ones.",
+)
+@click.option(
+    "--bulk-load", is_flag=True,
+    help=(
+        "Drop the secondary indexes and foreign keys of the snapshot "
+        "tables, or disable the foreign key checks on SQLite, during the "
+        "run; rebuild and validate them, and analyse the tables, at the "
+        "end. Meant for first-time loads."
+    ),
+)
+@metrics_options
+def populate_historical(
+    start: Optional[dt.datetime] = None,
+    end: Optional[dt.datetime] = None,
+    step: int = 7,
+    workers: int = 4,
+    queue_size: int = 8,
+    resume: bool = True,
+    attempts: int = 3,
+    retry_backoff: float = 60.0,
+    processes: int = 0,
+    chunk_size: int = 1000,
+    bulk_load: bool = False,
+    metrics_port: Optional[int] = None,
+    metrics_file: Optional[str] = None,
+    metrics_json: Optional[str] = None,
+    **options: Any,
+) -> None:
     """Populate the database with data starting from 2013-04-28."""
+    # Import local modules
+    from .backfill import backfill, date_range
+    from .checkpoint import create_job_table
+    from .data_model import session_scope
+
     # Declare variables
-    query_date = dt.date(2013, 4, 28)
+    start_date = start.date() if start else dt.date(2013, 4, 28)
+    end_date = end.date() if end else dt.datetime.today().date()
+
+    with exposed_metrics(metrics_port, metrics_file, metrics_json), \
+            deferred_schema(bulk_load), session_scope() as session, \
+            make_client(options, pool_size=workers) as client:
+        if resume:
+            create_job_table(session.get_bind())
+
+        # Pool of health-checked proxy servers
+        proxy_pool = make_proxy_pool(client, options)
+
+        # Extract historical data and populate tables
+        asyncio.run(backfill(
+            date_range(start_date, end_date, step),
+            workers=workers,
+            queue_size=queue_size,
+            choose_proxy=proxy_pool.choose if proxy_pool else None,
+            client=client,
+            checkpoint=session if resume else None,
+            attempts=attempts,
+            retry_backoff=retry_backoff,
+            processes=processes,
+            chunk_size=chunk_size,
+            session=session,
+            **ingestion_kwargs(options),
+        ))
+
+    logging.info("rate limiter: %s", client.limiter.stats())
+    if proxy_pool is not None:
+        logging.info("proxy pool: %s", proxy_pool.stats())
 
-    # Acquire a list of proxy servers
-    proxies_list = get_proxies()
-    proxies = [
-        {"http": f"https://{proxy['IP Address']}:{proxy['Port']}"}
-        for proxy in proxies_list
-    ] if proxies_list else []
 
-    # Extract historical data and populate tables
-    while query_date < dt.datetime.today().date():
-        proxy = proxies[randint(0, len(proxies)-1)] if proxies else {}
-        populate(query_date, proxy)
-        query_date += dt.timedelta(7)
+@cli.command("worker")
+@ingestion_options
+@backfill_options
+@click.option(
+    "--worker-id",
+    help="Name of the worker in the queue. Defaults to hostname:pid.",
+)
+@click.option(
+    "--batch", type=click.IntRange(min=1),
+    help="Number of dates claimed at once. Defaults to --workers.",
+)
+@click.option(
+    "--lease", type=click.FloatRange(min=1), default=600.0,
+    show_default=True,
+    help=(
+        "Seconds before the dates of a worker which stopped sending "
+        "heartbeats are claimed by another one."
+    ),
+)
+@click.option(
+    "--enqueue/--no-enqueue", default=True, show_default=True,
+    help="Add the dates from --start to --end to the queue first.",
+)
+@metrics_options
+def worker(
+    start: Optional[dt.datetime] = None,
+    end: Optional[dt.datetime] = None,
+    step: int = 7,
+    workers: int = 4,
+    queue_size: int = 8,
+    attempts: int = 3,
+    retry_backoff: float = 60.0,
+    processes: int = 0,
+    chunk_size: int = 1000,
+    worker_id: Optional[str] = None,
+    batch: Optional[int] = None,
+    lease: float = 600.0,
+    enqueue: bool = True,
+    metrics_port: Optional[int] = None,
+    metrics_file: Optional[str] = None,
+    metrics_json: Optional[str] = None,
+    **options: Any,
+) -> None:
+    """
+    Backfill dates claimed from the shared work queue until it is drained.
+
+    Several workers, e.g. containers, may run against the same database:
+    each snapshot date is fetched and ingested by one of them only. A date
+    which fails goes back to the queue, to be claimed again after
+    --retry-backoff seconds, doubled on each attempt, up to --attempts
+    times.
+    """
+    # Import local modules
+    from .backfill import date_range
+    from .checkpoint import create_job_table
+    from .data_model import session_scope
+    from .workqueue import queue_stats, run_worker
+    from .workqueue import enqueue as enqueue_dates
+
+    # Declare variables
+    start_date = start.date() if start else dt.date(2013, 4, 28)
+    end_date = end.date() if end else dt.datetime.today().date()
+
+    with exposed_metrics(metrics_port, metrics_file, metrics_json), \
+            session_scope() as session, \
+            make_client(options, pool_size=workers) as client:
+        create_job_table(session.get_bind())
+        if enqueue:
+            pending = enqueue_dates(
+                session, date_range(start_date, end_date, step),
+            )
+            logging.info("%d dates pending in the queue", pending)
+
+        # Pool of health-checked proxy servers
+        proxy_pool = make_proxy_pool(client, options)
+
+        asyncio.run(run_worker(
+            session,
+            worker=worker_id,
+            batch=batch or workers,
+            lease=lease,
+            max_attempts=attempts,
+            retry_backoff=retry_backoff,
+            workers=workers,
+            queue_size=queue_size,
+            choose_proxy=proxy_pool.choose if proxy_pool else None,
+            client=client,
+            processes=processes,
+            chunk_size=chunk_size,
+            **ingestion_kwargs(options, shared=True),
+        ))
+        logging.info("queue: %s", queue_stats(session))
+
+    logging.info("rate limiter: %s", client.limiter.stats())
+    if proxy_pool is not None:
+        logging.info("proxy pool: %s", proxy_pool.stats())
 
 
 @cli.command("populate-latest")
-def populate_latest() -> None:
+@ingestion_options
+@metrics_options
+def populate_latest(
+    metrics_port: Optional[int] = None,
+    metrics_file: Optional[str] = None,
+    metrics_json: Optional[str] = None,
+    **options: Any,
+) -> None:
     """Populate the database with the latest data."""
+    # Import local modules
+    from .data_model import session_scope
+    from .ingest import populate
+
     # Declare variables
     query_date = dt.datetime.today().date() - dt.timedelta(1)
 
-    # Acquire a list of proxy servers
-    proxies_list = get_proxies()
-    proxies = [
-        {"http": f"https://{proxy['IP Address']}:{proxy['Port']}"}
-        for proxy in proxies_list
-    ] if proxies_list else []
-    proxy = proxies[randint(0, len(proxies))] if proxies else {}
+    with exposed_metrics(metrics_port, metrics_file, metrics_json), \
+            session_scope() as session, make_client(options) as client:
+        # Pool of health-checked proxy servers
+        proxy_pool = make_proxy_pool(client, options)
+        proxy = proxy_pool.choose() if proxy_pool else None
+
+        # Extract latest data and populate talbes
+        populate(
+            query_date, proxy, client=client, session=session,
+            **ingestion_kwargs(options),
+        )
+
+    logging.info("rate limiter: %s", client.limiter.stats())
+    if proxy_pool is not None:
+        logging.info("proxy pool: %s", proxy_pool.stats())
+
+
+@cli.command("export")
+@client_options
+@click.option(
+    "--date", "query_date", type=click.DateTime(["%Y-%m-%d"]), required=True,
+    help="Snapshot date to export.",
+)
+@click.option(
+    "--output", type=click.Path(file_okay=False), required=True,
+    help="Directory where to write the snapshot.",
+)
+@click.option(
+    "--format", "file_format", type=click.Choice(["csv", "npz"]),
+    default="csv", show_default=True,
+    help=(
+        "One CSV file per table, or a single compressed NumPy archive "
+        "of the columns."
+    ),
+)
+def export(
+    query_date: dt.datetime,
+    output: str,
+    file_format: str = "csv",
+    **options: Any,
+) -> None:
+    """Export the market stats and quotes of a snapshot to files."""
+    # Import standard modules
+    from pathlib import Path
+
+    # Import local modules
+    from .columnar import TABLES, Snapshot, numpy_available
+    from .ingest import extract_data
+    from .records import decode_listings
+
+    if not numpy_available():
+        raise click.UsageError(
+            "export requires NumPy; install the 'columnar' extra"
+        )
+
+    with make_client(options) as client:
+        # Pool of health-checked proxy servers
+        proxy_pool = make_proxy_pool(client, options)
+        proxy = proxy_pool.choose() if proxy_pool else None
+        data = extract_data(
+            query_date.date(), proxy, client, options["base_url"],
+        )
+    if data is None:
+        raise click.ClickException(f"failed to extract {query_date:%Y-%m-%d}")
+
+    page = decode_listings(data)
+    snapshot = Snapshot.from_listings(page.listings)
+    snapshot.fill_market_cap()
+
+    directory = Path(output)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = f"{query_date:%Y-%m-%d}"
+    if file_format == "npz":
+        path = directory / f"{stem}.npz"
+        snapshot.to_npz(path)
+        click.echo(path)
+    else:
+        for table in TABLES:
+            path = directory / f"{stem}_{table}.csv"
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                snapshot.to_csv(table, file)
+            click.echo(path)
+    logging.info(
+        "exported %d listings, rejected %d entries",
+        len(snapshot), len(page.rejected),
+    )
+
+
+@cli.command("stub-server")
+@click.option(
+    "--host", default="127.0.0.1", show_default=True,
+    help="Address to listen on.",
+)
+@click.option(
+    "--port", type=click.IntRange(min=0), default=8000, show_default=True,
+    help="Port to listen on.",
+)
+@click.option(
+    "--coins", type=click.IntRange(min=0), default=5000, show_default=True,
+    help="Number of listed coins per date.",
+)
+@click.option(
+    "--seed", type=int, default=0, show_default=True,
+    help="Seed of the synthetic listings and of the failures.",
+)
+@click.option(
+    "--latency", type=click.FloatRange(min=0), default=0.0,
+    show_default=True, help="Delay in seconds before every response.",
+)
+@click.option(
+    "--error-rate", type=click.FloatRange(0, 1), default=0.0,
+    show_default=True, help="Share of listing requests failing with 500.",
+)
+@click.option(
+    "--throttle-rate", type=click.FloatRange(0, 1), default=0.0,
+    show_default=True, help="Share of listing requests throttled with 429.",
+)
+@click.option(
+    "--retry-after", type=click.IntRange(min=0), default=1,
+    show_default=True, help="Retry-After seconds of throttled responses.",
+)
+@click.option(
+    "--page-size", type=click.IntRange(min=1),
+    help="Maximum number of listings per page, whatever the limit.",
+)
+@click.option(
+    "--dead-proxies", type=click.IntRange(min=0), default=0,
+    show_default=True,
+    help="Number of unreachable proxy servers in the proxy list.",
+)
+def stub_server(host: str, port: int, **options: Any) -> None:
+    """Serve synthetic listings and proxies for offline load tests."""
+    # Import local modules
+    from .stub import StubServer
+
+    server = StubServer(host, port, **options)
+    click.echo(f"Serving on {server.url}")
+    click.echo(f"  --base-url {server.url}")
+    click.echo(f"  --proxy-list-url {server.proxy_list_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        logging.info("stub server: %s", server.stats())
+
+
+@cli.command("gaps")
+@click.option(
+    "--start", type=click.DateTime(["%Y-%m-%d"]), default="2013-04-28",
+    show_default=True, help="First snapshot date.",
+)
+@click.option(
+    "--end", type=click.DateTime(["%Y-%m-%d"]),
+    help="Snapshot date at which to stop, exclusive. Defaults to today.",
+)
+@click.option(
+    "--step", type=click.IntRange(min=1), default=7, show_default=True,
+    help="Number of days between snapshots.",
+)
+@click.option(
+    "--coin", "coins", type=int, multiple=True,
+    help="List the missing snapshot dates of this coin id; repeatable.",
+)
+def gaps(
+    start: Optional[dt.datetime] = None,
+    end: Optional[dt.datetime] = None,
+    step: int = 7,
+    coins: Tuple[int, ...] = (),
+) -> None:
+    """List the snapshot dates, or coin and date pairs, not ingested."""
+    # Import local modules
+    from .backfill import date_range
+    from .checkpoint import missing_dates, missing_pairs
+    from .data_model import session_scope
+
+    # Declare variables
+    start_date = start.date() if start else dt.date(2013, 4, 28)
+    end_date = end.date() if end else dt.datetime.today().date()
+    dates = list(date_range(start_date, end_date, step))
 
-    # Extract latest data and populate talbes
-    populate(query_date, proxy)
+    with session_scope() as session:
+        if coins:
+            for coin_id, date in missing_pairs(session, dates, coins):
+                click.echo(f"{coin_id}\t{date:%Y-%m-%d}")
+        else:
+            for date in missing_dates(session, dates):
+                click.echo(f"{date:%Y-%m-%d}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,304 @@
+"""
+Concurrent backfill engine.
+
+Fetch many snapshot dates at once and hand them to a single database writer
+through a bounded queue, so that network waits overlap with database writes.
+Progress is checkpointed per date so that an interrupted backfill resumes
+where it stopped. Pages may be converted into row batches on a pool of
+processes, leaving only the writes to the writer.
+"""
+
+# Import standard modules
+import asyncio
+import datetime
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+# Import third-party modules
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data.bulk import RowBatches, build_batches, merge_batches, split_page
+from cmc_data.checkpoint import (
+    COMPLETE, FAILED, completed_dates, finish_job, start_job,
+)
+from cmc_data.client import Client
+from cmc_data.ingest import extract_pages, ingest_snapshot
+from cmc_data.metrics import TRANSFORM_SECONDS
+
+
+def date_range(
+    start: datetime.date, end: datetime.date, step: int = 7,
+) -> Iterator[datetime.date]:
+    """
+    Generate the snapshot dates between `start` and `end`.
+
+    Parameters
+    ----------
+        start : datetime.date
+            First date, inclusive.
+
+        end : datetime.date
+            Last date, exclusive.
+
+        step : int
+            Number of days between consecutive dates. Default 7.
+
+    Returns
+    -------
+        Iterator[datetime.date]
+            The snapshot dates.
+
+    Raises
+    ------
+        ValueError
+            * If `step` is not positive.
+    """
+    if step < 1:
+        raise ValueError("`step` parameter should be a positive integer")
+
+    date = start
+    while date < end:
+        yield date
+        date += datetime.timedelta(step)
+
+
+async def backfill(
+    dates: Iterable[datetime.date],
+    workers: int = 4,
+    queue_size: int = 8,
+    choose_proxy: Optional[Callable[[], Optional[dict]]] = None,
+    client: Optional[Client] = None,
+    checkpoint: Optional[Session] = None,
+    attempts: int = 3,
+    retry_backoff: float = 60.0,
+    processes: int = 0,
+    chunk_size: int = 1000,
+    server: Optional[str] = None,
+    **ingest_options: Any,
+) -> Dict[str, int]:
+    """
+    Extract and ingest many snapshot dates concurrently.
+
+    Up to `workers` dates are fetched at once on a thread pool. Fetched
+    pages are put on a queue of at most `queue_size` pages which is drained
+    by a single writer thread, the only one using the database. Dates which
+    fail are retried with exponential backoff.
+
+    With `processes`, every page is split into chunks converted into row
+    batches on a pool of processes, so that the conversion uses every core
+    while the writer only writes.
+
+    Parameters
+    ----------
+        dates : Iterable[datetime.date]
+            The snapshot dates to extract and ingest.
+
+        workers : int
+            Maximum number of concurrent fetches. Default 4.
+
+        queue_size : int
+            Maximum number of fetched pages waiting to be written.
+            Default 8.
+
+        choose_proxy : Callable[[], dict], NoneType
+            Return the proxy server to use for a fetch; called on the fetch
+            threads, as it may block. Default `None`.
+
+        client : Client, NoneType
+            HTTP client shared by the fetches; its connection pool should
+            hold at least `workers` connections. Default `None`.
+
+        checkpoint : sqlalchemy.orm.Session, NoneType
+            Session where to record the ingestion jobs. Dates whose job is
+            complete are skipped. If `None`, nothing is recorded.
+            Default `None`.
+
+        attempts : int
+            Maximum number of attempts per date. Default 3.
+
+        retry_backoff : float
+            Delay in seconds before the second attempt of a date, doubled
+            for every subsequent one. Default 60.
+
+        processes : int
+            Number of processes converting the pages into row batches,
+            which are then written in bulk. If 0, the writer converts the
+            pages itself. Default 0.
+
+        chunk_size : int
+            Maximum number of entries per chunk sent to a process.
+            Default 1000.
+
+        server : str, NoneType
+            Server of the listings; see `cmc_data.ingest.base_url`.
+            Default `None`.
+
+        **ingest_options : Any
+            Keyword arguments of `cmc_data.ingest_snapshot`.
+
+    Returns
+    -------
+        Dict[str, int]
+            The number of dates which were skipped, retried, failed to be
+            fetched, failed to be ingested and were ingested.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(workers)
+    pages: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    summary = {
+        "skipped": 0,
+        "retried": 0,
+        "fetch_failed": 0,
+        "ingest_failed": 0,
+        "ingested": 0,
+    }
+    dates = list(dates)
+
+    with ExitStack() as stack:
+        fetch_pool = stack.enter_context(
+            ThreadPoolExecutor(workers, "cmc-fetch")
+        )
+        write_pool = stack.enter_context(ThreadPoolExecutor(1, "cmc-write"))
+        # Spawned rather than forked, as threads are already running
+        transform_pool = stack.enter_context(ProcessPoolExecutor(
+            processes, multiprocessing.get_context("spawn"),
+        )) if processes else None
+
+        async def transform(page: list) -> RowBatches:
+            convert = partial(
+                build_batches, columnar=ingest_options.get("columnar", False),
+            )
+            started = time.perf_counter()
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(transform_pool, convert, chunk)
+                for chunk in split_page(page, chunk_size)
+            ))
+            if transform_pool is not None:
+                # Observations made in the worker processes are lost; time
+                # the whole conversion, validation included, instead
+                TRANSFORM_SECONDS.observe(time.perf_counter() - started)
+            return merge_batches(parts)
+
+        async def checkpoint_call(function: Callable, *args: Any) -> None:
+            if checkpoint is None:
+                return
+            try:
+                await loop.run_in_executor(
+                    write_pool, partial(function, checkpoint, *args),
+                )
+            except Exception:
+                # A lost checkpoint only costs a redundant attempt later
+                logging.warning(
+                    "failed to checkpoint %s", args[0], exc_info=True,
+                )
+                await loop.run_in_executor(write_pool, checkpoint.rollback)
+
+        async def fetch(date: datetime.date) -> None:
+            for attempt in range(attempts):
+                if attempt:
+                    summary["retried"] += 1
+                    await asyncio.sleep(retry_backoff * 2 ** (attempt - 1))
+
+                # Resolved by the writer with the outcome of the attempt
+                done = loop.create_future()
+                async with semaphore:
+                    # May health-check the proxies, off the event loop
+                    proxy = await loop.run_in_executor(
+                        fetch_pool, choose_proxy,
+                    ) if choose_proxy else None
+                    snapshot = extract_pages(date, proxy, client, server)
+                    try:
+                        while True:
+                            page = await loop.run_in_executor(
+                                fetch_pool, next, snapshot, None,
+                            )
+                            if page is None:
+                                break
+                            if transform_pool is not None:
+                                page = await transform(page)
+                            await pages.put((date, page, None))
+                    except Exception as error:
+                        logging.warning(
+                            "failed data extraction for %s", date,
+                            exc_info=True,
+                        )
+                        await pages.put((date, error, done))
+                    else:
+                        await pages.put((date, None, done))
+
+                outcome = await done
+                if outcome == "ingested" or attempt == attempts - 1:
+                    summary[outcome] += 1
+                    return
+
+        async def write() -> None:
+            # Progress of the current attempt of each date
+            jobs: Dict[datetime.date, Dict[str, Any]] = {}
+            while True:
+                item = await pages.get()
+                if item is None:
+                    return
+                date, page, done = item
+                if date not in jobs:
+                    jobs[date] = {
+                        "pages": 0, "entries": 0, "rejected": 0, "error": None,
+                    }
+                    await checkpoint_call(start_job, date)
+                job = jobs[date]
+
+                if isinstance(page, (list, RowBatches)):
+                    job["pages"] += 1
+                    counts = await loop.run_in_executor(
+                        write_pool,
+                        partial(ingest_snapshot, date, page, **ingest_options),
+                    )
+                    if counts is None:
+                        job["error"] = job["error"] or "ingestion failed"
+                    else:
+                        job["entries"] += counts["entries"]
+                        job["rejected"] += counts["rejected"]
+                    continue
+
+                # End of the snapshot
+                del jobs[date]
+                if page is not None:
+                    outcome = "fetch_failed"
+                    job["error"] = f"extraction failed: {page!r}"
+                elif job["error"]:
+                    outcome = "ingest_failed"
+                else:
+                    outcome = "ingested"
+                await checkpoint_call(
+                    finish_job,
+                    date,
+                    COMPLETE if outcome == "ingested" else FAILED,
+                    job["pages"],
+                    job["entries"],
+                    job["rejected"],
+                    job["error"],
+                )
+                done.set_result(outcome)
+
+        if checkpoint is not None:
+            completed = await loop.run_in_executor(
+                write_pool, completed_dates, checkpoint, dates,
+            )
+            summary["skipped"] = len(completed)
+            dates = [date for date in dates if date not in completed]
+
+        writer = asyncio.ensure_future(write())
+        try:
+            await asyncio.gather(*(fetch(date) for date in dates))
+        finally:
+            await pages.put(None)
+            await writer
+
+    logging.info("backfill summary: %s", summary)
+
+    return summary
@@ -0,0 +1,388 @@
+"""
+Set-based bulk ingestion.
+
+Convert a page of listings into per-table row batches and write each batch
+with a single dialect-aware `INSERT ... ON CONFLICT` statement. Large pages
+may be split into chunks converted in parallel, then merged back. The
+`market_stats` and `quote` rows may be kept as a columnar snapshot.
+"""
+
+# Import standard modules
+from typing import (
+    Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Set, Tuple,
+)
+
+# Import third-party modules
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+# Import local modules
+from cmc_data.columnar import Snapshot
+from cmc_data.data_model.models import (
+    Coin, Market, Platform, Quote, Tag, TagReference,
+)
+from cmc_data.identity import IdentityCache
+from cmc_data.data_model.dedupe import natural_key
+from cmc_data.loaders import insert_ignore, load_rows, load_snapshot
+from cmc_data.metrics import TRANSFORM_SECONDS
+from cmc_data.records import DecodedPage, Listing, decode_listings
+
+
+class RowBatches(NamedTuple):
+    """Rows extracted from a page of listings, grouped by table."""
+
+    coins: Dict[int, dict]
+    platforms: Dict[int, dict]
+    tag_names: Set[str]
+    tags: Set[Tuple[int, str]]
+    markets: List[dict]
+    quotes: List[dict]
+    rejected: List[Any]
+    snapshot: Optional[Snapshot] = None
+
+    @property
+    def listed(self) -> int:
+        """Number of listings which passed validation."""
+        if self.snapshot is not None:
+            return len(self.snapshot)
+        return len(self.markets)
+
+
+def _entry_rows(listing: Listing, append_only: bool = True) -> Dict[str, Any]:
+    """
+    Extract the table rows of a single listing.
+
+    Parameters
+    ----------
+        listing : Listing
+            Validated listing record.
+
+        append_only : bool
+            Extract the `market_stats` and `quote` rows too. Default `True`.
+
+    Returns
+    -------
+        Dict[str, Any]
+            The rows for each table touched by the listing.
+    """
+    rows: Dict[str, Any] = {
+        "coin": {
+            "id": listing.id,
+            "name": listing.name.lower(),
+            "symbol": listing.symbol.lower(),
+            "slug": listing.slug.lower(),
+            "date_added": listing.date_added,
+            "max_supply": listing.max_supply,
+        },
+        "platform_coin": None,
+        "platform": None,
+        "tags": [tag.lower() for tag in listing.tags],
+        "market": {
+            "coin_id": listing.id,
+            "num_market_pairs": listing.num_market_pairs,
+            "circulating_supply": listing.circulating_supply,
+            "total_supply": listing.total_supply,
+            "cmc_rank": listing.cmc_rank,
+            "last_updated": listing.last_updated,
+        },
+        "quotes": [] if not append_only else [
+            {
+                "coin_id": listing.id,
+                "currency": quote.currency,
+                "price": quote.price,
+                "vol_24": quote.volume_24h,
+                "pct_change_1h": quote.percent_change_1h,
+                "pct_change_24h": quote.percent_change_24h,
+                "pct_change_7d": quote.percent_change_7d,
+                "market_cap": quote.market_cap,
+                "fully_diluted_mc": quote.fully_diluted_market_cap,
+                "last_updated": quote.last_updated,
+            }
+            for quote in listing.quotes
+        ],
+    }
+
+    if not append_only:
+        rows["market"] = None
+
+    platform = listing.platform
+    if platform is not None:
+        rows["platform_coin"] = {
+            "id": platform.id,
+            "name": platform.name.lower(),
+            "symbol": platform.symbol.lower(),
+            "slug": platform.slug.lower(),
+            "date_added": None,
+            "max_supply": None,
+        }
+        rows["platform"] = {
+            "id": listing.id,
+            "platform_id": platform.id,
+            "token_address": platform.token_address.encode(),
+        }
+
+    return rows
+
+
+def build_batches(data: Iterable[Any], columnar: bool = False) -> RowBatches:
+    """
+    Convert a page of listings into per-table row batches.
+
+    The page is validated first; entries which fail validation are set
+    aside in `RowBatches.rejected` before any database work starts.
+
+    Parameters
+    ----------
+        data : Iterable[Any]
+            JSON-like response from the "coinmarketcap" server, or
+            `Listing` records.
+
+        columnar : bool
+            Keep the `market_stats` and `quote` rows in
+            `RowBatches.snapshot` rather than in lists of dictionaries.
+            Requires NumPy. Default `False`.
+
+    Returns
+    -------
+        RowBatches
+            The rows to write, grouped by table.
+    """
+    page = decode_listings(data)
+    with TRANSFORM_SECONDS.time():
+        return _build_batches(page, columnar)
+
+
+def _build_batches(page: DecodedPage, columnar: bool) -> RowBatches:
+    """
+    Group the rows of validated listings by table.
+
+    Parameters
+    ----------
+        page : DecodedPage
+            The listings which passed validation, and those which did not.
+
+        columnar : bool
+            See `build_batches`.
+
+    Returns
+    -------
+        RowBatches
+            The rows to write, grouped by table; the rejected entries of
+            `page` are carried over.
+    """
+    batches = RowBatches(
+        {}, {}, set(), set(), [], [], page.rejected,
+        Snapshot.from_listings(page.listings) if columnar else None,
+    )
+    platform_coins: Dict[int, dict] = {}
+
+    for listing in page.listings:
+        rows = _entry_rows(listing, append_only=not columnar)
+        coin_id = rows["coin"]["id"]
+        batches.coins[coin_id] = rows["coin"]
+        if rows["platform_coin"]:
+            platform_coins[rows["platform_coin"]["id"]] = rows["platform_coin"]
+            batches.platforms[coin_id] = rows["platform"]
+        for tag in rows["tags"]:
+            batches.tag_names.add(tag)
+            batches.tags.add((coin_id, tag))
+        if rows["market"] is not None:
+            batches.markets.append(rows["market"])
+        batches.quotes.extend(rows["quotes"])
+
+    # Listed coins carry more details than their platform stubs
+    for coin_id, row in platform_coins.items():
+        batches.coins.setdefault(coin_id, row)
+
+    return batches
+
+
+def split_page(data: List[Any], chunk_size: int) -> List[List[Any]]:
+    """
+    Split a page of listings into chunks converted independently.
+
+    Parameters
+    ----------
+        data : List[Any]
+            JSON-like response from the "coinmarketcap" server.
+
+        chunk_size : int
+            Maximum number of entries per chunk.
+
+    Returns
+    -------
+        List[List[Any]]
+            The chunks, in order.
+
+    Raises
+    ------
+        ValueError
+            * If `chunk_size` is not positive.
+    """
+    if chunk_size < 1:
+        raise ValueError("`chunk_size` parameter should be a positive integer")
+
+    return [
+        data[start:start + chunk_size]
+        for start in range(0, len(data), chunk_size)
+    ]
+
+
+def merge_batches(parts: Iterable[RowBatches]) -> RowBatches:
+    """
+    Merge the row batches of the chunks of a page.
+
+    Parameters
+    ----------
+        parts : Iterable[RowBatches]
+            The batches of each chunk, in order.
+
+    Returns
+    -------
+        RowBatches
+            The same batches as `build_batches` of the whole page.
+    """
+    merged = RowBatches({}, {}, set(), set(), [], [], [])
+    platform_coins: Dict[int, dict] = {}
+    snapshots = []
+
+    for part in parts:
+        if part.snapshot is not None:
+            snapshots.append(part.snapshot)
+            listed = set(part.snapshot.markets["coin_id"].tolist())
+        else:
+            listed = {row["coin_id"] for row in part.markets}
+        for coin_id, row in part.coins.items():
+            if coin_id in listed:
+                merged.coins[coin_id] = row
+            else:
+                platform_coins.setdefault(coin_id, row)
+        merged.platforms.update(part.platforms)
+        merged.tag_names.update(part.tag_names)
+        merged.tags.update(part.tags)
+        merged.markets.extend(part.markets)
+        merged.quotes.extend(part.quotes)
+        merged.rejected.extend(part.rejected)
+
+    # Listed coins carry more details than their platform stubs
+    for coin_id, row in platform_coins.items():
+        merged.coins.setdefault(coin_id, row)
+
+    if snapshots:
+        return merged._replace(snapshot=Snapshot.concat(snapshots))
+
+    return merged
+
+
+def _is_cached(
+    cache: Optional[IdentityCache], table: str, key: Hashable,
+) -> bool:
+    """Check whether `cache` proves that a row exists."""
+    return cache is not None and cache.contains(table, key) is True
+
+
+def write_batches(
+    connection: Connection,
+    batches: RowBatches,
+    cache: Optional[IdentityCache] = None,
+    copy: bool = False,
+) -> Dict[str, int]:
+    """
+    Write row batches to the database.
+
+    Every table is upserted: rows whose primary or natural key is already
+    stored are skipped, so that writing the same batches again is a no-op.
+
+    Parameters
+    ----------
+        connection : sqlalchemy.engine.Connection
+            Connection on which to execute the statements. The caller owns
+            the transaction.
+
+        batches : RowBatches
+            Rows to write.
+
+        cache : IdentityCache, NoneType
+            Identities already stored in the database. Rows known to the
+            cache are not sent again; new rows are added to it. If the
+            transaction is rolled back, the caller must invalidate the
+            cache. Default `None`.
+
+        copy : bool
+            Load `market_stats` and `quote` rows through PostgreSQL's
+            `COPY ... FROM STDIN`. Default `False`.
+
+    Returns
+    -------
+        Dict[str, int]
+            The number of rows sent to each table.
+    """
+    coins = [
+        row for coin_id, row in batches.coins.items()
+        if not _is_cached(cache, Coin.__tablename__, coin_id)
+    ]
+    platforms = [
+        row for coin_id, row in batches.platforms.items()
+        if not _is_cached(cache, Platform.__tablename__, coin_id)
+    ]
+    insert_ignore(connection, Coin.__table__, coins)
+    insert_ignore(connection, Platform.__table__, platforms)
+
+    tag_ids: Dict[str, int] = {}
+    for name in batches.tag_names:
+        tag_id = cache.get(TagReference.__tablename__, name) \
+            if cache is not None else None
+        if tag_id is not None:
+            tag_ids[name] = tag_id
+    tag_names = sorted(batches.tag_names.difference(tag_ids))
+
+    if tag_names:
+        insert_ignore(
+            connection,
+            TagReference.__table__,
+            [{"name": name} for name in tag_names],
+            ["name"],
+        )
+        tag_ids.update(connection.execute(
+            select(TagReference.name, TagReference.id)
+            .where(TagReference.name.in_(tag_names))
+        ).all())
+
+    tag_rows = [
+        {"coin_id": coin_id, "tag_id": tag_ids[name]}
+        for coin_id, name in sorted(batches.tags)
+    ]
+    insert_ignore(
+        connection, Tag.__table__, tag_rows, natural_key(Tag.__table__),
+    )
+    for model, rows in ((Market, batches.markets), (Quote, batches.quotes)):
+        load_rows(
+            connection, model.__table__, rows, copy,
+            natural_key(model.__table__),
+        )
+    if batches.snapshot is not None:
+        for model in (Market, Quote):
+            load_snapshot(
+                connection, model.__table__, batches.snapshot, copy,
+                natural_key(model.__table__),
+            )
+
+    if cache is not None:
+        for row in coins:
+            cache.add(Coin.__tablename__, row["id"])
+        for row in platforms:
+            cache.add(Platform.__tablename__, row["id"])
+        for name in tag_names:
+            cache.add(TagReference.__tablename__, name, tag_ids[name])
+
+    return {
+        Coin.__tablename__: len(coins),
+        Platform.__tablename__: len(platforms),
+        TagReference.__tablename__: len(tag_names),
+        Tag.__tablename__: len(tag_rows),
+        Market.__tablename__: batches.listed,
+        Quote.__tablename__: len(batches.quotes) + (
+            len(batches.snapshot.quotes["coin_id"])
+            if batches.snapshot is not None else 0
+        ),
+    }
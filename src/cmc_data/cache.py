@@ -0,0 +1,229 @@
+"""
+On-disk cache of raw API responses.
+
+Historical listings never change, so every response is stored compressed
+under a digest of its endpoint and normalised query parameters. The cache
+can replay a backfill without touching the network.
+"""
+
+# Import standard modules
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
+
+# Import third-party modules
+import requests
+
+
+class CacheMiss(requests.RequestException):
+    """Response missing from the cache while replaying offline."""
+
+
+def normalize_parameters(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Normalise query parameters for use in a cache key.
+
+    Parameters
+    ----------
+        params : Dict[str, Any], NoneType
+            Query parameters of a request.
+
+    Returns
+    -------
+        Dict[str, str]
+            The parameters with `None` values dropped, the remaining values
+            converted to strings and the keys sorted.
+    """
+    return {
+        str(key): str(value)
+        for key, value in sorted((params or {}).items())
+        if value is not None
+    }
+
+
+class ResponseCache:
+    """
+    Compressed, size-capped cache of raw API responses.
+
+    Parameters
+    ----------
+        directory : str, pathlib.Path
+            Directory where to store the responses.
+
+        max_bytes : int
+            Maximum total size of the stored responses; the least recently
+            used ones are evicted beyond that. Default 2 GiB.
+
+        offline : bool
+            Raise `CacheMiss` instead of sending a request for responses
+            which are not cached. Default `False`.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_bytes: int = 2 * 1024 ** 3,
+        offline: bool = False,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Compute the cache key of a request.
+
+        Parameters
+        ----------
+            url : str
+                URL of the request; its query string is ignored.
+
+            params : Dict[str, Any], NoneType
+                Query parameters of the request. Default `None`.
+
+        Returns
+        -------
+            str
+                The SHA-256 digest of the endpoint and the parameters.
+        """
+        parts = urlsplit(url)
+        endpoint = urlunsplit(parts._replace(query="", fragment=""))
+        payload = json.dumps(
+            [endpoint, normalize_parameters(params)], separators=(",", ":"),
+        )
+
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json.gz"
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*/*.json.gz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _measure(self) -> int:
+        """Return the running total size, measured on first use; locked."""
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of the stored responses."""
+        with self._lock:
+            return self._measure()
+
+    def get(
+        self, url: str, params: Optional[Dict[str, Any]] = None,
+    ) -> Optional[bytes]:
+        """
+        Read a response from the cache.
+
+        Parameters
+        ----------
+            url : str
+                URL of the request.
+
+            params : Dict[str, Any], NoneType
+                Query parameters of the request. Default `None`.
+
+        Returns
+        -------
+            bytes
+                The raw response body.
+
+            NoneType
+                If the response is not cached.
+        """
+        path = self._path(self.key(url, params))
+        try:
+            with gzip.open(path, "rb") as file:
+                content = file.read()
+        except (FileNotFoundError, OSError, EOFError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.hits += 1
+
+        return content
+
+    def put(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        content: bytes,
+    ) -> None:
+        """
+        Store a response in the cache, evicting old ones if necessary.
+
+        Parameters
+        ----------
+            url : str
+                URL of the request.
+
+            params : Dict[str, Any], NoneType
+                Query parameters of the request.
+
+            content : bytes
+                The raw response body.
+
+        Returns
+        -------
+            NoneType
+        """
+        path = self._path(self.key(url, params))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Measure the responses stored so far before adding this one
+        with self._lock:
+            self._measure()
+        file_descriptor, temporary = tempfile.mkstemp(dir=path.parent)
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(gzip.compress(content))
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        with self._lock:
+            self._size += path.stat().st_size - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used responses until under the cap."""
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            self._size -= size
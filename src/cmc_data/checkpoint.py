@@ -0,0 +1,289 @@
+"""
+Ingestion checkpoints.
+
+Every snapshot date handled by a backfill is recorded in the
+`ingestion_job` table along with its status, row counts and timing, so that
+an interrupted or partially failed backfill resumes where it stopped.
+"""
+
+# Import standard modules
+import datetime
+from typing import (
+    Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Union,
+)
+
+# Import third-party modules
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import and_, exists, select
+
+# Import local modules
+from cmc_data.data_model.models import Coin, IngestionJob, Market
+
+# Job statuses
+PENDING = "pending"
+RUNNING = "running"
+COMPLETE = "complete"
+FAILED = "failed"
+
+# Number of `EXISTS` probes sent per query
+PROBE_CHUNK_SIZE = 100
+
+
+def _as_date(value: Union[str, datetime.date]) -> datetime.date:
+    """Convert the result of SQL `DATE()`, a string on SQLite, to a date."""
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value[:10])
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+
+def completed_dates(
+    session: Session, dates: Iterable[datetime.date],
+) -> Set[datetime.date]:
+    """
+    Select the snapshot dates which were already ingested.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session.
+
+        dates : Iterable[datetime.date]
+            The snapshot dates to look up.
+
+    Returns
+    -------
+        Set[datetime.date]
+            The dates among `dates` whose job is complete.
+    """
+    dates = list(dates)
+    if not dates:
+        return set()
+
+    query = select(IngestionJob.snapshot_date).where(
+        IngestionJob.status == COMPLETE,
+        IngestionJob.snapshot_date.between(min(dates), max(dates)),
+    )
+
+    return set(session.execute(query).scalars()) & set(dates)
+
+
+def start_job(session: Session, date: datetime.date) -> None:
+    """
+    Record the start of an attempt to ingest a snapshot date.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session.
+
+        date : datetime.date
+            The snapshot date.
+
+    Returns
+    -------
+        NoneType
+    """
+    job = session.get(IngestionJob, date)
+    if job is None:
+        job = IngestionJob(snapshot_date=date, attempts=0)
+        session.add(job)
+
+    job.status = RUNNING
+    job.attempts += 1
+    job.pages = job.entries = job.rejected = 0
+    job.started_at = datetime.datetime.utcnow()
+    job.finished_at = job.duration = job.error = None
+    session.commit()
+
+
+def finish_job(
+    session: Session,
+    date: datetime.date,
+    status: str,
+    pages: int = 0,
+    entries: int = 0,
+    rejected: int = 0,
+    error: Optional[str] = None,
+) -> None:
+    """
+    Record the outcome of an attempt to ingest a snapshot date.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session.
+
+        date : datetime.date
+            The snapshot date; `start_job` must have been called for it.
+
+        status : str
+            Either `COMPLETE` or `FAILED`.
+
+        pages, entries, rejected : int
+            Number of pages fetched, entries ingested and entries rejected.
+            Default 0.
+
+        error : str, NoneType
+            Description of the failure. Default `None`.
+
+    Returns
+    -------
+        NoneType
+    """
+    job = session.get(IngestionJob, date)
+    job.status = status
+    job.pages = pages
+    job.entries = entries
+    job.rejected = rejected
+    job.error = error
+    job.finished_at = datetime.datetime.utcnow()
+    job.duration = (job.finished_at - job.started_at).total_seconds()
+    # Release the claim of a worker, if any
+    job.claimed_by = job.lease_expires = None
+    session.commit()
+
+
+def create_job_table(engine: Engine) -> None:
+    """
+    Create the `ingestion_job` table, or add the columns it lacks.
+
+    Databases created before the checkpoint table was introduced lack the
+    table, and those created before the work queue lack its columns.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            The database.
+
+    Returns
+    -------
+        NoneType
+    """
+    table = IngestionJob.__table__
+    table.create(engine, checkfirst=True)
+
+    existing = {
+        column["name"] for column in inspect(engine).get_columns(table.name)
+    }
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as connection:
+        for column in table.columns:
+            if column.name not in existing:
+                connection.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.quote(column.name)} "
+                    f"{column.type.compile(engine.dialect)}"
+                ))
+
+
+def _day(date: datetime.date) -> Any:
+    """Condition of the `market_stats` rows of a day, a half-open range."""
+    start = datetime.datetime.combine(date, datetime.time())
+
+    return and_(
+        Market.last_updated >= start,
+        Market.last_updated < start + datetime.timedelta(1),
+    )
+
+
+def _existing(session: Session, probes: Dict[Hashable, Any]) -> Set[Hashable]:
+    """
+    Probe for `market_stats` rows, one `EXISTS` per condition.
+
+    Each probe stops at the first matching entry of an index, instead of
+    reading every row of the range. Returns the keys of the conditions
+    matching at least one row.
+    """
+    keys = list(probes)
+    found = set()
+    for start in range(0, len(keys), PROBE_CHUNK_SIZE):
+        chunk = keys[start:start + PROBE_CHUNK_SIZE]
+        row = session.execute(select(*(
+            exists().where(probes[key]).label(f"probe_{index}")
+            for index, key in enumerate(chunk)
+        ))).one()
+        found.update(key for key, value in zip(chunk, row) if value)
+
+    return found
+
+
+def missing_dates(
+    session: Session, dates: Iterable[datetime.date],
+) -> List[datetime.date]:
+    """
+    Find the snapshot dates without any row in `market_stats`.
+
+    Each date is probed with an `EXISTS` over its range of the
+    `last_updated` index.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session.
+
+        dates : Iterable[datetime.date]
+            The expected snapshot dates.
+
+    Returns
+    -------
+        List[datetime.date]
+            The sorted dates among `dates` which are missing.
+    """
+    dates = sorted(set(dates))
+    found = _existing(session, {date: _day(date) for date in dates})
+
+    return [date for date in dates if date not in found]
+
+
+def missing_pairs(
+    session: Session,
+    dates: Iterable[datetime.date],
+    coin_ids: Iterable[int],
+) -> List[Tuple[int, datetime.date]]:
+    """
+    Find the coin and snapshot date pairs without a row in `market_stats`.
+
+    Dates before a coin was added to the market are not expected. Each
+    pair is probed with an `EXISTS` over the natural key of the table.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session.
+
+        dates : Iterable[datetime.date]
+            The expected snapshot dates.
+
+        coin_ids : Iterable[int]
+            Identifiers of the coins to check.
+
+    Returns
+    -------
+        List[Tuple[int, datetime.date]]
+            The sorted missing pairs.
+    """
+    dates = sorted(set(dates))
+    coin_ids = sorted(set(coin_ids))
+    if not dates or not coin_ids:
+        return []
+
+    added = dict(session.execute(
+        select(Coin.id, Coin.date_added).where(Coin.id.in_(coin_ids))
+    ).all())
+
+    expected = [
+        (coin_id, date)
+        for coin_id in coin_ids
+        for date in dates
+        if not added.get(coin_id) or date >= _as_date(added[coin_id])
+    ]
+    found = _existing(session, {
+        (coin_id, date): and_(Market.coin_id == coin_id, _day(date))
+        for coin_id, date in expected
+    })
+
+    return [pair for pair in expected if pair not in found]
@@ -0,0 +1,331 @@
+"""
+HTTP client for the CoinMarketCap API.
+
+A pooled `requests.Session` with keep-alive, compression, adaptive rate
+limiting and retries with exponential backoff and jitter.
+"""
+
+# Import standard modules
+import datetime
+import logging
+import random
+from email.utils import parsedate_to_datetime
+from time import monotonic, sleep
+from typing import Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Import third-party modules
+import requests
+from requests.adapters import HTTPAdapter
+
+# Import local modules
+from cmc_data.cache import CacheMiss, ResponseCache
+from cmc_data.metrics import (
+    DECODE_SECONDS, HTTP_REQUEST_SECONDS, HTTP_RESPONSE_BYTES, HTTP_RETRIES,
+    RATELIMIT_WAIT_SECONDS,
+)
+from cmc_data.proxies import ProxyPool
+from cmc_data.ratelimit import RateLimiter
+from cmc_data.records import loads
+
+# Responses worth another attempt
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Responses which count against the health of a proxy server
+PROXY_ERROR_STATUSES = RETRY_STATUSES | {403, 407}
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """
+    Parse the value of a `Retry-After` header.
+
+    Parameters
+    ----------
+        value : str, NoneType
+            Either a number of seconds or an HTTP date.
+
+    Returns
+    -------
+        float
+            Number of seconds to wait.
+
+        NoneType
+            If `value` is missing or malformed.
+    """
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        until = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = datetime.datetime.now(until.tzinfo)
+
+    return max(0.0, (until - now).total_seconds())
+
+
+class Client:
+    """
+    Reusable HTTP client.
+
+    Connections are pooled and kept alive across requests, pages and dates.
+    Every attempt waits for the rate limiter, keyed by host and proxy
+    server. Responses with a status in `RETRY_STATUSES` and connection
+    errors are retried with exponential backoff and jitter, except "429 Too
+    Many Requests" which slows the rate limiter down instead.
+
+    Parameters
+    ----------
+        retries : int
+            Maximum number of retries per request. Default 5.
+
+        backoff : float
+            Delay in seconds before the first retry, doubled for every
+            subsequent one. Default 1.
+
+        max_backoff : float
+            Maximum delay in seconds between two attempts. Default 60.
+
+        jitter : float
+            Maximum random delay in seconds added to each backoff.
+            Default 1.
+
+        timeout : float
+            Connect and read timeout in seconds. Default 30.
+
+        pool_size : int
+            Maximum number of connections kept alive per host. Default 10.
+
+        limiter : RateLimiter, NoneType
+            Rate limiter shared by the requests. If `None`, a limiter with
+            the default settings is created. Default `None`.
+
+        cache : ResponseCache, NoneType
+            Cache of the JSON responses. Default `None`.
+
+        proxy_pool : ProxyPool, NoneType
+            Pool informed of the latency and outcome of every request sent
+            through one of its proxy servers. Default `None`.
+    """
+
+    def __init__(
+        self,
+        retries: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        jitter: float = 1.0,
+        timeout: float = 30.0,
+        pool_size: int = 10,
+        limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+    ) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.timeout = timeout
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.cache = cache
+        self.proxy_pool = proxy_pool
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+
+    @staticmethod
+    def limiter_keys(url: str, proxies: Optional[dict]) -> Tuple[str, ...]:
+        """
+        Return the rate limiter buckets a request counts against.
+
+        Parameters
+        ----------
+            url : str
+                URL of the request.
+
+            proxies : dict, NoneType
+                Proxy servers of the request, keyed by scheme.
+
+        Returns
+        -------
+            Tuple[str, ...]
+                The host and, if any, the proxy server of the request, from
+                the least to the most specific.
+        """
+        parts = urlsplit(url)
+        proxy = (proxies or {}).get(parts.scheme)
+
+        return (parts.netloc, proxy) if proxy else (parts.netloc,)
+
+    def backoff_delay(
+        self, attempt: int, retry_after: Optional[str] = None,
+    ) -> float:
+        """
+        Compute the delay before the next attempt.
+
+        Parameters
+        ----------
+            attempt : int
+                Number of the failed attempt, starting from 0.
+
+            retry_after : str, NoneType
+                Value of the `Retry-After` response header. Default `None`.
+
+        Returns
+        -------
+            float
+                The delay in seconds.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        delay = max(delay, retry_after_seconds(retry_after) or 0.0)
+
+        return delay + random.uniform(0, self.jitter)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Send a GET request, retrying transient failures.
+
+        Parameters
+        ----------
+            url : str
+                URL where to send the request to.
+
+            **kwargs : Any
+                Parameters of the `requests.Session.get` method.
+
+        Returns
+        -------
+            requests.Response
+                The response of the last attempt.
+
+        Raises
+        ------
+            ConnectionError, Timeout
+                * If the last attempt failed to connect or timed out.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        keys = self.limiter_keys(url, kwargs.get("proxies"))
+        # Proxy server of the request, if it belongs to the pool
+        proxy = keys[1] if len(keys) > 1 and self.proxy_pool else None
+        attempt = 0
+        while True:
+            RATELIMIT_WAIT_SECONDS.observe(self.limiter.acquire(*keys))
+            retry_after = None
+            throttled = False
+            started = monotonic()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                HTTP_REQUEST_SECONDS.observe(
+                    monotonic() - started, status="error",
+                )
+                if proxy:
+                    self.proxy_pool.record(proxy, error=True)
+                if attempt >= self.retries:
+                    raise
+                logging.debug("request to %s failed", url, exc_info=True)
+            else:
+                HTTP_REQUEST_SECONDS.observe(
+                    monotonic() - started, status=response.status_code,
+                )
+                HTTP_RESPONSE_BYTES.inc(len(response.content))
+                if proxy:
+                    self.proxy_pool.record(
+                        proxy,
+                        monotonic() - started,
+                        error=response.status_code in PROXY_ERROR_STATUSES,
+                    )
+                retry_after = response.headers.get("Retry-After")
+                if response.status_code == 429:
+                    throttled = True
+                    self.limiter.throttle(
+                        keys[-1], retry_after_seconds(retry_after),
+                    )
+                elif response.status_code not in RETRY_STATUSES:
+                    self.limiter.succeed(*keys)
+
+                if response.status_code not in RETRY_STATUSES \
+                        or attempt >= self.retries:
+                    return response
+                logging.debug(
+                    "request to %s returned %s", url, response.status_code,
+                )
+
+            if not throttled:
+                # The rate limiter paces the retries of throttled requests
+                sleep(self.backoff_delay(attempt, retry_after))
+            attempt += 1
+            HTTP_RETRIES.inc()
+
+    def get_json(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Send a GET request and decode its JSON response.
+
+        Responses are served from, and stored in, the cache if any.
+
+        Parameters
+        ----------
+            url : str
+                URL where to send the request to.
+
+            params : dict, NoneType
+                Query parameters of the request. Default `None`.
+
+            **kwargs : Any
+                Parameters of the `requests.Session.get` method.
+
+        Returns
+        -------
+            Any
+                The decoded response.
+
+        Raises
+        ------
+            HTTPError
+                * If bad query or problems on server side.
+
+            CacheMiss
+                * If the response is not cached while replaying offline.
+        """
+        if self.cache is not None:
+            content = self.cache.get(url, params)
+            if content is not None:
+                with DECODE_SECONDS.time(step="json"):
+                    return loads(content)
+            if self.cache.offline:
+                raise CacheMiss(f"response not cached: {url} {params}")
+
+        response = self.get(url, params=params, **kwargs)
+
+        # Validate response
+        if not response.ok:
+            response.raise_for_status()
+
+        with DECODE_SECONDS.time(step="json"):
+            payload = loads(response.content)
+        if self.cache is not None:
+            self.cache.put(url, params, response.content)
+
+        return payload
@@ -0,0 +1,388 @@
+"""
+Columnar snapshot representation.
+
+A page of listings is a table of a few thousand coins with a fixed set of
+numeric fields per quote currency. `Snapshot` stores the `market_stats` and
+`quote` rows of a page as NumPy arrays, one per column, so that null
+handling, derived columns, exports and loading work on whole columns
+instead of one row at a time.
+
+Requires NumPy, installed with the "columnar" extra.
+"""
+
+# Import standard modules
+import csv
+import datetime
+from typing import IO, Any, Dict, Iterable, List, Sequence
+
+# Import local modules
+from cmc_data.records import Listing
+
+try:
+    # Import third-party modules
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Kind of each column: "int" for non-null integers, "nullable int" and
+# "float" for numbers with NaN as null, "timestamp" for naive UTC
+# timestamps with NaT as null, and "str".
+MARKET_COLUMNS = {
+    "coin_id": "int",
+    "num_market_pairs": "nullable int",
+    "circulating_supply": "float",
+    "total_supply": "float",
+    "cmc_rank": "nullable int",
+    "last_updated": "timestamp",
+}
+QUOTE_COLUMNS = {
+    "coin_id": "int",
+    "currency": "str",
+    "price": "float",
+    "vol_24": "float",
+    "pct_change_1h": "float",
+    "pct_change_24h": "float",
+    "pct_change_7d": "float",
+    "market_cap": "float",
+    "fully_diluted_mc": "float",
+    "last_updated": "timestamp",
+}
+TABLES = {"market_stats": MARKET_COLUMNS, "quote": QUOTE_COLUMNS}
+
+# Fields of `Listing` and `QuoteRecord` behind the columns
+_MARKET_FIELDS = {"coin_id": "id"}
+_QUOTE_FIELDS = {
+    "vol_24": "volume_24h",
+    "pct_change_1h": "percent_change_1h",
+    "pct_change_24h": "percent_change_24h",
+    "pct_change_7d": "percent_change_7d",
+    "fully_diluted_mc": "fully_diluted_market_cap",
+}
+
+_DTYPES = {
+    "int": "int64",
+    "nullable int": "float64",
+    "float": "float64",
+    "timestamp": "datetime64[us]",
+    "str": "object",
+}
+
+
+def numpy_available() -> bool:
+    """Check whether NumPy, required by `Snapshot`, is installed."""
+    return np is not None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError(
+            "columnar snapshots require NumPy; "
+            "install cmc_data with the 'columnar' extra"
+        )
+
+
+def _column(values: Sequence[Any], kind: str) -> "np.ndarray":
+    """Convert Python values, with `None` as null, into a column."""
+    return np.array(values, dtype=_DTYPES[kind])
+
+
+def _nulls(column: "np.ndarray", kind: str) -> "np.ndarray":
+    """Return the mask of the null values of a column."""
+    if kind in ("nullable int", "float"):
+        return np.isnan(column)
+    if kind == "timestamp":
+        return np.isnat(column)
+    if kind == "str":
+        return np.equal(column, None)
+    return np.zeros(len(column), dtype=bool)
+
+
+def _python_values(column: "np.ndarray", kind: str) -> List[Any]:
+    """Convert a column into Python values, with `None` as null."""
+    nulls = _nulls(column, kind)
+    if kind == "nullable int":
+        column = np.where(nulls, 0, column).astype("int64")
+    values = column.astype(object)
+    values[nulls] = None
+
+    return values.tolist()
+
+
+def _text_values(column: "np.ndarray", kind: str) -> "np.ndarray":
+    """Format a column for CSV, with the empty string as null."""
+    nulls = _nulls(column, kind)
+    if kind == "timestamp":
+        text = np.datetime_as_string(column, unit="us")
+    elif kind == "nullable int":
+        text = np.where(nulls, 0, column).astype("int64").astype(str)
+    else:
+        text = column.astype(str)
+
+    return np.where(nulls, "", text)
+
+
+class Snapshot:
+    """
+    Market and quote rows of a page of listings, stored by column.
+
+    Parameters
+    ----------
+        markets : Dict[str, numpy.ndarray]
+            One array per column of `MARKET_COLUMNS`, one value per listing.
+
+        quotes : Dict[str, numpy.ndarray]
+            One array per column of `QUOTE_COLUMNS`, one value per listing
+            and quote currency.
+    """
+
+    __slots__ = ("markets", "quotes")
+
+    def __init__(
+        self,
+        markets: Dict[str, "np.ndarray"],
+        quotes: Dict[str, "np.ndarray"],
+    ) -> None:
+        _require_numpy()
+        self.markets = markets
+        self.quotes = quotes
+
+    @classmethod
+    def from_listings(cls, listings: Sequence[Listing]) -> "Snapshot":
+        """
+        Build the columns of validated listings.
+
+        Parameters
+        ----------
+            listings : Sequence[Listing]
+                Validated listing records, e.g. `decode_listings(data)`.
+
+        Returns
+        -------
+            Snapshot
+                The columns of the listings.
+        """
+        _require_numpy()
+        markets = {
+            name: _column(
+                [getattr(listing, _MARKET_FIELDS.get(name, name))
+                 for listing in listings],
+                kind,
+            )
+            for name, kind in MARKET_COLUMNS.items()
+        }
+        pairs = [
+            (listing.id, quote)
+            for listing in listings for quote in listing.quotes
+        ]
+        quotes = {"coin_id": _column([coin_id for coin_id, _ in pairs], "int")}
+        for name, kind in QUOTE_COLUMNS.items():
+            if name != "coin_id":
+                field = _QUOTE_FIELDS.get(name, name)
+                quotes[name] = _column(
+                    [getattr(quote, field) for _, quote in pairs], kind,
+                )
+
+        return cls(markets, quotes)
+
+    @classmethod
+    def concat(cls, snapshots: Iterable["Snapshot"]) -> "Snapshot":
+        """Concatenate snapshots, e.g. of the chunks of a page."""
+        _require_numpy()
+        snapshots = list(snapshots)
+        if not snapshots:
+            return cls.from_listings([])
+
+        return cls(*(
+            {
+                name: np.concatenate(
+                    [part.columns(table)[name] for part in snapshots]
+                )
+                for name in columns
+            }
+            for table, columns in TABLES.items()
+        ))
+
+    def mask(
+        self, markets: "np.ndarray", quotes: "np.ndarray",
+    ) -> "Snapshot":
+        """
+        Select rows of the snapshot.
+
+        Parameters
+        ----------
+            markets, quotes : numpy.ndarray
+                Boolean masks of the `market_stats` and `quote` rows to
+                keep.
+
+        Returns
+        -------
+            Snapshot
+                The selected rows.
+        """
+        return Snapshot(
+            {name: column[markets] for name, column in self.markets.items()},
+            {name: column[quotes] for name, column in self.quotes.items()},
+        )
+
+    def __len__(self) -> int:
+        return len(self.markets["coin_id"])
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Snapshot):
+            return NotImplemented
+        return all(
+            np.array_equal(mine[name], theirs[name], equal_nan=kind != "str")
+            for mine, theirs, columns in (
+                (self.markets, other.markets, MARKET_COLUMNS),
+                (self.quotes, other.quotes, QUOTE_COLUMNS),
+            )
+            for name, kind in columns.items()
+        )
+
+    def columns(self, table: str) -> Dict[str, "np.ndarray"]:
+        """Return the columns of `table`, "market_stats" or "quote"."""
+        return self.markets if table == "market_stats" else self.quotes
+
+    def rows(self, table: str) -> List[dict]:
+        """
+        Convert the columns of a table into rows for the loaders.
+
+        Parameters
+        ----------
+            table : str
+                "market_stats" or "quote".
+
+        Returns
+        -------
+            List[dict]
+                One row per entry, with `None` as null.
+        """
+        columns = self.columns(table)
+        values = [
+            _python_values(columns[name], kind)
+            for name, kind in TABLES[table].items()
+        ]
+
+        return [dict(zip(TABLES[table], row)) for row in zip(*values)]
+
+    def dates(self) -> List[datetime.date]:
+        """Return the distinct days of the `last_updated` columns."""
+        timestamps = np.concatenate([
+            self.markets["last_updated"], self.quotes["last_updated"],
+        ])
+        timestamps = timestamps[~np.isnat(timestamps)]
+
+        return np.unique(timestamps.astype("datetime64[D]")).tolist()
+
+    def fill_market_cap(self) -> int:
+        """
+        Derive the missing quote market caps from the circulating supply.
+
+        The market cap of a quote is its price times the circulating supply
+        of its coin; it stays null if the supply is unknown.
+
+        Returns
+        -------
+            int
+                The number of market caps filled.
+        """
+        market_cap = self.quotes["market_cap"]
+        missing = np.isnan(market_cap)
+        if not missing.any() or not len(self):
+            return 0
+
+        order = np.argsort(self.markets["coin_id"], kind="stable")
+        coin_ids = self.markets["coin_id"][order]
+        position = np.searchsorted(coin_ids, self.quotes["coin_id"])
+        position = np.minimum(position, len(coin_ids) - 1)
+        listed = coin_ids[position] == self.quotes["coin_id"]
+        supply = np.where(
+            listed,
+            self.markets["circulating_supply"][order][position],
+            np.nan,
+        )
+        derived = self.quotes["price"] * supply
+        filled = missing & ~np.isnan(derived)
+        market_cap[filled] = derived[filled]
+
+        return int(filled.sum())
+
+    def dominance(self, currency: str = "USD") -> Dict[int, float]:
+        """
+        Return the share of the total market cap of each coin.
+
+        Parameters
+        ----------
+            currency : str
+                The quote currency of the market caps. Default "USD".
+
+        Returns
+        -------
+            Dict[int, float]
+                The share of each coin with a known market cap.
+        """
+        selected = self.quotes["currency"] == currency
+        coin_ids = self.quotes["coin_id"][selected]
+        market_cap = self.quotes["market_cap"][selected]
+        known = ~np.isnan(market_cap)
+        total = market_cap[known].sum()
+        if not total:
+            return {}
+
+        return dict(zip(
+            coin_ids[known].tolist(), (market_cap[known] / total).tolist(),
+        ))
+
+    def to_csv(self, table: str, file: IO[str], header: bool = True) -> None:
+        """
+        Write the columns of a table as CSV, with empty fields as nulls.
+
+        Parameters
+        ----------
+            table : str
+                "market_stats" or "quote".
+
+            file : IO[str]
+                Text file opened with `newline=""`.
+
+            header : bool
+                Write the column names first. Default `True`.
+
+        Returns
+        -------
+            NoneType
+        """
+        columns = self.columns(table)
+        writer = csv.writer(file)
+        if header:
+            writer.writerow(TABLES[table])
+        writer.writerows(zip(*(
+            _text_values(columns[name], kind).tolist()
+            for name, kind in TABLES[table].items()
+        )))
+
+    def to_npz(self, file: Any) -> None:
+        """Save the columns to a compressed NumPy archive."""
+        np.savez_compressed(
+            file,
+            **{f"market_stats.{name}": column
+               for name, column in self.markets.items()},
+            **{f"quote.{name}": column.astype(str)
+               if QUOTE_COLUMNS[name] == "str" else column
+               for name, column in self.quotes.items()},
+        )
+
+    @classmethod
+    def from_npz(cls, file: Any) -> "Snapshot":
+        """Load the columns saved by `to_npz`."""
+        _require_numpy()
+        with np.load(file) as archive:
+            columns = {
+                table: {
+                    name: archive[f"{table}.{name}"].astype(_DTYPES[kind])
+                    for name, kind in kinds.items()
+                }
+                for table, kinds in TABLES.items()
+            }
+
+        return cls(columns["market_stats"], columns["quote"])
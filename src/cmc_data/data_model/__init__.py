@@ -1,36 +1,222 @@
-"""Data model for Coinmarketcap data."""
+"""
+Data model for Coinmarketcap data.
 
-# Import standard modules
-from os import getenv, path
+Importing the data model has no side effects: the configuration is read,
+and the engine and the default session are created, on first use. Forked
+processes never reuse the connections of their parent.
 
-# Import third-party modules
-from dotenv import load_dotenv
+PostgreSQL is the default database; set `DB_DRIVER=sqlite` to use a single
+SQLite file named by `DB_NAME` instead.
+"""
+
+# Import standard modules
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Union
 
 # Import third-party modules
-from sqlalchemy.engine import create_engine
-from sqlalchemy.engine.url import URL
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, create_engine
+from sqlalchemy.engine.url import URL, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+# Import local modules
+from .sqlite import DATABASE as SQLITE_DATABASE, configure_sqlite, is_sqlite
 
 __author__ = "Vitali Lupusor"
 
-# Load environment variables from the `.env` file
-load_dotenv(path.join(next(iter(__path__)), ".env"))  # type: ignore
-del load_dotenv, path  # Clean up
-
-# Instantiate database configuration object
-db_config = {
-    "drivername": getenv("DB_DRIVER") or "postgresql",
-    "username": getenv("DB_USER") or "admin",
-    "password": getenv("DB_PASSWORD") or "admin",
-    "host": getenv("DB_HOST") or "localhost",
-    "port": getenv("DB_PORT") or 5432,
-    "database": getenv("DB_NAME") or "test",
-}
-
-# Create engine
-engine = create_engine(URL.create(**db_config))
-# Create session
-session = sessionmaker(engine)()
 # Declare database model
 Base = declarative_base()
+
+_db_config: Optional[Dict[str, Any]] = None
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_session: Optional[Session] = None
+
+
+def load_config() -> Dict[str, Any]:
+    """
+    Read the database configuration.
+
+    The environment variables are read once, after loading the `.env` file
+    of the data model if any; the returned dictionary may be amended
+    before the engine is created.
+
+    Returns
+    -------
+        Dict[str, Any]
+            Keyword arguments of `sqlalchemy.engine.URL.create`.
+    """
+    global _db_config
+    if _db_config is None:
+        # Import third-party modules
+        from dotenv import load_dotenv
+
+        # Load environment variables from the `.env` file
+        load_dotenv(os.path.join(next(iter(__path__)), ".env"))
+        drivername = os.getenv("DB_DRIVER") or "postgresql"
+        if is_sqlite(drivername):
+            # A single file, named by `DB_NAME`
+            _db_config = {
+                "drivername": drivername,
+                "database": os.getenv("DB_NAME") or SQLITE_DATABASE,
+            }
+        else:
+            _db_config = {
+                "drivername": drivername,
+                "username": os.getenv("DB_USER") or "admin",
+                "password": os.getenv("DB_PASSWORD") or "admin",
+                "host": os.getenv("DB_HOST") or "localhost",
+                "port": os.getenv("DB_PORT") or 5432,
+                "database": os.getenv("DB_NAME") or "test",
+            }
+
+    return _db_config
+
+
+def _guard_pool(engine: Engine) -> None:
+    """Invalidate pooled connections checked out in another process."""
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection: Any, connection_record: Any) -> None:
+        connection_record.info["pid"] = os.getpid()
+
+    @event.listens_for(engine, "checkout")
+    def checkout(
+        dbapi_connection: Any, connection_record: Any, connection_proxy: Any,
+    ) -> None:
+        pid, owner = os.getpid(), connection_record.info["pid"]
+        if owner != pid:
+            # Leave the socket to the parent instead of closing it
+            connection_record.dbapi_connection = None
+            connection_proxy.dbapi_connection = None
+            raise exc.DisconnectionError(
+                f"connection created by process {owner} checked out by "
+                f"process {pid}"
+            )
+
+
+def create_db_engine(url: Union[str, URL], **kwargs: Any) -> Engine:
+    """
+    Create an engine guarded against forks and tuned for its dialect.
+
+    Connections to SQLite may be used by another thread than the one which
+    opened them, e.g. the writer thread of a backfill, and get the pragmas
+    of `cmc_data.data_model.sqlite`.
+
+    Parameters
+    ----------
+        url : str, sqlalchemy.engine.URL
+            URL of the database.
+
+        **kwargs : Any
+            Parameters of `sqlalchemy.create_engine`.
+
+    Returns
+    -------
+        sqlalchemy.engine.Engine
+            The engine.
+    """
+    url = make_url(url)
+    sqlite = is_sqlite(url.drivername)
+    if sqlite:
+        kwargs.setdefault("connect_args", {}).setdefault(
+            "check_same_thread", False,
+        )
+    engine = create_engine(url, **kwargs)
+    if sqlite:
+        configure_sqlite(engine)
+    _guard_pool(engine)
+
+    return engine
+
+
+def get_engine() -> Engine:
+    """
+    Return the database engine, created on first use.
+
+    Returns
+    -------
+        sqlalchemy.engine.Engine
+            The engine of the configured database.
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_db_engine(URL.create(**load_config()))
+
+    return _engine
+
+
+def get_session_factory() -> sessionmaker:
+    """Return the factory of sessions bound to `get_engine()`."""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(get_engine())
+
+    return _session_factory
+
+
+def get_session() -> Session:
+    """
+    Return the default session of the process, created on first use.
+
+    Returns
+    -------
+        sqlalchemy.orm.Session
+            The session shared by the callers which do not pass their own.
+    """
+    global _session
+    if _session is None:
+        _session = get_session_factory()()
+
+    return _session
+
+
+@contextmanager
+def session_scope(bind: Optional[Engine] = None) -> Iterator[Session]:
+    """
+    Provide a session for a unit of work.
+
+    The session is committed if the block succeeds, rolled back otherwise,
+    and closed in either case.
+
+    Parameters
+    ----------
+        bind : sqlalchemy.engine.Engine, NoneType
+            The database. If `None`, `get_engine()`. Default `None`.
+
+    Returns
+    -------
+        Iterator[sqlalchemy.orm.Session]
+            The session.
+    """
+    session = Session(bind) if bind is not None else get_session_factory()()
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def _after_fork() -> None:
+    """Drop the default session of the parent process in a child."""
+    global _session
+    _session = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def __getattr__(name: str) -> Any:
+    """Create the legacy module attributes lazily."""
+    if name == "db_config":
+        return load_config()
+    if name == "engine":
+        return get_engine()
+    if name == "session":
+        return get_session()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
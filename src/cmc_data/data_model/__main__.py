@@ -1,16 +1,20 @@
 """Command line interface for data model manipulations."""
 
 # Import standard modules
+import datetime as dt
 from typing import Optional
 
 # Import third-party modules
 import click
-from sqlalchemy.engine import create_engine
 from sqlalchemy.engine.url import URL
-from sqlalchemy_utils import create_database, database_exists
 
 # Import local modules
-from . import db_config, Base
+from . import Base, create_db_engine, get_engine, load_config
+from .bulkload import restore_schema
+from .dedupe import dedupe
+from .partitioning import create_partitioned_tables, partition_manager
+from .rollup import rebuild_rollups
+from .sqlite import DATABASE as SQLITE_DATABASE, is_sqlite
 
 __author__ = "Vitali Lupusor"
 
@@ -37,7 +41,17 @@ def cli():
 @click.option(
     "-p", "--port", help="The port on which to connect to the database.",
 )
-@click.option("-d", "--database", help="The name of the database.")
+@click.option(
+    "-d", "--database",
+    help="The name of the database, or the file of a SQLite database.",
+)
+@click.option(
+    "--partitioned", is_flag=True,
+    help=(
+        "Partition the 'market_stats' and 'quote' tables by month of "
+        "'last_updated' (PostgreSQL only)."
+    ),
+)
 def init_db(
     drivername: Optional[str] = None,
     username: Optional[str] = None,
@@ -45,6 +59,7 @@ def init_db(
     host: Optional[str] = None,
     port: Optional[int] = None,
     database: Optional[str] = None,
+    partitioned: bool = False,
 ) -> None:
     """
     Initialise the tabales.
@@ -54,13 +69,24 @@ def init_db(
     Returns
         NoneType
     """
+    # Import third-party modules
+    from sqlalchemy_utils import create_database, database_exists
+
     # Configure database connection details
+    db_config = load_config()
     db_config["drivername"] = drivername or db_config.get("drivername")
     db_config["username"] = username or db_config.get("username")
     db_config["password"] = password or db_config.get("password")
     db_config["host"] = host or db_config.get("host")
     db_config["port"] = port or db_config.get("port")
     db_config["database"] = database or db_config.get("database")
+    if is_sqlite(db_config["drivername"]):
+        # A single file, without a server to authenticate with
+        db_config = {
+            "drivername": db_config["drivername"],
+            "database": database or db_config.get("database")
+            or SQLITE_DATABASE,
+        }
 
     # Build the connection string
     url = URL.create(**db_config)
@@ -74,12 +100,97 @@ def init_db(
     click.echo("Initialising the data model...")
 
     # Create database engine
-    engine = create_engine(url)
+    engine = create_db_engine(url)
     # Initialise tables
-    Base.metadata.create_all(engine)
+    if partitioned:
+        try:
+            create_partitioned_tables(engine)
+        except ValueError as err:
+            raise click.UsageError(str(err)) from err
+    else:
+        Base.metadata.create_all(engine)
 
     click.echo("Done.")
 
 
+@cli.command("drop-partitions")
+@click.option(
+    "--before", type=click.DateTime(["%Y-%m-%d"]), required=True,
+    help="Drop the monthly partitions holding only rows older than this.",
+)
+def drop_partitions(before: dt.datetime) -> None:
+    """
+    Drop old partitions of the snapshot tables.
+
+    Returns
+        NoneType
+    """
+    engine = get_engine()
+    for name in partition_manager(engine).drop_before(before.date()):
+        click.echo(f"Dropped {name}.")
+
+
+@cli.command("dedupe")
+@click.option(
+    "--batch-size", type=click.IntRange(min=1), default=10_000,
+    show_default=True, help="Number of row ids scanned per transaction.",
+)
+def dedupe_tables(batch_size: int = 10_000) -> None:
+    """
+    Remove duplicate snapshot rows and enforce the natural keys.
+
+    Returns
+        NoneType
+    """
+    engine = get_engine()
+    for table, deleted in dedupe(engine, batch_size).items():
+        click.echo(f"Deleted {deleted} duplicates from {table}.")
+
+
+@cli.command("rebuild-rollups")
+def rebuild() -> None:
+    """
+    Recompute the weekly and monthly per-coin rollups from scratch.
+
+    Returns
+        NoneType
+    """
+    engine = get_engine()
+    for period, written in rebuild_rollups(engine).items():
+        click.echo(f"Rebuilt {written} {period}ly rollups.")
+
+
+@cli.command("rebuild-latest")
+def rebuild_latest() -> None:
+    """
+    Rebuild the latest state of every coin from the stored history.
+
+    Returns
+        NoneType
+    """
+    # Import local modules; `cmc_data.latest` imports this package
+    from cmc_data.latest import rebuild_latest as rebuild_coin_latest
+
+    engine = get_engine()
+    click.echo(f"Rebuilt {rebuild_coin_latest(engine)} latest rows.")
+
+
+@cli.command("restore-schema")
+@click.option(
+    "--workers", type=click.IntRange(min=1),
+    help="Maximum number of indexes built at once. Defaults to the CPUs.",
+)
+def restore(workers: Optional[int] = None) -> None:
+    """
+    Rebuild the indexes and foreign keys left out by an interrupted load.
+
+    Returns
+        NoneType
+    """
+    engine = get_engine()
+    for name in restore_schema(engine, workers=workers):
+        click.echo(f"Restored {name}.")
+
+
 if __name__ == "__main__":
     cli()
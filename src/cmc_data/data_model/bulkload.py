@@ -0,0 +1,305 @@
+"""
+Deferred indexes and foreign keys for first-time loads.
+
+Every row inserted into `market_stats`, `quote` and `tag` updates their
+secondary indexes and checks their foreign keys. `bulk_load` drops the
+secondary indexes and the foreign keys of these tables, or disables the
+foreign key checks on SQLite, for the duration of a load; it then rebuilds
+the indexes in parallel, validates the foreign keys and refreshes the
+planner statistics.
+
+The natural key indexes are kept, since the bulk upserts rely on them.
+Restoring the schema only creates what the data model defines and the
+database lacks, so that a load killed before it could restore the schema
+is repaired by `restore_schema`, or by the next bulk load.
+"""
+
+# Import standard modules
+import logging
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Sequence, Union
+
+# Import third-party modules
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex, DDLElement
+from sqlalchemy.sql.schema import ForeignKeyConstraint, Index, Table
+
+# Import local modules
+from .models import Market, Quote, Tag
+from .partitioning import partition_manager
+
+# Tables loaded during a backfill
+BULK_LOAD_TABLES = (Market.__table__, Quote.__table__, Tag.__table__)
+
+
+def secondary_indexes(table: Table) -> List[Index]:
+    """Return the indexes of `table` which do not enforce a key."""
+    return sorted(
+        (index for index in table.indexes if not index.unique),
+        key=lambda index: index.name,
+    )
+
+
+def foreign_key_name(constraint: ForeignKeyConstraint) -> str:
+    """Return the name of a foreign key, as PostgreSQL names it."""
+    if constraint.name:
+        return constraint.name
+    columns = "_".join(column.name for column in constraint.columns)
+    return f"{constraint.table.name}_{columns}_fkey"
+
+
+def _disable_foreign_keys(dbapi_connection: Any, record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys = OFF")
+    cursor.close()
+
+
+def _execute(engine: Engine, statement: Union[str, DDLElement]) -> None:
+    """Execute a DDL statement outside of any transaction."""
+    with engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT",
+    ) as connection:
+        connection.execute(
+            text(statement) if isinstance(statement, str) else statement
+        )
+
+
+def defer_schema(
+    engine: Engine, tables: Sequence[Table] = BULK_LOAD_TABLES,
+) -> List[str]:
+    """
+    Drop the secondary indexes and the foreign keys of tables.
+
+    On SQLite, whose foreign keys cannot be dropped, the connections opened
+    from now on do not check them instead; sessions should be opened after
+    the call. Pooled connections are closed.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            The database.
+
+        tables : Sequence[sqlalchemy.Table]
+            Tables about to be loaded. Default `BULK_LOAD_TABLES`.
+
+    Returns
+    -------
+        List[str]
+            The names of the dropped indexes and foreign keys.
+    """
+    preparer = engine.dialect.identifier_preparer
+    inspector = inspect(engine)
+    dropped = []
+    for table in tables:
+        existing = {index["name"] for index in inspector.get_indexes(
+            table.name,
+        )}
+        for index in secondary_indexes(table):
+            if index.name in existing:
+                _execute(engine, f"DROP INDEX {preparer.quote(index.name)}")
+                dropped.append(index.name)
+        if engine.dialect.name != "postgresql":
+            continue
+        for foreign_key in inspector.get_foreign_keys(table.name):
+            _execute(engine, "ALTER TABLE {} DROP CONSTRAINT {}".format(
+                preparer.format_table(table),
+                preparer.quote(foreign_key["name"]),
+            ))
+            dropped.append(foreign_key["name"])
+
+    if engine.dialect.name == "sqlite" and not event.contains(
+        engine, "connect", _disable_foreign_keys,
+    ):
+        event.listen(engine, "connect", _disable_foreign_keys)
+        engine.dispose()
+    logging.info("deferred %s", dropped)
+
+    return dropped
+
+
+def _create_index(engine: Engine, index: Index) -> str:
+    # Built from the model, so as to keep its options, e.g. BRIN
+    _execute(engine, CreateIndex(index))
+    logging.info("built index %s", index.name)
+
+    return index.name
+
+
+def _add_foreign_key(
+    engine: Engine, constraint: ForeignKeyConstraint, partitioned: bool,
+) -> str:
+    """Add a PostgreSQL foreign key, then check the existing rows."""
+    preparer = engine.dialect.identifier_preparer
+    name = preparer.quote(foreign_key_name(constraint))
+    table = preparer.format_table(constraint.table)
+    statement = "ALTER TABLE {} ADD CONSTRAINT {} FOREIGN KEY ({}) " \
+        "REFERENCES {} ({})".format(
+            table,
+            name,
+            ", ".join(
+                preparer.quote(column.name) for column in constraint.columns
+            ),
+            preparer.format_table(constraint.referred_table),
+            ", ".join(
+                preparer.quote(element.column.name)
+                for element in constraint.elements
+            ),
+        )
+    # Checking the rows apart from adding the key only takes a lock which
+    # lets writes through; partitioned tables do not support it
+    _execute(engine, statement if partitioned else f"{statement} NOT VALID")
+    if not partitioned:
+        _execute(engine, f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+    return foreign_key_name(constraint)
+
+
+def _check_sqlite_foreign_keys(engine: Engine, table: Table) -> None:
+    """Raise if rows of `table` violate its foreign keys."""
+    preparer = engine.dialect.identifier_preparer
+    with engine.connect() as connection:
+        violations = connection.execute(text(
+            f"PRAGMA foreign_key_check({preparer.quote(table.name)})"
+        )).all()
+    if violations:
+        raise ValueError(
+            f"{len(violations)} rows of {table.name} violate its foreign "
+            f"keys, e.g. row {violations[0][1]} referencing "
+            f"{violations[0][2]}"
+        )
+
+
+def restore_schema(
+    engine: Engine,
+    tables: Sequence[Table] = BULK_LOAD_TABLES,
+    workers: Optional[int] = None,
+) -> List[str]:
+    """
+    Rebuild the missing indexes and foreign keys of tables, and analyse them.
+
+    Indexes are built in parallel, each on a connection of its own; on
+    SQLite, which writes one statement at a time, one after the other.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            The database.
+
+        tables : Sequence[sqlalchemy.Table]
+            Tables which were loaded. Default `BULK_LOAD_TABLES`.
+
+        workers : int, NoneType
+            Maximum number of indexes built at once. If `None`, the number
+            of CPUs. Default `None`.
+
+    Returns
+    -------
+        List[str]
+            The names of the created indexes and foreign keys.
+
+    Raises
+    ------
+        ValueError
+            * If rows violate the foreign keys on SQLite; on PostgreSQL,
+              the database rejects the foreign key instead.
+    """
+    sqlite = engine.dialect.name == "sqlite"
+    if sqlite and event.contains(engine, "connect", _disable_foreign_keys):
+        event.remove(engine, "connect", _disable_foreign_keys)
+        engine.dispose()
+
+    inspector = inspect(engine)
+    missing = []
+    foreign_keys = []
+    for table in tables:
+        existing = {index["name"] for index in inspector.get_indexes(
+            table.name,
+        )}
+        missing.extend(
+            index for index in secondary_indexes(table)
+            if index.name not in existing
+        )
+        if engine.dialect.name == "postgresql":
+            existing = {
+                (tuple(foreign_key["constrained_columns"]),
+                 foreign_key["referred_table"])
+                for foreign_key in inspector.get_foreign_keys(table.name)
+            }
+            foreign_keys.extend(
+                constraint for constraint in sorted(
+                    table.foreign_key_constraints, key=foreign_key_name,
+                )
+                if (tuple(column.name for column in constraint.columns),
+                    constraint.referred_table.name) not in existing
+            )
+
+    workers = 1 if sqlite else workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(min(workers, max(len(missing), 1))) as executor:
+        created = list(executor.map(
+            lambda index: _create_index(engine, index), missing,
+        ))
+
+    partitioned = partition_manager(engine).tables
+    for constraint in foreign_keys:
+        created.append(_add_foreign_key(
+            engine, constraint, constraint.table.name in partitioned,
+        ))
+
+    preparer = engine.dialect.identifier_preparer
+    for table in tables:
+        if sqlite:
+            _check_sqlite_foreign_keys(engine, table)
+        _execute(engine, f"ANALYZE {preparer.format_table(table)}")
+    logging.info("restored %s", created)
+
+    return created
+
+
+@contextmanager
+def bulk_load(
+    engine: Engine,
+    tables: Sequence[Table] = BULK_LOAD_TABLES,
+    workers: Optional[int] = None,
+) -> Iterator[List[str]]:
+    """
+    Defer the indexes and foreign keys of tables for the duration of a load.
+
+    The schema is restored when the block exits, even if it raises or the
+    process receives SIGTERM, e.g. from `docker stop`.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            The database.
+
+        tables : Sequence[sqlalchemy.Table]
+            Tables about to be loaded. Default `BULK_LOAD_TABLES`.
+
+        workers : int, NoneType
+            See `restore_schema`. Default `None`.
+
+    Yields
+    ------
+        List[str]
+            The names of the dropped indexes and foreign keys.
+    """
+    def terminate(signum: int, frame: Any) -> None:
+        raise SystemExit(128 + signum)
+
+    # Signal handlers may only be set from the main thread
+    main = threading.current_thread() is threading.main_thread()
+    if main:
+        handler = signal.signal(signal.SIGTERM, terminate)
+    try:
+        yield defer_schema(engine, tables)
+    finally:
+        try:
+            restore_schema(engine, tables, workers)
+        finally:
+            if main:
+                signal.signal(signal.SIGTERM, handler)
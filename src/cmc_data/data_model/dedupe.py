@@ -0,0 +1,225 @@
+"""
+Natural keys of the snapshot tables.
+
+Rows of `market_stats`, `quote` and `tag` are identified by a natural key
+besides their surrogate `id`. Tables populated before the keys were
+enforced are cleaned up in short batches, then the keys are enforced with
+unique indexes.
+"""
+
+# Import standard modules
+import logging
+from typing import Dict, Iterator, List, Optional
+
+# Import third-party modules
+from sqlalchemy import and_, exists, func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.schema import Table, UniqueConstraint
+
+# Import local modules
+from .models import Market, Quote, Tag
+from .partitioning import partition_manager
+
+# Tables with a natural key
+DEDUPLICATED_TABLES = (Market.__table__, Quote.__table__, Tag.__table__)
+
+
+def natural_key_constraint(table: Table) -> Optional[UniqueConstraint]:
+    """Return the unique constraint on the natural key of `table`."""
+    return next(
+        (
+            constraint for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+            and str(constraint.name).startswith("uq_")
+        ),
+        None,
+    )
+
+
+def natural_key(table: Table) -> Optional[List[str]]:
+    """
+    Return the columns of the natural key of `table`.
+
+    Parameters
+    ----------
+        table : sqlalchemy.Table
+            A table of the data model.
+
+    Returns
+    -------
+        List[str]
+            The names of the columns identifying a row.
+
+        NoneType
+            If the table has no natural key besides its primary key.
+    """
+    constraint = natural_key_constraint(table)
+
+    return [column.name for column in constraint.columns] \
+        if constraint is not None else None
+
+
+def _id_ranges(
+    engine: Engine, table: Table, batch_size: int,
+) -> Iterator[range]:
+    """Split the `id` values of `table` into ranges of `batch_size`."""
+    with engine.connect() as connection:
+        low, high = connection.execute(
+            select(func.min(table.c.id), func.max(table.c.id))
+        ).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, batch_size):
+        yield range(start, min(start + batch_size, high + 1))
+
+
+def delete_duplicates(
+    engine: Engine, table: Table, batch_size: int = 10_000,
+) -> int:
+    """
+    Delete the rows sharing a natural key with an older row.
+
+    The table is scanned in ranges of `batch_size` ids, each deleted in a
+    transaction of its own, so that locks are held briefly and ingestion
+    can carry on meanwhile.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            The database.
+
+        table : sqlalchemy.Table
+            One of `DEDUPLICATED_TABLES`.
+
+        batch_size : int
+            Number of ids per transaction. Default 10000.
+
+    Returns
+    -------
+        int
+            The number of deleted rows.
+    """
+    older = table.alias("older")
+    key = natural_key(table)
+    duplicate = exists().where(and_(
+        older.c.id < table.c.id,
+        *(older.c[name] == table.c[name] for name in key),
+    ))
+
+    deleted = 0
+    for ids in _id_ranges(engine, table, batch_size):
+        statement = table.delete().where(
+            table.c.id >= ids.start, table.c.id < ids.stop, duplicate,
+        )
+        with engine.begin() as connection:
+            deleted += connection.execute(statement).rowcount
+    logging.info("deleted %d duplicates from %s", deleted, table.name)
+
+    return deleted
+
+
+def _index_is_valid(engine: Engine, name: str) -> Optional[bool]:
+    """Tell whether a PostgreSQL index is usable, `None` if unknown."""
+    if engine.dialect.name != "postgresql":
+        return None
+    with engine.connect() as connection:
+        return connection.execute(
+            text(
+                "SELECT i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name"
+            ),
+            {"name": name},
+        ).scalar()
+
+
+def enforce_natural_key(engine: Engine, table: Table) -> None:
+    """
+    Create the unique index on the natural key of `table` if missing.
+
+    On PostgreSQL, the index of a table which is not partitioned is built
+    concurrently, without blocking writes. A concurrent build which failed
+    leaves an invalid index behind, which enforces nothing: it is dropped
+    and built again.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            The database, free of duplicates in `table`.
+
+        table : sqlalchemy.Table
+            One of `DEDUPLICATED_TABLES`.
+
+    Returns
+    -------
+        NoneType
+
+    Raises
+    ------
+        sqlalchemy.exc.IntegrityError
+            * If `table` holds duplicates; on PostgreSQL, the invalid index
+              is dropped first.
+    """
+    constraint = natural_key_constraint(table)
+    columns = [column.name for column in constraint.columns]
+    preparer = engine.dialect.identifier_preparer
+    concurrently = "CONCURRENTLY " \
+        if engine.dialect.name == "postgresql" \
+        and table.name not in partition_manager(engine).tables else ""
+    name = preparer.quote(constraint.name)
+    statement = "CREATE UNIQUE INDEX {}IF NOT EXISTS {} ON {} ({})".format(
+        concurrently,
+        name,
+        preparer.format_table(table),
+        ", ".join(preparer.quote(column) for column in columns),
+    )
+    # Concurrent builds cannot run inside a transaction
+    with engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT",
+    ) as connection:
+        if _index_is_valid(engine, constraint.name) is False:
+            logging.warning("rebuilding invalid index %s", constraint.name)
+            connection.execute(text(f"DROP INDEX {concurrently}{name}"))
+        try:
+            connection.execute(text(statement))
+        except IntegrityError:
+            if _index_is_valid(engine, constraint.name) is False:
+                connection.execute(text(f"DROP INDEX {concurrently}{name}"))
+            raise
+
+
+def dedupe(engine: Engine, batch_size: int = 10_000) -> Dict[str, int]:
+    """
+    Delete duplicates from, then enforce the natural keys of, every table.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            The database.
+
+        batch_size : int
+            Number of ids per transaction. Default 10000.
+
+    Returns
+    -------
+        Dict[str, int]
+            The number of deleted rows per table.
+    """
+    deleted = {}
+    for table in DEDUPLICATED_TABLES:
+        deleted[table.name] = delete_duplicates(engine, table, batch_size)
+        try:
+            enforce_natural_key(engine, table)
+        except IntegrityError:
+            # Duplicates written by an ingestion since they were deleted;
+            # a second failure is left to the caller
+            logging.warning(
+                "new duplicates in %s, deleting them again", table.name,
+            )
+            deleted[table.name] += delete_duplicates(
+                engine, table, batch_size,
+            )
+            enforce_natural_key(engine, table)
+
+    return deleted
@@ -2,9 +2,9 @@
 
 # Import third-party modules
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql.schema import Column, ForeignKey
+from sqlalchemy.sql.schema import Column, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.sql.sqltypes import (
-    BIGINT, DateTime, Float, Integer, LargeBinary, String, VARCHAR
+    BIGINT, Date, DateTime, Float, Integer, LargeBinary, String, VARCHAR
 )
 
 # Import local modules
@@ -33,21 +33,107 @@ class Coin(Base):
     tags = relationship("Tag")
 
 
+class CoinLatest(Base):
+    """Newest market stats and quote of every coin, per quote currency."""
+
+    __tablename__ = "coin_latest"
+    __table_args__ = (
+        Index("ix_coin_latest_currency_market_cap", "currency", "market_cap"),
+        Index("ix_coin_latest_currency_cmc_rank", "currency", "cmc_rank"),
+    )
+
+    coin_id = Column(Integer, ForeignKey("coin.id"), primary_key=True)
+    currency = Column(
+        VARCHAR(10), primary_key=True, comment="Name of the currency",
+    )
+    num_market_pairs = Column(Integer, comment="")
+    circulating_supply = Column(Float, comment="")
+    total_supply = Column(Float, comment="")
+    cmc_rank = Column(Integer, comment="")
+    market_updated = Column(
+        DateTime, nullable=False,
+        comment="`last_updated` of the market stats",
+    )
+    price = Column(Float, nullable=False, comment="")
+    vol_24 = Column(Float, comment="")
+    pct_change_1h = Column(Float, comment="")
+    pct_change_24h = Column(Float, comment="")
+    pct_change_7d = Column(Float, comment="")
+    market_cap = Column(Float, comment="")
+    fully_diluted_mc = Column(Float, comment="")
+    last_updated = Column(
+        DateTime, nullable=False, comment="`last_updated` of the quote",
+    )
+
+
+class Fingerprint(Base):
+    """Fingerprint of the last ingested market and quote rows of each coin."""
+
+    __tablename__ = "ingest_fingerprint"
+
+    coin_id = Column(Integer, primary_key=True, autoincrement=False)
+    currency = Column(
+        VARCHAR(10), primary_key=True,
+        comment="Quote currency, or '' for the market stats",
+    )
+    fingerprint = Column(
+        BIGINT, nullable=False, comment="Hash of the values of the row",
+    )
+
+
+class IngestionJob(Base):
+    """Ingestion checkpoint table, one row per snapshot date."""
+
+    __tablename__ = "ingestion_job"
+
+    snapshot_date = Column(Date, primary_key=True)
+    status = Column(
+        VARCHAR(10), nullable=False, index=True,
+        comment="One of 'pending', 'running', 'complete' or 'failed'",
+    )
+    attempts = Column(
+        Integer, nullable=False, default=0, comment="Number of attempts",
+    )
+    pages = Column(Integer, comment="Pages fetched by the last attempt")
+    entries = Column(Integer, comment="Entries ingested by the last attempt")
+    rejected = Column(Integer, comment="Entries which failed validation")
+    started_at = Column(DateTime, comment="Start of the last attempt")
+    finished_at = Column(DateTime, comment="End of the last attempt")
+    duration = Column(Float, comment="Duration of the last attempt in seconds")
+    error = Column(String, comment="Error of the last failed attempt")
+    claimed_by = Column(
+        VARCHAR(100), comment="Worker holding the job, while running",
+    )
+    lease_expires = Column(
+        DateTime, comment="End of the claim unless renewed by a heartbeat",
+    )
+
+
 class Market(Base):
     """Market table."""
 
     __tablename__ = "market_stats"
+    __table_args__ = (
+        UniqueConstraint(
+            "coin_id", "last_updated",
+            name="uq_market_stats_coin_id_last_updated",
+        ),
+        Index(
+            "ix_market_stats_last_updated", "last_updated",
+            postgresql_using="brin",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     coin_id = Column(
-        Integer, ForeignKey("coin.id"), index=True, nullable=False,
+        Integer, ForeignKey("coin.id"), nullable=False,
         comment="Foreign key for the 'coin' table",
     )
     num_market_pairs = Column(Integer, comment="")
     circulating_supply = Column(Float, comment="")
     total_supply = Column(Float, comment="")
     cmc_rank = Column(Integer, comment="")
-    last_updated = Column(DateTime, comment="")
+    last_updated = Column(DateTime, nullable=False, comment="")
     coins = relationship(
         "Coin",
         back_populates="market",
@@ -69,11 +155,19 @@ class Quote(Base):
     """Quotes table."""
 
     __tablename__ = "quote"
+    __table_args__ = (
+        Index("ix_quote_coin_id_last_updated", "coin_id", "last_updated"),
+        UniqueConstraint(
+            "coin_id", "currency", "last_updated",
+            name="uq_quote_coin_id_currency_last_updated",
+        ),
+        Index(
+            "ix_quote_last_updated", "last_updated", postgresql_using="brin",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    coin_id = Column(
-        Integer, ForeignKey("coin.id"), index=True, nullable=False,
-    )
+    coin_id = Column(Integer, ForeignKey("coin.id"), nullable=False)
     currency = Column(
         VARCHAR(10), nullable=False, comment="Name of the currency",
     )
@@ -93,14 +187,52 @@ class Quote(Base):
     )
 
 
+class QuoteRollup(Base):
+    """Weekly and monthly per-coin rollups of the quotes."""
+
+    __tablename__ = "quote_rollup"
+    __table_args__ = (
+        Index("ix_quote_rollup_period_bucket", "period", "bucket"),
+    )
+
+    coin_id = Column(Integer, primary_key=True, autoincrement=False)
+    currency = Column(
+        VARCHAR(10), primary_key=True, comment="Name of the currency",
+    )
+    period = Column(
+        VARCHAR(5), primary_key=True, comment="Either 'week' or 'month'",
+    )
+    bucket = Column(
+        Date, primary_key=True,
+        comment="First day of the bucket, a Monday for weeks",
+    )
+    samples = Column(
+        Integer, nullable=False, comment="Number of quotes in the bucket",
+    )
+    first_updated = Column(DateTime, nullable=False, comment="")
+    last_updated = Column(DateTime, nullable=False, comment="")
+    open_price = Column(Float, nullable=False, comment="First price")
+    high_price = Column(Float, nullable=False, comment="Maximum price")
+    low_price = Column(Float, nullable=False, comment="Minimum price")
+    close_price = Column(Float, nullable=False, comment="Last price")
+    avg_vol_24 = Column(Float, comment="Average 24 hour volume")
+    max_vol_24 = Column(Float, comment="Maximum 24 hour volume")
+    best_rank = Column(Integer, comment="Minimum rank")
+    worst_rank = Column(Integer, comment="Maximum rank")
+    close_rank = Column(Integer, comment="Last rank")
+
+
 class Tag(Base):
     """Tag table."""
 
     __tablename__ = "tag"
+    __table_args__ = (
+        UniqueConstraint("coin_id", "tag_id", name="uq_tag_coin_id_tag_id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     coin_id = Column(
-        Integer, ForeignKey("coin.id"), index=True, nullable=False,
+        Integer, ForeignKey("coin.id"), nullable=False,
         comment="Foreign key for 'coin' table",
     )
     tag_id = Column(
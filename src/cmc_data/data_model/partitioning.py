@@ -0,0 +1,297 @@
+"""
+Time partitioning of the snapshot tables.
+
+On PostgreSQL, `market_stats` and `quote` may be created as declarative
+range-partitioned tables on `last_updated`, with one partition per month.
+Partitions are created on demand as rows of new months are ingested, and
+old ones can be dropped as a whole for retention.
+"""
+
+# Import standard modules
+import datetime
+import logging
+import re
+import threading
+import weakref
+from typing import Iterable, List, Optional, Set, Union
+
+# Import third-party modules
+from sqlalchemy import MetaData, PrimaryKeyConstraint, text
+from sqlalchemy.engine import Connection, Engine
+
+# Import local modules
+from . import Base
+
+# Partitioned tables and their partition key
+PARTITIONED_TABLES = {"market_stats": "last_updated", "quote": "last_updated"}
+
+# Name of the monthly partitions, e.g. "quote_y2021m10"
+PARTITION_NAME = re.compile(
+    r"^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$"
+)
+
+
+def month_start(
+    value: Union[datetime.date, datetime.datetime],
+) -> datetime.date:
+    """Return the first day of the month of `value`."""
+    return datetime.date(value.year, value.month, 1)
+
+
+def next_month(value: datetime.date) -> datetime.date:
+    """Return the first day of the month following `value`."""
+    return datetime.date(
+        value.year + value.month // 12, value.month % 12 + 1, 1,
+    )
+
+
+def partition_name(table: str, start: datetime.date) -> str:
+    """Return the name of the partition of `table` starting on `start`."""
+    return f"{table}_y{start:%Y}m{start:%m}"
+
+
+def partitioned_metadata(metadata: MetaData = Base.metadata) -> MetaData:
+    """
+    Copy the data model with `PARTITIONED_TABLES` range-partitioned.
+
+    PostgreSQL requires the primary key of a partitioned table to include
+    the partition key, which is therefore added to it.
+
+    Parameters
+    ----------
+        metadata : sqlalchemy.MetaData
+            The data model. Default `Base.metadata`.
+
+    Returns
+    -------
+        sqlalchemy.MetaData
+            The copy of the data model.
+    """
+    partitioned = MetaData()
+    for table in metadata.sorted_tables:
+        table.to_metadata(partitioned)
+
+    for name, key in PARTITIONED_TABLES.items():
+        table = partitioned.tables[name]
+        table.c[key].primary_key = True
+        table.c[key].nullable = False
+        table.append_constraint(
+            PrimaryKeyConstraint(*table.primary_key.columns, table.c[key])
+        )
+        table.dialect_options["postgresql"]["partition_by"] = f"RANGE ({key})"
+
+    return partitioned
+
+
+def create_partitioned_tables(bind: Union[Engine, Connection]) -> None:
+    """
+    Create the data model with `PARTITIONED_TABLES` range-partitioned.
+
+    Parameters
+    ----------
+        bind : sqlalchemy.engine.Engine, sqlalchemy.engine.Connection
+            PostgreSQL database.
+
+    Returns
+    -------
+        NoneType
+
+    Raises
+    ------
+        ValueError
+            * If the database is not PostgreSQL.
+    """
+    if bind.dialect.name != "postgresql":
+        raise ValueError(
+            "table partitioning requires PostgreSQL, "
+            f"not {bind.dialect.name}"
+        )
+
+    partitioned_metadata().create_all(bind)
+
+
+class PartitionManager:
+    """
+    Create the monthly partitions of the snapshot tables on demand.
+
+    Existing partitions are looked up once and then tracked in memory, so
+    that checking a page costs a set lookup per distinct month. On other
+    dialects than PostgreSQL, and for tables which are not partitioned,
+    every method is a no-op.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            The database. Partitions are created in transactions of their
+            own, independent of any ongoing ingestion.
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._tables: Optional[Set[str]] = None
+        self._months: Set[datetime.date] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def tables(self) -> Set[str]:
+        """Names of the partitioned tables."""
+        with self._lock:
+            return set(self._load())
+
+    def _quote(self, name: str) -> str:
+        return self.engine.dialect.identifier_preparer.quote(name)
+
+    def _load(self) -> Set[str]:
+        """Look up the partitioned tables and their existing partitions."""
+        if self._tables is not None:
+            return self._tables
+
+        self._tables = set()
+        if self.engine.dialect.name != "postgresql":
+            return self._tables
+
+        with self.engine.connect() as connection:
+            self._tables = set(connection.execute(
+                text(
+                    "SELECT c.relname FROM pg_partitioned_table p "
+                    "JOIN pg_class c ON c.oid = p.partrelid "
+                    "WHERE c.relname = ANY(:names)"
+                ),
+                {"names": list(PARTITIONED_TABLES)},
+            ).scalars())
+            partitions = connection.execute(
+                text(
+                    "SELECT child.relname FROM pg_inherits i "
+                    "JOIN pg_class parent ON parent.oid = i.inhparent "
+                    "JOIN pg_class child ON child.oid = i.inhrelid "
+                    "WHERE parent.relname = ANY(:names)"
+                ),
+                {"names": list(PARTITIONED_TABLES)},
+            ).scalars()
+            months = {}
+            for name in partitions:
+                match = PARTITION_NAME.match(name)
+                if match:
+                    month = datetime.date(
+                        int(match["year"]), int(match["month"]), 1,
+                    )
+                    months.setdefault(month, set()).add(match["table"])
+
+        # A month is covered once every partitioned table has it
+        self._months = {
+            month for month, tables in months.items()
+            if tables >= self._tables
+        }
+
+        return self._tables
+
+    def ensure(
+        self,
+        timestamps: Iterable[Optional[datetime.date]],
+    ) -> List[str]:
+        """
+        Create the partitions holding `timestamps` if missing.
+
+        Parameters
+        ----------
+            timestamps : Iterable[datetime.datetime]
+                Partition key values about to be inserted; `None` values are
+                ignored.
+
+        Returns
+        -------
+            List[str]
+                The names of the created partitions.
+        """
+        with self._lock:
+            tables = self._load()
+            if not tables:
+                return []
+
+            months = {
+                month_start(value) for value in timestamps if value
+            } - self._months
+            if not months:
+                return []
+
+            created = []
+            with self.engine.begin() as connection:
+                for month in sorted(months):
+                    for table in sorted(tables):
+                        name = partition_name(table, month)
+                        connection.execute(text(
+                            f"CREATE TABLE IF NOT EXISTS {self._quote(name)} "
+                            f"PARTITION OF {self._quote(table)} "
+                            f"FOR VALUES FROM ('{month}') "
+                            f"TO ('{next_month(month)}')"
+                        ))
+                        created.append(name)
+            self._months |= months
+            logging.info("created partitions %s", created)
+
+            return created
+
+    def drop_before(self, date: datetime.date) -> List[str]:
+        """
+        Drop the partitions holding only rows older than `date`.
+
+        Parameters
+        ----------
+            date : datetime.date
+                Rows updated before this date may be dropped.
+
+        Returns
+        -------
+            List[str]
+                The names of the dropped partitions.
+        """
+        with self._lock:
+            tables = self._load()
+            months = sorted(
+                month for month in self._months if next_month(month) <= date
+            )
+            if not tables or not months:
+                return []
+
+            dropped = []
+            with self.engine.begin() as connection:
+                for month in months:
+                    for table in sorted(tables):
+                        name = partition_name(table, month)
+                        connection.execute(
+                            text(f"DROP TABLE IF EXISTS {self._quote(name)}")
+                        )
+                        dropped.append(name)
+            self._months -= set(months)
+
+            return dropped
+
+
+# Managers of the engines in use
+_managers: "weakref.WeakKeyDictionary[Engine, PartitionManager]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def partition_manager(
+    bind: Union[Engine, Connection],
+) -> PartitionManager:
+    """
+    Return the partition manager of a database, created on first use.
+
+    Parameters
+    ----------
+        bind : sqlalchemy.engine.Engine, sqlalchemy.engine.Connection
+            The database, e.g. the bind of a session; the partitions are
+            created on connections of its engine.
+
+    Returns
+    -------
+        PartitionManager
+            The manager shared by every user of the engine.
+    """
+    engine = bind.engine
+    manager = _managers.get(engine)
+    if manager is None:
+        manager = _managers[engine] = PartitionManager(engine)
+    return manager
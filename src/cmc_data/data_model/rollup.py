@@ -0,0 +1,288 @@
+"""
+Per-coin rollups of the quotes.
+
+The `quote_rollup` table holds the first, last, minimum and maximum price,
+the 24 hour volume and the rank of every coin and quote currency per week
+and per month, so that dashboards read a few thousand precomputed rows
+instead of grouping the whole `quote` table.
+
+Ingestion refreshes the buckets touched by the rows it writes, recomputed
+from the stored rows so that refreshing a bucket twice is harmless; the
+whole table may be rebuilt from scratch with `rebuild_rollups`.
+"""
+
+# Import standard modules
+import datetime
+import logging
+from collections import defaultdict
+from typing import (
+    Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union,
+)
+
+# Import third-party modules
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import Connection, Engine
+
+# Import local modules
+from .models import Market, Quote, QuoteRollup
+from .partitioning import month_start, next_month
+
+# Length of the buckets
+PERIODS = ("week", "month")
+
+# Number of coins whose rows are read per query
+CHUNK_SIZE = 1000
+
+# Bucket of a coin: period, first day of the bucket and coin id
+BucketKey = Tuple[str, datetime.date, int]
+
+
+def bucket_start(
+    period: str, value: Union[datetime.date, datetime.datetime],
+) -> datetime.date:
+    """
+    Return the first day of the bucket holding a timestamp.
+
+    Parameters
+    ----------
+        period : str
+            Either "week", starting on Mondays, or "month".
+
+        value : datetime.date, datetime.datetime
+            The timestamp.
+
+    Returns
+    -------
+        datetime.date
+            The first day of the bucket.
+    """
+    if period == "week":
+        day = datetime.date(value.year, value.month, value.day)
+        return day - datetime.timedelta(day.weekday())
+    if period == "month":
+        return month_start(value)
+    raise ValueError(f"`period` should be one of {PERIODS}, got {period!r}")
+
+
+def _bucket_end(period: str, start: datetime.date) -> datetime.date:
+    """Return the first day of the bucket following `start`."""
+    if period == "week":
+        return start + datetime.timedelta(7)
+    return next_month(start)
+
+
+def _bounds(
+    period: str, start: datetime.date,
+) -> Tuple[datetime.datetime, datetime.datetime]:
+    """Return the range of `last_updated` values of a bucket."""
+    return (
+        datetime.datetime.combine(start, datetime.time()),
+        datetime.datetime.combine(
+            _bucket_end(period, start), datetime.time(),
+        ),
+    )
+
+
+def affected_buckets(rows: Iterable[dict]) -> Set[BucketKey]:
+    """
+    Find the buckets of `market_stats` or `quote` rows.
+
+    Parameters
+    ----------
+        rows : Iterable[dict]
+            Rows with a "coin_id" and a "last_updated".
+
+    Returns
+    -------
+        Set[BucketKey]
+            The period, first day and coin id of every bucket.
+    """
+    return {
+        (period, bucket_start(period, row["last_updated"]), row["coin_id"])
+        for row in rows
+        for period in PERIODS
+    }
+
+
+def _aggregate(
+    period: str,
+    bucket: datetime.date,
+    quotes: Sequence[Any],
+    markets: Sequence[Any],
+) -> List[Dict[str, Any]]:
+    """
+    Compute the rollups of a bucket.
+
+    Parameters
+    ----------
+        period : str
+            Either "week" or "month".
+
+        bucket : datetime.date
+            First day of the bucket.
+
+        quotes : Sequence[Any]
+            The coin id, currency, last update, price and 24 hour volume
+            of the quotes of the bucket.
+
+        markets : Sequence[Any]
+            The coin id, last update and rank of the market stats of the
+            bucket.
+
+    Returns
+    -------
+        List[Dict[str, Any]]
+            One `quote_rollup` row per coin and currency.
+    """
+    ranks: Dict[int, List[Tuple[datetime.datetime, int]]] = defaultdict(list)
+    for coin_id, last_updated, rank in markets:
+        if rank is not None:
+            ranks[coin_id].append((last_updated, rank))
+
+    series: Dict[Tuple[int, str], list] = defaultdict(list)
+    for coin_id, currency, last_updated, price, volume in quotes:
+        series[coin_id, currency].append((last_updated, price, volume))
+
+    rows = []
+    for (coin_id, currency), values in sorted(series.items()):
+        values.sort(key=lambda value: value[0])
+        prices = [price for _, price, _ in values]
+        volumes = [volume for _, _, volume in values if volume is not None]
+        coin_ranks = [rank for _, rank in sorted(ranks[coin_id])]
+        rows.append({
+            "coin_id": coin_id,
+            "currency": currency,
+            "period": period,
+            "bucket": bucket,
+            "samples": len(values),
+            "first_updated": values[0][0],
+            "last_updated": values[-1][0],
+            "open_price": prices[0],
+            "high_price": max(prices),
+            "low_price": min(prices),
+            "close_price": prices[-1],
+            "avg_vol_24": sum(volumes) / len(volumes) if volumes else None,
+            "max_vol_24": max(volumes) if volumes else None,
+            "best_rank": min(coin_ranks) if coin_ranks else None,
+            "worst_rank": max(coin_ranks) if coin_ranks else None,
+            "close_rank": coin_ranks[-1] if coin_ranks else None,
+        })
+
+    return rows
+
+
+def _refresh_bucket(
+    connection: Connection,
+    period: str,
+    bucket: datetime.date,
+    coin_ids: Optional[Sequence[int]] = None,
+) -> int:
+    """Recompute the rollups of a bucket, for some coins or all of them."""
+    low, high = _bounds(period, bucket)
+    quotes = select(
+        Quote.coin_id, Quote.currency, Quote.last_updated, Quote.price,
+        Quote.vol_24,
+    ).where(Quote.last_updated >= low, Quote.last_updated < high)
+    markets = select(
+        Market.coin_id, Market.last_updated, Market.cmc_rank,
+    ).where(Market.last_updated >= low, Market.last_updated < high)
+    stale = delete(QuoteRollup).where(
+        QuoteRollup.period == period, QuoteRollup.bucket == bucket,
+    )
+    if coin_ids is not None:
+        quotes = quotes.where(Quote.coin_id.in_(coin_ids))
+        markets = markets.where(Market.coin_id.in_(coin_ids))
+        stale = stale.where(QuoteRollup.coin_id.in_(coin_ids))
+
+    rows = _aggregate(
+        period, bucket,
+        connection.execute(quotes).all(),
+        connection.execute(markets).all(),
+    )
+    connection.execute(stale)
+    if rows:
+        connection.execute(QuoteRollup.__table__.insert(), rows)
+
+    return len(rows)
+
+
+def refresh_rollups(
+    connection: Connection, buckets: Iterable[BucketKey],
+) -> int:
+    """
+    Recompute the rollups of the given buckets.
+
+    Parameters
+    ----------
+        connection : sqlalchemy.engine.Connection
+            Connection on which to execute the statements; the caller owns
+            the transaction.
+
+        buckets : Iterable[BucketKey]
+            The buckets to recompute, e.g. `affected_buckets(rows)`.
+
+    Returns
+    -------
+        int
+            The number of rollup rows written.
+    """
+    coins: Dict[Tuple[str, datetime.date], Set[int]] = defaultdict(set)
+    for period, bucket, coin_id in buckets:
+        coins[period, bucket].add(coin_id)
+
+    written = 0
+    for (period, bucket), coin_ids in sorted(coins.items()):
+        coin_ids = sorted(coin_ids)
+        for index in range(0, len(coin_ids), CHUNK_SIZE):
+            written += _refresh_bucket(
+                connection, period, bucket,
+                coin_ids[index:index + CHUNK_SIZE],
+            )
+
+    return written
+
+
+def rebuild_rollups(engine: Engine) -> Dict[str, int]:
+    """
+    Rebuild the rollups from scratch.
+
+    Every bucket is recomputed in its own transaction, so that readers
+    keep seeing the previous rollups of the buckets not rebuilt yet.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            The database.
+
+    Returns
+    -------
+        Dict[str, int]
+            The number of rollup rows written per period.
+    """
+    QuoteRollup.__table__.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        low, high = connection.execute(
+            select(func.min(Quote.last_updated), func.max(Quote.last_updated))
+        ).one()
+
+    written = dict.fromkeys(PERIODS, 0)
+    for period in PERIODS:
+        first = bucket_start(period, low) if low is not None else None
+        last = bucket_start(period, high) if high is not None else None
+        with engine.begin() as connection:
+            # Buckets without any quote left
+            stale = delete(QuoteRollup).where(QuoteRollup.period == period)
+            if first is not None:
+                stale = stale.where(
+                    (QuoteRollup.bucket < first) | (QuoteRollup.bucket > last)
+                )
+            connection.execute(stale)
+
+        bucket = first
+        while bucket is not None and bucket <= last:
+            with engine.begin() as connection:
+                written[period] += _refresh_bucket(connection, period, bucket)
+            bucket = _bucket_end(period, bucket)
+        logging.info("rebuilt %d %sly rollups", written[period], period)
+
+    return written
@@ -0,0 +1,84 @@
+"""
+SQLite backend.
+
+Every connection to a SQLite database is tuned on connect: the database is
+switched to write-ahead logging, commits only wait for the log to reach the
+disk, the page cache is enlarged and foreign keys are enforced as they are
+on PostgreSQL. The defaults may be overridden through `DB_SQLITE_*`
+environment variables, e.g. `DB_SQLITE_SYNCHRONOUS=FULL`.
+"""
+
+# Import standard modules
+import os
+from typing import Any, Dict, Optional
+
+# Import third-party modules
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Default file of the database
+DATABASE = "cmc_data.sqlite"
+
+# Pragmas set on every connection, in this order
+PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    # Negative sizes are in KiB, i.e. 64 MiB
+    "cache_size": -65536,
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+    # Milliseconds to wait for the lock of another writer
+    "busy_timeout": 30000,
+}
+
+
+def is_sqlite(drivername: Optional[str]) -> bool:
+    """Check whether a driver name, e.g. "sqlite+pysqlite", is SQLite's."""
+    return (drivername or "").split("+")[0] == "sqlite"
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    """
+    Read the pragmas to set on every connection.
+
+    Returns
+    -------
+        Dict[str, Any]
+            `PRAGMAS`, overridden by the `DB_SQLITE_<PRAGMA>` environment
+            variables.
+    """
+    return {
+        name: os.getenv(f"DB_SQLITE_{name.upper()}") or value
+        for name, value in PRAGMAS.items()
+    }
+
+
+def configure_sqlite(
+    engine: Engine, pragmas: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Set pragmas on every new connection of a SQLite engine.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            Engine of a SQLite database.
+
+        pragmas : Dict[str, Any], NoneType
+            Pragmas to set. If `None`, `sqlite_pragmas()`. Default `None`.
+
+    Returns
+    -------
+        NoneType
+    """
+    if pragmas is None:
+        pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,240 @@
+"""
+Change detection for the append-only tables.
+
+Long-tail coins often report the same supply, pair counts and
+`last_updated` in consecutive snapshots. `FingerprintStore` keeps a 64-bit
+hash of the last `market_stats` row and of the last `quote` row per
+currency ingested for each coin, so that rows identical to them are not
+sent to the database again.
+
+The hash covers `last_updated`, part of the natural key of both tables:
+a suppressed row is always one the database already holds.
+"""
+
+# Import standard modules
+import hashlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+# Import third-party modules
+from sqlalchemy import select
+
+# Import local modules
+from cmc_data.bulk import RowBatches
+from cmc_data.columnar import MARKET_COLUMNS, QUOTE_COLUMNS
+from cmc_data.data_model.models import Fingerprint, Market, Quote
+from cmc_data.loaders import upsert
+from cmc_data.metrics import ROWS_SUPPRESSED
+
+# Hashed columns of each table
+_FIELDS = {
+    Market.__tablename__: [
+        name for name in MARKET_COLUMNS if name != "coin_id"
+    ],
+    Quote.__tablename__: [
+        name for name in QUOTE_COLUMNS if name not in ("coin_id", "currency")
+    ],
+}
+
+# Key of a fingerprint: coin id, and quote currency or "" for market stats
+Key = Tuple[int, str]
+
+
+def _normalise(value: Any) -> Any:
+    """Hash integers and floats alike, e.g. supplies of 21000000."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def fingerprint(values: Iterable[Any]) -> int:
+    """
+    Hash the values of a row into a signed 64-bit integer.
+
+    The hash is stable across processes, unlike `hash`, so that it may be
+    stored.
+
+    Parameters
+    ----------
+        values : Iterable[Any]
+            Numbers, timestamps, strings or `None`.
+
+    Returns
+    -------
+        int
+            The fingerprint.
+    """
+    text = repr(tuple(_normalise(value) for value in values))
+    digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _row_key(table: str, row: dict) -> Key:
+    if table == Quote.__tablename__:
+        return row["coin_id"], row["currency"]
+    return row["coin_id"], ""
+
+
+class FingerprintStore:
+    """
+    Fingerprints of the last ingested `market_stats` and `quote` rows.
+
+    Parameters
+    ----------
+        persist : bool
+            Keep the fingerprints in the `ingest_fingerprint` table too, so
+            that they survive the run; otherwise they are kept in memory
+            only and the first snapshot of a run is written in full.
+            Default `False`.
+    """
+
+    def __init__(self, persist: bool = False) -> None:
+        self.persist = persist
+        self.warmed = False
+        self.suppressed: Counter = Counter()
+        self._fingerprints: Dict[Key, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def warm(self, connection: Any) -> None:
+        """
+        Load the stored fingerprints.
+
+        With `persist`, the `ingest_fingerprint` table must exist; it is
+        created by `init-db`, or by the command line interface.
+
+        Parameters
+        ----------
+            connection : sqlalchemy.engine.Connection
+                Connection on which to execute the queries.
+
+        Returns
+        -------
+            NoneType
+        """
+        self._fingerprints.clear()
+        if self.persist:
+            self._fingerprints.update(
+                ((coin_id, currency), value)
+                for coin_id, currency, value in connection.execute(select(
+                    Fingerprint.coin_id,
+                    Fingerprint.currency,
+                    Fingerprint.fingerprint,
+                ))
+            )
+        self.warmed = True
+
+    def invalidate(self) -> None:
+        """Drop every fingerprint, e.g. after a rolled back write."""
+        self._fingerprints.clear()
+        self.warmed = False
+
+    def _changed(
+        self, table: str, rows: Sequence[dict], changes: Dict[Key, int],
+    ) -> List[bool]:
+        """Tell which rows differ from the last ingested ones."""
+        fields = _FIELDS[table]
+        keep = []
+        for row in rows:
+            key = _row_key(table, row)
+            value = fingerprint(row[name] for name in fields)
+            changed = self._fingerprints.get(key) != value \
+                and changes.get(key) != value
+            if changed:
+                changes[key] = value
+            keep.append(changed)
+        self.suppressed[table] += keep.count(False)
+        ROWS_SUPPRESSED.inc(keep.count(False), table=table)
+
+        return keep
+
+    def diff(self, batches: RowBatches) -> Tuple[RowBatches, Dict[Key, int]]:
+        """
+        Drop the rows identical to the last ingested ones.
+
+        Parameters
+        ----------
+            batches : RowBatches
+                Rows to write.
+
+        Returns
+        -------
+            RowBatches
+                The rows which changed; the reference tables are left as
+                they are.
+
+            Dict[Key, int]
+                The fingerprints to `record` once the rows are written.
+        """
+        changes: Dict[Key, int] = {}
+        markets = [
+            row for row, keep in zip(batches.markets, self._changed(
+                Market.__tablename__, batches.markets, changes,
+            ))
+            if keep
+        ]
+        quotes = [
+            row for row, keep in zip(batches.quotes, self._changed(
+                Quote.__tablename__, batches.quotes, changes,
+            ))
+            if keep
+        ]
+        snapshot = batches.snapshot
+        if snapshot is not None:
+            snapshot = snapshot.mask(
+                self._changed(
+                    Market.__tablename__,
+                    snapshot.rows(Market.__tablename__),
+                    changes,
+                ),
+                self._changed(
+                    Quote.__tablename__,
+                    snapshot.rows(Quote.__tablename__),
+                    changes,
+                ),
+            )
+
+        return batches._replace(
+            markets=markets, quotes=quotes, snapshot=snapshot,
+        ), changes
+
+    def record(self, connection: Any, changes: Dict[Key, int]) -> None:
+        """
+        Record the fingerprints of written rows.
+
+        Call it in the transaction of the write; if the transaction is
+        rolled back, the caller must invalidate the store.
+
+        Parameters
+        ----------
+            connection : sqlalchemy.engine.Connection
+                Connection of the write.
+
+            changes : Dict[Key, int]
+                Fingerprints returned by `diff`.
+
+        Returns
+        -------
+            NoneType
+        """
+        if self.persist:
+            upsert(
+                connection,
+                Fingerprint.__table__,
+                [
+                    {"coin_id": coin_id, "currency": currency,
+                     "fingerprint": value}
+                    for (coin_id, currency), value in changes.items()
+                ],
+                ["coin_id", "currency"],
+            )
+        self._fingerprints.update(changes)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of rows suppressed per table so far."""
+        return {
+            table: self.suppressed[table]
+            for table in (Market.__tablename__, Quote.__tablename__)
+        }
@@ -2,17 +2,31 @@
 
 # Import standard modules
 import datetime
-from typing import List, Optional, Union
+from typing import Any, List, Optional, Union
 
 # Import third-party modules
 import requests
 from bs4 import BeautifulSoup
 
+# Page listing free proxy servers
+PROXY_LIST_URL = "https://www.sslproxies.org"
 
-def get_proxies() -> Optional[List[dict]]:
+
+def get_proxies(
+    client: Optional[Any] = None, url: str = PROXY_LIST_URL,
+) -> Optional[List[dict]]:
     """
     Scrape proxy server information from https://www.sslproxies.org.
 
+    Parameters
+    ----------
+        client : cmc_data.client.Client, NoneType
+            HTTP client to send the request with. Default `None`.
+
+        url : str
+            URL of the page listing the proxy servers, e.g. of a local
+            stand-in server. Default `PROXY_LIST_URL`.
+
     Returns
     -------
         List[dict]
@@ -21,11 +35,8 @@ def get_proxies() -> Optional[List[dict]]:
         NoneType
             If failed to retrieve a response from the website.
     """
-    # Declare variables
-    url = "https://www.sslproxies.org"
-
     # Request proxies
-    payload = requests.get(url)
+    payload = (client or requests).get(url)
 
     # Validate response
     content = b""
@@ -117,3 +128,48 @@ def validate_date_input(
         ))
 
     return _date
+
+
+def parse_timestamp(
+    value: Optional[Union[str, datetime.datetime]]
+) -> Optional[datetime.datetime]:
+    """
+    Parse an API timestamp into a naive UTC `datetime`.
+
+    The API reports timestamps as ISO-8601 strings in UTC, e.g.
+    "2013-04-28T23:55:01.000Z".
+
+    Parameters
+    ----------
+        value : str, datetime.datetime, NoneType
+            The timestamp to parse.
+
+    Returns
+    -------
+        datetime.datetime
+            If `value` is a valid timestamp.
+
+        NoneType
+            If `value` is `None`.
+
+    Raises
+    ------
+        ValueError
+            * If `value` does not conform to the ISO-8601 format.
+    """
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+
+    timestamp_formats = [
+        "%Y-%m-%dT%H:%M:%S.%fZ",
+        "%Y-%m-%dT%H:%M:%SZ",
+        "%Y-%m-%dT%H:%M:%S.%f",
+        "%Y-%m-%dT%H:%M:%S",
+    ]
+    for timestamp_format in timestamp_formats:
+        try:
+            return datetime.datetime.strptime(value, timestamp_format)
+        except ValueError:
+            continue
+
+    raise ValueError(f'incorrect timestamp format "{value}"')
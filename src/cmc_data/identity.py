@@ -0,0 +1,200 @@
+"""
+Run-scoped identity cache.
+
+Keep track of the coins, platforms and tag references already stored in the
+database, so that ingestion does not need to ask the database whether they
+exist.
+"""
+
+# Import standard modules
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Import third-party modules
+from sqlalchemy import select
+
+# Import local modules
+from cmc_data.data_model.models import Coin, Platform, TagReference
+
+
+class _LRUMap:
+    """Bounded mapping which evicts the least recently used keys."""
+
+    __slots__ = ("max_entries", "complete", "evictions", "_data")
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        # Whether every row of the table is in the map, i.e. whether a miss
+        # proves the row does not exist
+        self.complete = False
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        """Return the value of `key` or `None` if not cached."""
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def add(self, key: Hashable, value: Any = True) -> None:
+        """Cache `key`, evicting the least recently used key if full."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+            self.complete = False
+
+    def clear(self) -> None:
+        """Drop every key."""
+        self._data.clear()
+        self.complete = False
+
+
+class IdentityCache:
+    """
+    Identities of the rows already stored in the reference tables.
+
+    The cache holds the `coin` and `platform` ids and the `tag_ref` name to
+    id mapping. It is filled with a single query per table on first use and
+    updated as new rows are written. While nothing has been evicted, a miss
+    proves that a row does not exist, so no existence check is required,
+    unless other processes write the same tables.
+
+    Parameters
+    ----------
+        max_entries : int
+            Maximum number of keys cached per table; the least recently used
+            keys are evicted beyond that. Default 100000.
+
+        shared : bool
+            Whether other processes write the reference tables at the same
+            time, e.g. other queue workers: a miss then never proves that a
+            row does not exist. Default `False`.
+    """
+
+    _queries = {
+        Coin.__tablename__: select(Coin.id),
+        Platform.__tablename__: select(Platform.id),
+        TagReference.__tablename__: select(TagReference.name, TagReference.id),
+    }
+
+    def __init__(
+        self, max_entries: int = 100_000, shared: bool = False,
+    ) -> None:
+        self.max_entries = max_entries
+        self.shared = shared
+        self.warmed = False
+        self.hits = 0
+        self.misses = 0
+        self._maps: Dict[str, _LRUMap] = {
+            table: _LRUMap(max_entries) for table in self._queries
+        }
+
+    def warm(self, connection: Any) -> None:
+        """
+        Fill the cache with a single query per table.
+
+        Parameters
+        ----------
+            connection : sqlalchemy.engine.Connection, sqlalchemy.orm.Session
+                Connection on which to execute the queries.
+
+        Returns
+        -------
+            NoneType
+        """
+        for table, query in self._queries.items():
+            lru_map = self._maps[table]
+            lru_map.clear()
+            rows = connection.execute(query.limit(self.max_entries + 1))
+            count = 0
+            for count, row in enumerate(rows, 1):
+                lru_map.add(row[0], row[-1])
+            lru_map.complete = not self.shared and count <= self.max_entries
+        self.warmed = True
+
+    def invalidate(self) -> None:
+        """Drop every cached identity, e.g. after a rolled back write."""
+        for lru_map in self._maps.values():
+            lru_map.clear()
+        self.warmed = False
+
+    def contains(self, table: str, key: Hashable) -> Optional[bool]:
+        """
+        Check whether a row exists.
+
+        Parameters
+        ----------
+            table : str
+                Name of the table, i.e. "coin", "platform" or "tag_ref".
+
+            key : Hashable
+                The row id, or the tag name for "tag_ref".
+
+        Returns
+        -------
+            bool
+                Whether the row exists.
+
+            NoneType
+                If the cache cannot tell, i.e. the database must be asked.
+        """
+        lru_map = self._maps[table]
+        if lru_map.get(key) is not None:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        return False if lru_map.complete else None
+
+    def get(self, table: str, key: Hashable) -> Any:
+        """
+        Return the cached value of a row, e.g. the id of a tag reference.
+
+        Parameters
+        ----------
+            table : str
+                Name of the table.
+
+            key : Hashable
+                The row id, or the tag name for "tag_ref".
+
+        Returns
+        -------
+            Any
+                The cached value or `None` if not cached.
+        """
+        value = self._maps[table].get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return value
+
+    def add(self, table: str, key: Hashable, value: Any = None) -> None:
+        """
+        Record a row as stored in the database.
+
+        Parameters
+        ----------
+            table : str
+                Name of the table.
+
+            key : Hashable
+                The row id, or the tag name for "tag_ref".
+
+            value : Any
+                The value to cache, e.g. the id of a tag reference. Defaults
+                to `key`.
+
+        Returns
+        -------
+            NoneType
+        """
+        self._maps[table].add(key, key if value is None else value)
@@ -0,0 +1,881 @@
+"""
+Extraction and ingestion of the listings.
+
+Every function touching the database accepts the `session` to use; if
+omitted, the default session of `cmc_data.data_model` is created on first
+use.
+"""
+
+# Import standard modules
+import json
+import logging
+import datetime
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import (
+    Any, Dict, Iterator, List, Optional, Set, Tuple, Union,
+)
+
+# Import third-party modules
+import requests
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data.bulk import RowBatches, build_batches, write_batches
+from cmc_data.client import Client
+from cmc_data.data_model import get_session
+from cmc_data.data_model.models import (
+    Coin, CoinLatest, Market, Platform, Quote, QuoteRollup, Tag,
+    TagReference,
+)
+from cmc_data.data_model.partitioning import partition_manager
+from cmc_data.data_model.rollup import affected_buckets, refresh_rollups
+from cmc_data.delta import FingerprintStore
+from cmc_data.helpers import validate_date_input
+from cmc_data.identity import IdentityCache
+from cmc_data.latest import update_latest
+from cmc_data.loaders import copy_enabled
+from cmc_data.metrics import (
+    PAGES, REJECTED_ENTRIES, ROWS_WRITTEN, WRITE_SECONDS,
+)
+from cmc_data.records import DecodedPage, Listing, decode_listings
+
+# Server of the listings, overridden by the `CMC_BASE_URL` environment
+# variable, e.g. to use a local stand-in server
+BASE_URL = "https://web-api.coinmarketcap.com"
+
+# Endpoint of the historical listings
+LISTINGS_ENDPOINT = "/v1/cryptocurrency/listings/historical"
+
+# Number of coins whose stored keys are looked up per query
+KEY_CHUNK_SIZE = 1000
+
+
+def base_url(url: Optional[str] = None) -> str:
+    """
+    Resolve the server of the listings.
+
+    Parameters
+    ----------
+        url : str, NoneType
+            Explicit server URL. If `None`, the `CMC_BASE_URL` environment
+            variable, or `BASE_URL`. Default `None`.
+
+    Returns
+    -------
+        str
+            The server URL, without trailing slash.
+    """
+    return (url or os.getenv("CMC_BASE_URL") or BASE_URL).rstrip("/")
+
+
+def iter_pages(
+    url: str, /, client: Optional[Client] = None, **kwargs: Any,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Extract data from URL, one page at a time.
+
+    The next page is requested in the background while the caller consumes
+    the current one, paced by the rate limiter of the client. Pagination
+    stops on the first page shorter than the requested `limit`, including
+    an empty page.
+
+    Parameters
+    ----------
+        url : str
+            URL where to send the request to.
+
+        client : Client, NoneType
+            HTTP client to send the requests with. If `None`, a client is
+            created for the duration of the pagination. Default `None`.
+
+        **kwargs : Any
+            Parameters of the `Client.get_json` method. The "start" and
+            "limit" query parameters drive the pagination.
+
+    Returns
+    -------
+        Iterator[List[Dict[str, Any]]]
+            The data of each non-empty page of the API response.
+
+    Raises
+    ------
+        HTTPError
+            * If bad query or problems on server side.
+    """
+    params = dict(kwargs.pop("params", None) or {})
+    limit = int(params.get("limit") or 5000)
+    start = int(params.get("start") or 1)
+
+    def fetch(start: int) -> list:
+        # Send request
+        response = http_client.get_json(
+            url, params={**params, "start": start}, **kwargs,
+        )
+
+        return response["data"] or []
+
+    http_client = client or Client()
+    # Closed as well when the caller stops early or a request fails
+    try:
+        with ThreadPoolExecutor(1, "cmc-prefetch") as executor:
+            future = executor.submit(fetch, start)
+            while True:
+                page = future.result()
+                exhausted = len(page) < limit
+                if not exhausted:
+                    # Prefetch the next page while the caller consumes this
+                    # one
+                    start += limit
+                    future = executor.submit(fetch, start)
+                if page:
+                    PAGES.inc()
+                    yield page
+                if exhausted:
+                    break
+    finally:
+        if client is None:
+            http_client.close()
+
+
+def get_data(
+    url: str, /, client: Optional[Client] = None, **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Extract data from URL.
+
+    Parameters
+    ----------
+        url : str
+            URL where to send the request to.
+
+        client : Client, NoneType
+            HTTP client to send the requests with. Default `None`.
+
+        **kwargs : Any
+            Parameters of the `Client.get_json` method.
+
+    Returns
+    -------
+        List[Dict[str, Any]]
+            The data from the API response.
+
+    Raises
+    ------
+        HTTPError
+            * If bad query or problems on server side.
+    """
+    content: list = []
+    for page in iter_pages(url, client, **kwargs):
+        content += page
+
+    return content
+
+
+def _exists(
+    session: Session,
+    cache: Optional[IdentityCache],
+    model: Any,
+    key: Any,
+    criterion: Any,
+) -> bool:
+    """Check whether a row exists, asking the database only if necessary."""
+    known = cache.contains(model.__tablename__, key) \
+        if cache is not None else None
+    if known is None:
+        known = session.query(model).filter(criterion).first() is not None
+        if known and cache is not None:
+            cache.add(model.__tablename__, key)
+
+    return known
+
+
+def _tag_reference_id(
+    session: Session, cache: Optional[IdentityCache], name: str,
+) -> Optional[int]:
+    """Return the id of a tag reference, asking the database if necessary."""
+    if cache is not None:
+        known = cache.contains(TagReference.__tablename__, name)
+        if known is not None:
+            return cache.get(TagReference.__tablename__, name) \
+                if known else None
+
+    tag_reference = session.query(TagReference) \
+        .filter(TagReference.name == name) \
+        .first()
+    if tag_reference is None:
+        return None
+    if cache is not None:
+        cache.add(TagReference.__tablename__, name, tag_reference.id)
+
+    return tag_reference.id
+
+
+def ingest_data(
+    data: Union[List[dict], RowBatches],
+    bulk: bool = False,
+    cache: Optional[IdentityCache] = None,
+    copy: Optional[bool] = None,
+    session: Optional[Session] = None,
+    columnar: bool = False,
+    delta: Optional[FingerprintStore] = None,
+    rollups: bool = False,
+    coin_latest: bool = False,
+) -> int:
+    """
+    Ingest data into the database.
+
+    Parameters
+    ----------
+        data : List[dict], RowBatches
+            JSON-like response from the "coinmarketcap" server, or
+            `Listing` records. The whole page is validated before any
+            database work starts. Row batches already built from a page are
+            written in bulk.
+
+        bulk : bool
+            Write the whole page in a single transaction with set-based
+            upserts instead of one transaction per entry. Default `False`.
+
+        cache : IdentityCache, NoneType
+            Identities already stored in the database, which spares the
+            existence checks. Filled on first use. Default `None`.
+
+        copy : bool, NoneType
+            Load `market_stats` and `quote` rows through PostgreSQL's
+            `COPY ... FROM STDIN`; implies `bulk`. If `None`, read from the
+            `CMC_COPY` environment variable. Default `None`.
+
+        session : sqlalchemy.orm.Session, NoneType
+            Database session. If `None`, the default session.
+            Default `None`.
+
+        columnar : bool
+            Convert the `market_stats` and `quote` rows into a columnar
+            snapshot; implies `bulk`. Requires NumPy. Default `False`.
+
+        delta : FingerprintStore, NoneType
+            Fingerprints of the last ingested rows; the `market_stats` and
+            `quote` rows identical to them are not written. Implies `bulk`.
+            Default `None`.
+
+        rollups : bool
+            Refresh the weekly and monthly rollups of the written rows in
+            the same transaction; implies `bulk`. Default `False`.
+
+        coin_latest : bool
+            Upsert the newest market stats and quotes of the written rows
+            into the `coin_latest` table in the same transaction; implies
+            `bulk`. Default `False`.
+
+    Returns
+    -------
+        int
+            The number of entries which failed validation or failed to be
+            written.
+    """
+    if copy is None:
+        copy = copy_enabled()
+    if session is None:
+        session = get_session()
+
+    partitions = partition_manager(session.get_bind())
+
+    if bulk or copy or columnar or rollups or coin_latest \
+            or delta is not None or isinstance(data, RowBatches):
+        batches = data if isinstance(data, RowBatches) \
+            else build_batches(data, columnar)
+        rejected = len(batches.rejected)
+        if delta is not None:
+            if not delta.warmed:
+                delta.warm(session.connection())
+            suppressed = dict(delta.suppressed)
+            batches, changes = delta.diff(batches)
+            logging.info(
+                "delta ingestion suppressed %s",
+                {
+                    table: count - suppressed.get(table, 0)
+                    for table, count in delta.suppressed.items()
+                },
+            )
+        partitions.ensure(chain(
+            (
+                row["last_updated"]
+                for row in chain(batches.markets, batches.quotes)
+            ),
+            batches.snapshot.dates() if batches.snapshot is not None else (),
+        ))
+        if cache is not None and not cache.warmed:
+            cache.warm(session)
+        try:
+            with WRITE_SECONDS.time():
+                counts = write_batches(
+                    session.connection(), batches, cache, copy=copy,
+                )
+                if delta is not None:
+                    delta.record(session.connection(), changes)
+                if rollups:
+                    counts[QuoteRollup.__tablename__] = _refresh_rollups(
+                        session.connection(), batches,
+                    )
+                if coin_latest:
+                    counts[CoinLatest.__tablename__] = update_latest(
+                        session.connection(), batches,
+                    )
+                session.commit()
+        except Exception:
+            session.rollback()
+            if cache is not None:
+                cache.invalidate()
+            if delta is not None:
+                delta.invalidate()
+            raise
+        for table, rows in counts.items():
+            ROWS_WRITTEN.inc(rows, table=table)
+        REJECTED_ENTRIES.inc(rejected)
+        logging.info(
+            "bulk ingestion wrote %s; rejected %d entries", counts, rejected,
+        )
+        return rejected
+
+    page = decode_listings(data)
+    partitions.ensure(
+        timestamp
+        for listing in page.listings
+        for timestamp in chain(
+            [listing.last_updated],
+            (quote.last_updated for quote in listing.quotes),
+        )
+    )
+    if cache is not None and not cache.warmed:
+        cache.warm(session)
+
+    with WRITE_SECONDS.time():
+        _write_listings(session, cache, page)
+    REJECTED_ENTRIES.inc(len(page.rejected))
+
+    return len(page.rejected)
+
+
+def _refresh_rollups(connection: Connection, batches: RowBatches) -> int:
+    """Refresh the rollups of the buckets touched by row batches."""
+    rows = chain(batches.markets, batches.quotes)
+    if batches.snapshot is not None:
+        rows = chain(rows, *(
+            batches.snapshot.rows(table)
+            for table in (Market.__tablename__, Quote.__tablename__)
+        ))
+
+    return refresh_rollups(connection, affected_buckets(rows))
+
+
+def _stored_keys(
+    session: Session, listings: List[Listing],
+) -> Tuple[Set[Tuple[int, datetime.datetime]], Set[Tuple[int, int]]]:
+    """
+    Look up the natural keys of listings already stored, in a few queries.
+
+    Returns the `market_stats` keys, coin id and `last_updated`, and the
+    `tag` keys, coin id and tag id, of the coins of the listings.
+    """
+    coin_ids = sorted({listing.id for listing in listings})
+    timestamps = {listing.last_updated for listing in listings}
+    markets: Set[tuple] = set()
+    tags: Set[tuple] = set()
+    for start in range(0, len(coin_ids), KEY_CHUNK_SIZE):
+        chunk = coin_ids[start:start + KEY_CHUNK_SIZE]
+        markets.update(
+            (coin_id, last_updated)
+            for coin_id, last_updated in session.execute(
+                select(Market.coin_id, Market.last_updated).where(
+                    Market.coin_id.in_(chunk),
+                    Market.last_updated.in_(timestamps),
+                )
+            )
+        )
+        tags.update(
+            (coin_id, tag_id)
+            for coin_id, tag_id in session.execute(
+                select(Tag.coin_id, Tag.tag_id).where(Tag.coin_id.in_(chunk))
+            )
+        )
+
+    return markets, tags
+
+
+def _add_listing(
+    session: Session,
+    cache: Optional[IdentityCache],
+    listing: Listing,
+    stored_tags: Set[Tuple[int, int]],
+) -> Tuple[list, Set[Tuple[int, int]], int]:
+    """
+    Add the rows of a listing to the session, and flush them.
+
+    Returns the identities to cache once the entry is committed, the new
+    `tag` keys and the number of `tag` rows.
+    """
+    new_identities: list = []
+    new_tags: Set[Tuple[int, int]] = set()
+    tags = 0
+    market = Market(
+        num_market_pairs=listing.num_market_pairs,
+        circulating_supply=listing.circulating_supply,
+        total_supply=listing.total_supply,
+        cmc_rank=listing.cmc_rank,
+        last_updated=listing.last_updated,
+    )
+
+    if not _exists(
+        session, cache, Coin, listing.id, Coin.id == listing.id,
+    ):
+        coin = Coin(
+            id=listing.id,
+            name=listing.name.lower(),
+            symbol=listing.symbol.lower(),
+            slug=listing.slug.lower(),
+            date_added=listing.date_added,
+            max_supply=listing.max_supply,
+        )
+        market.coins = coin
+        session.add(coin)
+        new_identities.append((Coin, listing.id, None))
+    else:
+        market.coin_id = listing.id
+
+    if listing.platform is not None:
+        platform_id = listing.platform.id
+        if not _exists(
+            session, cache, Coin, platform_id, Coin.id == platform_id,
+        ):
+            currency = Coin(
+                id=platform_id,
+                name=listing.platform.name.lower(),
+                symbol=listing.platform.symbol.lower(),
+                slug=listing.platform.slug.lower(),
+            )
+            session.add(currency)
+            new_identities.append((Coin, platform_id, None))
+
+        if not _exists(
+            session, cache, Platform, listing.id,
+            Platform.id == listing.id,
+        ):
+            platform = Platform(
+                id=listing.id,
+                platform_id=platform_id,
+                token_address=listing.platform.token_address.encode(),
+            )
+            session.add(platform)
+            new_identities.append((Platform, listing.id, None))
+
+    # Tags listed twice would break the natural key
+    for name in dict.fromkeys(tag.lower() for tag in listing.tags):
+        tag = Tag(coin_id=listing.id)
+
+        tag_id = _tag_reference_id(session, cache, name)
+        if tag_id is None:
+            tag_reference = TagReference(name=name)
+            tag.tags = tag_reference
+            session.add(tag_reference)
+            new_identities.append((TagReference, name, tag_reference))
+        elif (listing.id, tag_id) in stored_tags | new_tags:
+            continue
+        else:
+            tag.tag_id = tag_id
+            new_tags.add((listing.id, tag_id))
+
+        session.add(tag)
+        tags += 1
+
+    for value in listing.quotes:
+        quote = Quote(
+            coin_id=listing.id,
+            currency=value.currency,
+            price=value.price,
+            vol_24=value.volume_24h,
+            pct_change_1h=value.percent_change_1h,
+            pct_change_24h=value.percent_change_24h,
+            pct_change_7d=value.percent_change_7d,
+            market_cap=value.market_cap,
+            fully_diluted_mc=value.fully_diluted_market_cap,
+            last_updated=value.last_updated,
+        )
+        session.add(quote)
+
+    session.add(market)
+    session.flush()
+
+    return new_identities, new_tags, tags
+
+
+def _write_listings(
+    session: Session, cache: Optional[IdentityCache], page: DecodedPage,
+) -> None:
+    """
+    Write validated listings, one transaction per entry.
+
+    An entry which conflicts with rows written meanwhile by another writer,
+    e.g. a coin inserted by another queue worker, is retried once with its
+    keys looked up again.
+
+    Raises
+    ------
+        sqlalchemy.exc.SQLAlchemyError
+            * If an entry still fails to be written, so that the snapshot
+              is not recorded as complete; the entries written before it
+              are kept.
+    """
+    stored_markets, stored_tags = _stored_keys(session, page.listings)
+    for listing in page.listings:
+        if (listing.id, listing.last_updated) in stored_markets:
+            # Already ingested along with its quotes and tags
+            continue
+
+        for retry in (False, True):
+            try:
+                new_identities, new_tags, tags = _add_listing(
+                    session, cache, listing, stored_tags,
+                )
+            except IntegrityError:
+                session.rollback()
+                if retry:
+                    raise
+                logging.info(
+                    "entry conflicts with rows written meanwhile, "
+                    "retrying: %s", listing,
+                )
+                # Misses of the cache are no longer proof of absence
+                if cache is not None:
+                    cache.invalidate()
+                markets, tag_keys = _stored_keys(session, [listing])
+                stored_markets.update(markets)
+                stored_tags.update(tag_keys)
+                if (listing.id, listing.last_updated) in stored_markets:
+                    break
+                continue
+            except SQLAlchemyError:
+                session.rollback()
+                raise
+            except Exception:
+                session.rollback()
+                page.rejected.append(listing)
+                logging.warning(
+                    "entry failed to be written: %s", listing, exc_info=True,
+                )
+                break
+
+            # Read the generated ids before committing expires the objects
+            identities = [
+                (model.__tablename__, key, getattr(value, "id", value))
+                for model, key, value in new_identities
+            ]
+            session.commit()
+            stored_markets.add((listing.id, listing.last_updated))
+            stored_tags.update(new_tags)
+            rows = Counter(table for table, _, _ in identities)
+            rows.update({
+                Tag.__tablename__: tags,
+                Quote.__tablename__: len(listing.quotes),
+                Market.__tablename__: 1,
+            })
+            for table, count in rows.items():
+                ROWS_WRITTEN.inc(count, table=table)
+            if cache is not None:
+                for table, key, value in identities:
+                    cache.add(table, key, value)
+            break
+
+
+def extract_pages(
+    date: Union[str, datetime.date, datetime.datetime],
+    proxy: Optional[dict] = None,
+    client: Optional[Client] = None,
+    server: Optional[str] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Extract the listings of a date from source, one page at a time.
+
+    Parameters
+    ----------
+        date : str, datetime.date, datetime.datetime
+            The date for which to retrieve the data.
+
+        proxy : dict, NoneType
+            Proxy server. Default `None`.
+
+        client : Client, NoneType
+            HTTP client to send the requests with. Default `None`.
+
+        server : str, NoneType
+            Server of the listings. If `None`, see `base_url`.
+            Default `None`.
+
+    Returns
+    -------
+        Iterator[List[Dict[str, Any]]]
+            The listings of the date, page by page.
+
+    Raises
+    ------
+        TypeError
+            * If input parameters of incorrect type.
+
+        ValueError
+            * If `date` is prior to 2013-04-28.
+
+        RequestException
+            * If bad query, problems on server side or connection errors
+            persisting after retries.
+    """
+    # Validate parameters
+    _date = validate_date_input(date)
+
+    # Declare variables
+    url_coinmarketcap = base_url(server) + LISTINGS_ENDPOINT
+    convert = "USD,USD,BTC"
+    limit = 5000
+    start = 1
+
+    # Configure request parameters
+    parameters = {
+        "convert": convert,
+        "date": _date,
+        "limit": limit,
+        "start": start,
+    }
+
+    # Configure default logging message
+    message: dict = {
+        "url": url_coinmarketcap,
+        "parameters": parameters,
+        "proxy": proxy,
+    }
+
+    # Extract data
+    try:
+        yield from iter_pages(
+            url_coinmarketcap, client, params=parameters, proxies=proxy,
+        )
+    except requests.RequestException:
+        message["status"] = "failure"
+        logging.warning(message, exc_info=True)
+        raise
+
+    message["status"] = "success"
+    message["parameters"]["date"] = str(message["parameters"]["date"])
+    logging.info("%s", json.dumps(message, indent=2))
+
+
+def extract_data(
+    date: Union[str, datetime.date, datetime.datetime],
+    proxy: Optional[dict] = None,
+    client: Optional[Client] = None,
+    server: Optional[str] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Extract the listings of a date from source.
+
+    Parameters
+    ----------
+        date : str, datetime.date, datetime.datetime
+            The date for which to retrieve the data.
+
+        proxy : dict, NoneType
+            Proxy server. Default `None`.
+
+        client : Client, NoneType
+            HTTP client to send the requests with. Default `None`.
+
+        server : str, NoneType
+            Server of the listings. If `None`, see `base_url`.
+            Default `None`.
+
+    Returns
+    -------
+        List[Dict[str, Any]]
+            The listings of the date.
+
+        NoneType
+            If the request failed.
+
+    Raises
+    ------
+        TypeError
+            * If input parameters of incorrect type.
+
+        ValueError
+            * If `date` is prior to 2013-04-28.
+    """
+    content: list = []
+    try:
+        for page in extract_pages(date, proxy, client, server):
+            content += page
+    except requests.RequestException:
+        return None
+
+    return content
+
+
+def ingest_snapshot(
+    date: datetime.date,
+    data: Union[List[dict], RowBatches],
+    bulk: bool = False,
+    cache: Optional[IdentityCache] = None,
+    copy: Optional[bool] = None,
+    session: Optional[Session] = None,
+    columnar: bool = False,
+    delta: Optional[FingerprintStore] = None,
+    rollups: bool = False,
+    coin_latest: bool = False,
+) -> Optional[Dict[str, int]]:
+    """
+    Ingest the listings of a date, logging the outcome.
+
+    Parameters
+    ----------
+        date : datetime.date
+            The date of the listings.
+
+        data : List[dict], RowBatches
+            JSON-like response from the "coinmarketcap" server; a page or
+            the whole snapshot, possibly converted into row batches.
+
+        bulk, cache, copy, session, columnar, delta, rollups, coin_latest
+            See `ingest_data`.
+
+    Returns
+    -------
+        Dict[str, int]
+            The number of entries ingested and rejected.
+
+        NoneType
+            If the ingestion failed.
+    """
+    try:
+        rejected = ingest_data(
+            data, bulk=bulk, cache=cache, copy=copy, session=session,
+            columnar=columnar, delta=delta, rollups=rollups,
+            coin_latest=coin_latest,
+        )
+    except Exception:
+        err = f"failed data ingestion for {date:%Y-%m-%d}"
+        logging.warning(err, exc_info=True)
+        return None
+
+    if isinstance(data, RowBatches):
+        entries = data.listed + len(data.rejected)
+    else:
+        entries = len(data)
+    msg = f"ingested {entries} entries for {date:%Y-%m-%d}"
+    logging.info(msg)
+
+    return {"entries": entries - rejected, "rejected": rejected}
+
+
+def populate(
+    date: Union[str, datetime.date, datetime.datetime],
+    proxy: Optional[dict] = None,
+    bulk: bool = False,
+    cache: Optional[IdentityCache] = None,
+    copy: Optional[bool] = None,
+    client: Optional[Client] = None,
+    session: Optional[Session] = None,
+    columnar: bool = False,
+    server: Optional[str] = None,
+    delta: Optional[FingerprintStore] = None,
+    rollups: bool = False,
+    coin_latest: bool = False,
+) -> None:
+    """
+    Extract data from source and ingest into the data model.
+
+    Each page is ingested as soon as it arrives, while the next one is
+    being downloaded.
+
+    Parameters
+    ----------
+        date : str, datetime.date, datetime.datetime
+            The date for which to retrieve the data.
+
+        proxy : dict, NoneType
+            Proxy server. Default `None`.
+
+        bulk : bool
+            Use set-based bulk ingestion. Default `False`.
+
+        cache : IdentityCache, NoneType
+            Identities already stored in the database. Pass the same cache
+            to consecutive calls to avoid repeating existence checks.
+            Default `None`.
+
+        copy : bool, NoneType
+            Load the append-only tables through PostgreSQL's `COPY`. If
+            `None`, read from the `CMC_COPY` environment variable.
+            Default `None`.
+
+        client : Client, NoneType
+            HTTP client to send the requests with. Pass the same client to
+            consecutive calls to reuse its connections. Default `None`.
+
+        session : sqlalchemy.orm.Session, NoneType
+            Database session. If `None`, the default session.
+            Default `None`.
+
+        columnar : bool
+            Convert the pages into columnar snapshots; implies `bulk`.
+            Default `False`.
+
+        server : str, NoneType
+            Server of the listings. If `None`, see `base_url`.
+            Default `None`.
+
+        delta : FingerprintStore, NoneType
+            Fingerprints of the last ingested rows; pass the same store to
+            consecutive calls to skip the unchanged rows. Implies `bulk`.
+            Default `None`.
+
+        rollups : bool
+            Refresh the weekly and monthly rollups of the ingested rows;
+            implies `bulk`. Default `False`.
+
+        coin_latest : bool
+            Keep the `coin_latest` table up to date; implies `bulk`.
+            Default `False`.
+
+    Returns
+    -------
+        NoneType
+
+    Raises
+    ------
+        TypeError
+            * If input parameters of incorrect type.
+
+        ValueError
+            * If `date` is prior to 2013-04-28.
+    """
+    _date = validate_date_input(date)
+
+    complete = True
+    try:
+        for page in extract_pages(_date, proxy, client, server):
+            complete &= ingest_snapshot(
+                _date, page, bulk=bulk, cache=cache, copy=copy,
+                session=session, columnar=columnar, delta=delta,
+                rollups=rollups, coin_latest=coin_latest,
+            ) is not None
+    except requests.RequestException:
+        return  # Already logged
+
+    if complete:
+        msg = f"ingestion for {_date:%Y-%m-%d} is complete."
+        logging.info(msg)
+
+
+del Any, Dict, List, datetime  # Clean up
@@ -0,0 +1,304 @@
+"""
+Latest state of every coin.
+
+The `coin_latest` table holds the newest market stats and quote of each
+coin, one row per quote currency, so that the current price, rank or
+supply of a coin is a primary key lookup, and the largest coins an indexed
+read, instead of a `max(last_updated)` over the whole history.
+
+Ingestion upserts the table in the transaction of each write; a row is
+only replaced by a quote at least as recent, so that backfilling old
+snapshots leaves it alone.
+"""
+
+# Import standard modules
+import logging
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Import third-party modules
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+# Import local modules
+from cmc_data.bulk import RowBatches
+from cmc_data.columnar import MARKET_COLUMNS, QUOTE_COLUMNS
+from cmc_data.data_model import get_session
+from cmc_data.data_model.models import CoinLatest, Market, Quote
+from cmc_data.loaders import upsert
+
+# Orderings of `top_coins`: column and whether the largest values come first
+RANKINGS = {"market_cap": True, "cmc_rank": False}
+
+# Number of coins whose stored market stats are read per query
+CHUNK_SIZE = 1000
+
+
+def _merge(market: dict, quote: dict) -> dict:
+    """Build a `coin_latest` row from a market stats and a quote row."""
+    row = {
+        name: market[name] for name in MARKET_COLUMNS
+        if name != "last_updated"
+    }
+    row["market_updated"] = market["last_updated"]
+    row.update((name, quote[name]) for name in QUOTE_COLUMNS)
+
+    return row
+
+
+def latest_rows(markets: Iterable[dict], quotes: Iterable[dict]) -> List[dict]:
+    """
+    Build the `coin_latest` rows of `market_stats` and `quote` rows.
+
+    Parameters
+    ----------
+        markets : Iterable[dict]
+            Rows of the `market_stats` table.
+
+        quotes : Iterable[dict]
+            Rows of the `quote` table.
+
+    Returns
+    -------
+        List[dict]
+            The newest quote of each coin and currency, with the newest
+            market stats of the coin; quotes of coins without market stats
+            are left out.
+    """
+    newest: Dict[int, dict] = {}
+    for row in markets:
+        stored = newest.get(row["coin_id"])
+        if stored is None or stored["last_updated"] <= row["last_updated"]:
+            newest[row["coin_id"]] = row
+
+    rows: Dict[Tuple[int, str], dict] = {}
+    for row in quotes:
+        key = row["coin_id"], row["currency"]
+        stored = rows.get(key)
+        if row["coin_id"] in newest and (
+            stored is None or stored["last_updated"] <= row["last_updated"]
+        ):
+            rows[key] = row
+
+    return [_merge(newest[coin_id], row) for (coin_id, _), row in rows.items()]
+
+
+def _newest_markets(coin_ids: Optional[Sequence[int]] = None) -> Select:
+    """Select the newest stored market stats of some coins or all of them."""
+    newest = select(
+        Market.coin_id, func.max(Market.last_updated).label("last_updated"),
+    ).group_by(Market.coin_id)
+    if coin_ids is not None:
+        newest = newest.where(Market.coin_id.in_(coin_ids))
+    newest = newest.subquery()
+
+    return select(
+        *(Market.__table__.c[name] for name in MARKET_COLUMNS)
+    ).join(newest, (Market.coin_id == newest.c.coin_id) & (
+        Market.last_updated == newest.c.last_updated
+    ))
+
+
+def update_latest(connection: Connection, batches: RowBatches) -> int:
+    """
+    Upsert the `coin_latest` rows of row batches.
+
+    Quotes of coins without market stats in the batches, e.g. when change
+    detection skipped unchanged market stats, get the newest stored ones.
+
+    Parameters
+    ----------
+        connection : sqlalchemy.engine.Connection
+            Connection on which to execute the statements; the caller owns
+            the transaction.
+
+        batches : RowBatches
+            Rows written in the transaction.
+
+    Returns
+    -------
+        int
+            The number of rows sent, including those older than the stored
+            ones and therefore skipped.
+    """
+    markets, quotes = batches.markets, batches.quotes
+    if batches.snapshot is not None:
+        markets = chain(markets, batches.snapshot.rows(Market.__tablename__))
+        quotes = chain(quotes, batches.snapshot.rows(Quote.__tablename__))
+    markets, quotes = list(markets), list(quotes)
+
+    missing = sorted(
+        {row["coin_id"] for row in quotes}
+        - {row["coin_id"] for row in markets}
+    )
+    for index in range(0, len(missing), CHUNK_SIZE):
+        markets.extend(connection.execute(
+            _newest_markets(missing[index:index + CHUNK_SIZE])
+        ).mappings())
+
+    rows = latest_rows(markets, quotes)
+    upsert(
+        connection, CoinLatest.__table__, rows, ["coin_id", "currency"],
+        newer="last_updated",
+    )
+
+    return len(rows)
+
+
+def rebuild_latest(engine: Engine) -> int:
+    """
+    Rebuild the `coin_latest` table from the whole history.
+
+    Parameters
+    ----------
+        engine : sqlalchemy.engine.Engine
+            The database.
+
+    Returns
+    -------
+        int
+            The number of rows written.
+    """
+    newest_quote = select(
+        Quote.coin_id,
+        Quote.currency,
+        func.max(Quote.last_updated).label("last_updated"),
+    ).group_by(Quote.coin_id, Quote.currency).subquery()
+    quotes = select(
+        *(Quote.__table__.c[name] for name in QUOTE_COLUMNS)
+    ).join(newest_quote, (Quote.coin_id == newest_quote.c.coin_id) & (
+        Quote.currency == newest_quote.c.currency
+    ) & (Quote.last_updated == newest_quote.c.last_updated))
+
+    CoinLatest.__table__.create(engine, checkfirst=True)
+    with engine.begin() as connection:
+        rows = latest_rows(
+            connection.execute(_newest_markets()).mappings(),
+            connection.execute(quotes).mappings(),
+        )
+        connection.execute(CoinLatest.__table__.delete())
+        upsert(connection, CoinLatest.__table__, rows, ["coin_id", "currency"])
+    logging.info("rebuilt %d latest rows", len(rows))
+
+    return len(rows)
+
+
+def latest_quote(
+    coin_id: int, currency: str = "USD", session: Optional[Session] = None,
+) -> Optional[CoinLatest]:
+    """
+    Return the newest market stats and quote of a coin.
+
+    Parameters
+    ----------
+        coin_id : int
+            Identifier of the coin.
+
+        currency : str
+            Quote currency. Default "USD".
+
+        session : sqlalchemy.orm.Session, NoneType
+            Database session. If `None`, the default session.
+            Default `None`.
+
+    Returns
+    -------
+        CoinLatest
+            The latest state of the coin.
+
+        NoneType
+            If the coin was never quoted in `currency`.
+    """
+    if session is None:
+        session = get_session()
+
+    return session.get(CoinLatest, (coin_id, currency))
+
+
+def latest_quotes(
+    coin_ids: Iterable[int],
+    currency: str = "USD",
+    session: Optional[Session] = None,
+) -> Dict[int, CoinLatest]:
+    """
+    Return the newest market stats and quotes of several coins.
+
+    Parameters
+    ----------
+        coin_ids : Iterable[int]
+            Identifiers of the coins.
+
+        currency : str
+            Quote currency. Default "USD".
+
+        session : sqlalchemy.orm.Session, NoneType
+            Database session. If `None`, the default session.
+            Default `None`.
+
+    Returns
+    -------
+        Dict[int, CoinLatest]
+            The latest state of each coin quoted in `currency`, by coin id.
+    """
+    if session is None:
+        session = get_session()
+
+    return {
+        row.coin_id: row
+        for row in session.scalars(select(CoinLatest).where(
+            CoinLatest.coin_id.in_(list(coin_ids)),
+            CoinLatest.currency == currency,
+        ))
+    }
+
+
+def top_coins(
+    limit: int = 10,
+    currency: str = "USD",
+    by: str = "market_cap",
+    session: Optional[Session] = None,
+) -> List[CoinLatest]:
+    """
+    Return the largest coins right now.
+
+    Parameters
+    ----------
+        limit : int
+            Number of coins. Default 10.
+
+        currency : str
+            Quote currency. Default "USD".
+
+        by : str
+            One of `RANKINGS`: the largest market capitalisation, or the
+            best rank. Default "market_cap".
+
+        session : sqlalchemy.orm.Session, NoneType
+            Database session. If `None`, the default session.
+            Default `None`.
+
+    Returns
+    -------
+        List[CoinLatest]
+            The latest state of the coins, best first; coins without a
+            value are left out.
+
+    Raises
+    ------
+        ValueError
+            * If `by` is not one of `RANKINGS`.
+    """
+    if by not in RANKINGS:
+        raise ValueError(f"`by` should be one of {list(RANKINGS)}, got {by!r}")
+    if session is None:
+        session = get_session()
+
+    column = CoinLatest.__table__.c[by]
+    return list(session.scalars(
+        select(CoinLatest)
+        .where(CoinLatest.currency == currency, column.isnot(None))
+        .order_by(column.desc() if RANKINGS[by] else column)
+        .limit(limit)
+    ))
@@ -0,0 +1,381 @@
+"""
+Loaders for the append-only tables.
+
+Stream `market_stats` and `quote` rows into PostgreSQL with
+`COPY ... FROM STDIN`, falling back to batched inserts on other dialects.
+Rows whose natural key is already stored are skipped either way. Columnar
+snapshots are serialised for `COPY` a column at a time.
+"""
+
+# Import standard modules
+import csv
+import datetime
+import io
+from os import getenv
+from typing import TYPE_CHECKING, Any, IO, Iterator, List, Optional, Sequence
+
+# Import third-party modules
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.schema import Table
+
+if TYPE_CHECKING:  # pragma: no cover
+    # Import local modules
+    from cmc_data.columnar import Snapshot
+
+# Number of rows sent per statement by the batched insert fallback
+BATCH_SIZE = 10_000
+
+
+def copy_enabled() -> bool:
+    """
+    Check whether the COPY loader is enabled through the environment.
+
+    Returns
+    -------
+        bool
+            `True` if the `CMC_COPY` environment variable is set to "1",
+            "true" or "yes".
+    """
+    return (getenv("CMC_COPY") or "").lower() in ("1", "true", "yes")
+
+
+def _chunks(rows: Sequence[dict], size: int) -> Iterator[Sequence[dict]]:
+    """Split `rows` into chunks of at most `size` rows."""
+    for index in range(0, len(rows), size):
+        yield rows[index:index + size]
+
+
+def _copy_value(value: Any) -> Any:
+    """Format a value for the CSV format of `COPY`."""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, float):
+        return repr(value)
+    return value
+
+
+def copy_rows(
+    connection: Connection,
+    table: Table,
+    rows: Sequence[dict],
+    index_elements: Optional[Sequence[str]] = None,
+) -> None:
+    """
+    Stream rows into a PostgreSQL table through `COPY ... FROM STDIN`.
+
+    The rows are serialised to an in-memory CSV buffer which is handed to
+    psycopg2's `copy_expert`, on the same transaction as `connection`. With
+    `index_elements`, the rows are copied into a temporary staging table
+    first and moved with `INSERT ... ON CONFLICT DO NOTHING`.
+
+    Parameters
+    ----------
+        connection : sqlalchemy.engine.Connection
+            Connection to a PostgreSQL database using the psycopg2 driver.
+
+        table : sqlalchemy.Table
+            Target table.
+
+        rows : Sequence[dict]
+            Rows to load; all rows must share the same keys.
+
+        index_elements : Sequence[str], NoneType
+            Columns of a unique index of `table`; rows conflicting with
+            stored ones are skipped. Default `None`.
+
+    Returns
+    -------
+        NoneType
+    """
+    if not rows:
+        return
+
+    columns: List[str] = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+
+    _copy_buffer(connection, table, columns, buffer, index_elements)
+
+
+def _copy_buffer(
+    connection: Connection,
+    table: Table,
+    columns: Sequence[str],
+    buffer: IO[str],
+    index_elements: Optional[Sequence[str]] = None,
+) -> None:
+    """Stream a CSV buffer of `columns` into `table`; see `copy_rows`."""
+    preparer = connection.dialect.identifier_preparer
+    target = preparer.format_table(table)
+    column_list = ", ".join(preparer.quote(column) for column in columns)
+    staging = preparer.quote(f"staging_{table.name}") \
+        if index_elements else target
+
+    cursor = connection.connection.cursor()
+    try:
+        if index_elements:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {staging} "
+                f"(LIKE {target} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            cursor.execute(f"TRUNCATE {staging}")
+        cursor.copy_expert(
+            f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        if index_elements:
+            cursor.execute(
+                f"INSERT INTO {target} ({column_list}) "
+                f"SELECT {column_list} FROM {staging} "
+                "ON CONFLICT ({}) DO NOTHING".format(
+                    ", ".join(preparer.quote(name) for name in index_elements)
+                )
+            )
+    finally:
+        cursor.close()
+
+
+def insert_ignore(
+    connection: Connection,
+    table: Table,
+    rows: Sequence[dict],
+    index_elements: Optional[Sequence[str]] = None,
+) -> None:
+    """
+    Insert rows, skipping those which conflict with existing ones.
+
+    PostgreSQL and SQLite use `INSERT ... ON CONFLICT DO NOTHING`; other
+    dialects filter out existing `index_elements` with a single lookup.
+
+    Parameters
+    ----------
+        connection : sqlalchemy.engine.Connection
+            Connection on which to execute the statement.
+
+        table : sqlalchemy.Table
+            Target table.
+
+        rows : Sequence[dict]
+            Rows to insert; all rows must share the same keys.
+
+        index_elements : Sequence[str], NoneType
+            Columns identifying a row. If `None`, any unique conflict is
+            ignored. Default `None`.
+
+    Returns
+    -------
+        NoneType
+    """
+    if not rows:
+        return
+
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        module = postgresql if dialect == "postgresql" else sqlite
+        statement = module.insert(table).on_conflict_do_nothing(
+            index_elements=index_elements,
+        )
+        connection.execute(statement, list(rows))
+        return
+
+    # Generic fallback
+    index_elements = index_elements or [
+        column.name for column in table.primary_key.columns
+    ]
+    columns = [table.c[name] for name in index_elements]
+    keys = {tuple(row[name] for name in index_elements) for row in rows}
+    existing = set(
+        tuple(row) for row in connection.execute(
+            select(*columns).where(tuple_(*columns).in_(list(keys)))
+        )
+    )
+    new_rows = {}
+    for row in rows:
+        key = tuple(row[name] for name in index_elements)
+        if key not in existing:
+            new_rows.setdefault(key, row)
+    if new_rows:
+        connection.execute(table.insert(), list(new_rows.values()))
+
+
+def upsert(
+    connection: Connection,
+    table: Table,
+    rows: Sequence[dict],
+    index_elements: Sequence[str],
+    newer: Optional[str] = None,
+) -> None:
+    """
+    Insert rows, replacing those which conflict with existing ones.
+
+    PostgreSQL and SQLite use `INSERT ... ON CONFLICT DO UPDATE`; other
+    dialects delete the conflicting rows first.
+
+    Parameters
+    ----------
+        connection : sqlalchemy.engine.Connection
+            Connection on which to execute the statements.
+
+        table : sqlalchemy.Table
+            Target table.
+
+        rows : Sequence[dict]
+            Rows to write; all rows must share the same keys, and no two
+            rows the same `index_elements`.
+
+        index_elements : Sequence[str]
+            Columns of a unique index of `table`.
+
+        newer : str, NoneType
+            Column versioning the rows, e.g. a timestamp: stored rows with
+            a greater value are kept. If `None`, conflicting rows are
+            always replaced. Default `None`.
+
+    Returns
+    -------
+        NoneType
+    """
+    if not rows:
+        return
+
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        module = postgresql if dialect == "postgresql" else sqlite
+        statement = module.insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={
+                name: statement.excluded[name]
+                for name in rows[0] if name not in index_elements
+            },
+            where=(
+                table.c[newer] <= statement.excluded[newer]
+                if newer is not None else None
+            ),
+        )
+        for chunk in _chunks(rows, BATCH_SIZE):
+            connection.execute(statement, list(chunk))
+        return
+
+    # Generic fallback
+    columns = [table.c[name] for name in index_elements]
+    for chunk in _chunks(rows, BATCH_SIZE):
+        keys = [tuple(row[name] for name in index_elements) for row in chunk]
+        if newer is not None:
+            stored = {
+                tuple(values[:-1]): values[-1]
+                for values in connection.execute(
+                    select(*columns, table.c[newer])
+                    .where(tuple_(*columns).in_(keys))
+                )
+            }
+            chunk = [
+                row for row, key in zip(chunk, keys)
+                if key not in stored or stored[key] <= row[newer]
+            ]
+            keys = [
+                tuple(row[name] for name in index_elements) for row in chunk
+            ]
+        if not chunk:
+            continue
+        connection.execute(table.delete().where(tuple_(*columns).in_(keys)))
+        connection.execute(table.insert(), list(chunk))
+
+
+def load_rows(
+    connection: Connection,
+    table: Table,
+    rows: Sequence[dict],
+    copy: bool = False,
+    index_elements: Optional[Sequence[str]] = None,
+) -> None:
+    """
+    Append rows to a table.
+
+    Parameters
+    ----------
+        connection : sqlalchemy.engine.Connection
+            Connection on which to load the rows.
+
+        table : sqlalchemy.Table
+            Target table.
+
+        rows : Sequence[dict]
+            Rows to load; all rows must share the same keys.
+
+        copy : bool
+            Use `COPY ... FROM STDIN` if the connection is to PostgreSQL
+            through psycopg2; otherwise insert in batches of `BATCH_SIZE`
+            rows. Default `False`.
+
+        index_elements : Sequence[str], NoneType
+            Columns of a unique index of `table`; rows conflicting with
+            stored ones are skipped. Default `None`.
+
+    Returns
+    -------
+        NoneType
+    """
+    if not rows:
+        return
+
+    if copy and connection.dialect.name == "postgresql" \
+            and connection.dialect.driver == "psycopg2":
+        copy_rows(connection, table, rows, index_elements)
+        return
+
+    for chunk in _chunks(rows, BATCH_SIZE):
+        if index_elements:
+            insert_ignore(connection, table, chunk, index_elements)
+        else:
+            connection.execute(table.insert(), list(chunk))
+
+
+def load_snapshot(
+    connection: Connection,
+    table: Table,
+    snapshot: "Snapshot",
+    copy: bool = False,
+    index_elements: Optional[Sequence[str]] = None,
+) -> None:
+    """
+    Append the rows of a columnar snapshot to a table.
+
+    Parameters
+    ----------
+        connection : sqlalchemy.engine.Connection
+            Connection on which to load the rows.
+
+        table : sqlalchemy.Table
+            Target table, `market_stats` or `quote`.
+
+        snapshot : cmc_data.columnar.Snapshot
+            The columns to load.
+
+        copy, index_elements
+            See `load_rows`.
+
+    Returns
+    -------
+        NoneType
+    """
+    columns = snapshot.columns(table.name)
+    if not len(columns["coin_id"]):
+        return
+
+    if copy and connection.dialect.name == "postgresql" \
+            and connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        snapshot.to_csv(table.name, buffer, header=False)
+        buffer.seek(0)
+        _copy_buffer(connection, table, list(columns), buffer, index_elements)
+        return
+
+    load_rows(
+        connection, table, snapshot.rows(table.name), False, index_elements,
+    )
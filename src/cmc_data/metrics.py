@@ -0,0 +1,431 @@
+"""
+Pipeline metrics.
+
+Counters and histograms of every stage of the ingestion, from the HTTP
+requests to the database writes, kept in a process-wide registry. They are
+exposed in the Prometheus text format, over HTTP or as a file for the node
+exporter's textfile collector, and summarised as JSON at the end of a run.
+"""
+
+# Import standard modules
+import bisect
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, Union
+
+# Upper bounds of the duration histograms, in seconds
+DURATION_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    30.0, 60.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"') \
+        .replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: LabelValues) -> str:
+    """Format label pairs, e.g. '{table="coin"}'."""
+    if not names:
+        return ""
+    return "{" + ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Metric with optional labels."""
+
+    kind = ""
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(
+                f"{self.name} expects the labels {self.labels}, "
+                f"got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def reset(self) -> None:
+        """Forget every observation."""
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter.
+
+    Parameters
+    ----------
+        name : str
+            Name of the metric, e.g. "cmc_pages_total".
+
+        documentation : str
+            Description of the metric.
+
+        labels : Sequence[str]
+            Names of the labels. Default `()`.
+    """
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """Increase the counter of `labels` by `amount`."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Return the counter of `labels`."""
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        """Return the samples of the metric."""
+        with self._lock:
+            return [
+                (self.name, key, value)
+                for key, value in sorted(self._values.items())
+            ]
+
+    def summary(self) -> Dict[str, float]:
+        """Return the counter of each label set."""
+        with self._lock:
+            return {
+                _format_labels(self.labels, key): value
+                for key, value in sorted(self._values.items())
+            }
+
+
+class Histogram(_Metric):
+    """
+    Histogram of observations.
+
+    Parameters
+    ----------
+        name : str
+            Name of the metric, e.g. "cmc_write_seconds".
+
+        documentation : str
+            Description of the metric.
+
+        labels : Sequence[str]
+            Names of the labels. Default `()`.
+
+        buckets : Sequence[float]
+            Upper bounds of the buckets. Default `DURATION_BUCKETS`.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record an observation of `labels`."""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {
+                    "buckets": [0] * len(self.buckets),
+                    "count": 0,
+                    "sum": 0.0,
+                    "max": value,
+                }
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state["buckets"][index] += 1
+            state["count"] += 1
+            state["sum"] += value
+            state["max"] = max(state["max"], value)
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of a block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        """Return the number of observations of `labels`."""
+        key = self._key(labels)
+        with self._lock:
+            return self._values[key]["count"] if key in self._values else 0
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        """Return the samples of the metric, with cumulative buckets."""
+        samples = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state["buckets"]):
+                    cumulative += count
+                    samples.append(
+                        (f"{self.name}_bucket", key + (bound,), cumulative)
+                    )
+                samples.append(
+                    (f"{self.name}_bucket", key + (math.inf,), state["count"])
+                )
+                samples.append((f"{self.name}_sum", key, state["sum"]))
+                samples.append((f"{self.name}_count", key, state["count"]))
+        return samples
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return the count, sum, mean and maximum of each label set."""
+        with self._lock:
+            return {
+                _format_labels(self.labels, key): {
+                    "count": state["count"],
+                    "sum": state["sum"],
+                    "mean": state["sum"] / state["count"],
+                    "max": state["max"],
+                }
+                for key, state in sorted(self._values.items())
+            }
+
+
+class Registry:
+    """Collection of metrics exposed together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"duplicate metric {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labels: Sequence[str] = (),
+    ) -> Counter:
+        """Create and register a counter."""
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def reset(self) -> None:
+        """Forget every observation of every metric."""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns
+        -------
+            str
+                The exposition, version 0.0.4.
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                names = metric.labels
+                if name.endswith("_bucket"):
+                    names += ("le",)
+                    key = key[:-1] + (_format_value(key[-1]),)
+                lines.append(
+                    f"{name}{_format_labels(names, key)} "
+                    f"{_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarise the metrics observed so far.
+
+        Returns
+        -------
+            Dict[str, Any]
+                The value of each counter, and the count, sum, mean and
+                maximum of each histogram, by metric and label set; metrics
+                without observations are left out.
+        """
+        summary = {}
+        for metric in list(self._metrics.values()):
+            values = metric.summary()
+            if values:
+                summary[metric.name] = values if metric.labels else values[""]
+
+        return summary
+
+    def write(self, path: Union[str, Path]) -> None:
+        """
+        Write the exposition to a file, atomically.
+
+        Parameters
+        ----------
+            path : str, pathlib.Path
+                The file, e.g. in the directory of the node exporter's
+                textfile collector.
+
+        Returns
+        -------
+            NoneType
+        """
+        path = Path(path)
+        handle, temporary = tempfile.mkstemp(
+            dir=path.parent, prefix=f".{path.name}.",
+        )
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as file:
+                file.write(self.render())
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def serve(
+        self, port: int, host: str = "0.0.0.0",
+    ) -> ThreadingHTTPServer:
+        """
+        Serve the exposition over HTTP in a background thread.
+
+        Parameters
+        ----------
+            port : int
+                Port to listen on; 0 picks a free port.
+
+            host : str
+                Address to listen on. Default "0.0.0.0".
+
+        Returns
+        -------
+            http.server.ThreadingHTTPServer
+                The server; call its `shutdown` method to stop it.
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type", "text/plain; version=0.0.4; charset=utf-8",
+                )
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(
+            target=server.serve_forever, name="cmc-metrics", daemon=True,
+        ).start()
+
+        return server
+
+
+# Registry of the pipeline metrics
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "cmc_http_request_seconds",
+    "Duration of the HTTP requests, by status code or 'error'.",
+    ["status"],
+)
+HTTP_RESPONSE_BYTES = REGISTRY.counter(
+    "cmc_http_response_bytes_total", "Bytes of the HTTP response bodies.",
+)
+HTTP_RETRIES = REGISTRY.counter(
+    "cmc_http_retries_total", "HTTP requests sent again after a failure.",
+)
+RATELIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    "cmc_ratelimit_wait_seconds",
+    "Time spent waiting for the rate limiter before a request.",
+    buckets=(0.0, 0.01, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0),
+)
+PAGES = REGISTRY.counter("cmc_pages_total", "Listing pages extracted.")
+DECODE_SECONDS = REGISTRY.histogram(
+    "cmc_decode_seconds",
+    "Time spent parsing responses ('json') and validating listings "
+    "('records').",
+    ["step"],
+)
+TRANSFORM_SECONDS = REGISTRY.histogram(
+    "cmc_transform_seconds",
+    "Time spent converting validated listings into row batches.",
+)
+WRITE_SECONDS = REGISTRY.histogram(
+    "cmc_write_seconds", "Time spent writing a page to the database.",
+)
+ROWS_WRITTEN = REGISTRY.counter(
+    "cmc_rows_written_total", "Rows sent to the database.", ["table"],
+)
+ROWS_SUPPRESSED = REGISTRY.counter(
+    "cmc_rows_suppressed_total",
+    "Rows identical to the last ingested ones, not sent in delta mode.",
+    ["table"],
+)
+REJECTED_ENTRIES = REGISTRY.counter(
+    "cmc_rejected_entries_total",
+    "Entries which failed validation or failed to be written.",
+)
+
+
+def serve(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve the pipeline metrics; see `Registry.serve`."""
+    return REGISTRY.serve(port, host)
+
+
+def summary() -> Dict[str, Any]:
+    """Summarise the pipeline metrics; see `Registry.summary`."""
+    return REGISTRY.summary()
+
+
+def write(path: Union[str, Path]) -> None:
+    """Write the pipeline metrics to a file; see `Registry.write`."""
+    REGISTRY.write(path)
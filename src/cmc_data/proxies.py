@@ -0,0 +1,421 @@
+"""
+Proxy server pool.
+
+Candidates come from a pluggable source, are health-checked concurrently and
+the healthy ones are cached for a while, optionally in a file shared by
+successive runs. Proxies are scored by the latency and error rate observed
+on real requests, and a circuit breaker takes the failing ones out of
+rotation until they cool down.
+"""
+
+# Import standard modules
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+# Import third-party modules
+import requests
+
+# Import local modules
+from cmc_data.helpers import PROXY_LIST_URL, get_proxies
+
+# Default URL of the health checks
+CHECK_URL = "https://web-api.coinmarketcap.com"
+
+
+def proxy_url(address: str) -> str:
+    """
+    Normalise a proxy server address into a URL.
+
+    Parameters
+    ----------
+        address : str
+            Either "host:port" or a URL such as "http://host:port".
+
+    Returns
+    -------
+        str
+            The URL of the proxy server.
+    """
+    address = address.strip()
+
+    return address if "://" in address else f"http://{address}"
+
+
+def sslproxies_source(
+    client: Optional[object] = None, url: str = PROXY_LIST_URL,
+) -> Callable:
+    """
+    Build a source scraping https://www.sslproxies.org.
+
+    Parameters
+    ----------
+        client : cmc_data.client.Client, NoneType
+            HTTP client to send the request with. Default `None`.
+
+        url : str
+            URL of the page listing the proxy servers. Default
+            `PROXY_LIST_URL`.
+
+    Returns
+    -------
+        Callable[[], List[str]]
+            Return the URLs of the listed proxy servers.
+    """
+    def source() -> List[str]:
+        return [
+            proxy_url(f"{row['IP Address']}:{row['Port']}")
+            for row in get_proxies(client, url) or []
+        ]
+
+    return source
+
+
+def file_source(path: Union[str, Path]) -> Callable:
+    """
+    Build a source reading a static file.
+
+    Parameters
+    ----------
+        path : str, pathlib.Path
+            Text file with one "host:port" or proxy URL per line; blank
+            lines and lines starting with "#" are ignored.
+
+    Returns
+    -------
+        Callable[[], List[str]]
+            Return the URLs of the listed proxy servers.
+    """
+    def source() -> List[str]:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+        return [
+            proxy_url(line) for line in lines
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+    return source
+
+
+class Proxy:
+    """
+    Observed health of a proxy server.
+
+    Parameters
+    ----------
+        url : str
+            URL of the proxy server.
+
+        latency : float
+            Initial latency estimate in seconds, e.g. of the health check.
+    """
+
+    __slots__ = ("url", "latency", "error_rate", "failures", "opened_at")
+
+    def __init__(self, url: str, latency: float) -> None:
+        self.url = url
+        self.latency = latency
+        self.error_rate = 0.0
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def score(self) -> float:
+        """Expected cost of a request; the lower the better."""
+        return self.latency * (1 + 4 * self.error_rate)
+
+    def as_dict(self) -> Dict[str, str]:
+        """Return the `proxies` parameter of `requests` for this proxy."""
+        return {"http": self.url, "https": self.url}
+
+
+class ProxyPool:
+    """
+    Health-checked pool of proxy servers.
+
+    Parameters
+    ----------
+        source : Callable[[], List[str]]
+            Return the URLs of the candidate proxy servers, e.g.
+            `sslproxies_source()` or `file_source(path)`.
+
+        check : Callable[[str], float], NoneType
+            Health check of a proxy server URL, returning its latency in
+            seconds or raising on failure. If `None`, a GET request to
+            `check_url` is sent through the proxy. Default `None`.
+
+        check_url : str
+            URL of the default health check. Default `CHECK_URL`.
+
+        check_timeout : float
+            Timeout in seconds of the default health check. Default 5.
+
+        max_checks : int
+            Maximum number of concurrent health checks. Default 32.
+
+        ttl : float
+            Number of seconds for which the healthy proxies are cached.
+            Default 900.
+
+        cache_file : str, pathlib.Path, NoneType
+            JSON file where to cache the healthy proxies across runs.
+            Default `None`.
+
+        failure_threshold : int
+            Number of consecutive failures which open the circuit of a
+            proxy. Default 3.
+
+        cooldown : float
+            Number of seconds an open circuit stays open before a single
+            trial request is allowed through. Default 300.
+
+        smoothing : float
+            Weight of the latest observation in the moving averages of the
+            latency and error rate. Default 0.3.
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], List[str]],
+        check: Optional[Callable[[str], float]] = None,
+        check_url: str = CHECK_URL,
+        check_timeout: float = 5.0,
+        max_checks: int = 32,
+        ttl: float = 900.0,
+        cache_file: Optional[Union[str, Path]] = None,
+        failure_threshold: int = 3,
+        cooldown: float = 300.0,
+        smoothing: float = 0.3,
+    ) -> None:
+        self.source = source
+        self.check = check or self._check
+        self.check_url = check_url
+        self.check_timeout = check_timeout
+        self.max_checks = max_checks
+        self.ttl = ttl
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+
+        self.refreshed_at: Optional[float] = None
+        self._proxies: Dict[str, Proxy] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._session = requests.Session()
+
+    def __len__(self) -> int:
+        return len(self._proxies)
+
+    def _check(self, url: str) -> float:
+        """Send a request through a proxy and return its latency."""
+        started = time.monotonic()
+        response = self._session.get(
+            self.check_url,
+            proxies={"http": url, "https": url},
+            timeout=self.check_timeout,
+        )
+        if response.status_code >= 500 or response.status_code in {403, 407}:
+            raise requests.HTTPError(f"proxy check returned {response}")
+
+        return time.monotonic() - started
+
+    def _probe(self, url: str) -> Optional[float]:
+        try:
+            return self.check(url)
+        except Exception:
+            logging.debug("proxy %s failed its health check", url)
+            return None
+
+    def _load(self) -> Optional[Dict[str, float]]:
+        """Read the healthy proxies from the cache file if still fresh."""
+        if self.cache_file is None:
+            return None
+        try:
+            content = json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if time.time() - content.get("refreshed_at", 0) > self.ttl:
+            return None
+
+        return content.get("proxies")
+
+    def _save(self, latencies: Dict[str, float]) -> None:
+        """Write the healthy proxies to the cache file atomically."""
+        if self.cache_file is None:
+            return
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(
+            {"refreshed_at": time.time(), "proxies": latencies},
+        )
+        file_descriptor, temporary = tempfile.mkstemp(
+            dir=self.cache_file.parent,
+        )
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+                file.write(payload)
+            os.replace(temporary, self.cache_file)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Health-check the candidates, unless the cached ones are fresh.
+
+        Parameters
+        ----------
+            force : bool
+                Ignore the cached proxies. Default `False`.
+
+        Returns
+        -------
+            int
+                Number of healthy proxies.
+        """
+        # One refresh at a time, without holding the lock of the pool during
+        # the health checks, which would block `choose` and `record`
+        with self._refresh_lock:
+            if not force and self.refreshed_at is not None \
+                    and time.monotonic() - self.refreshed_at < self.ttl:
+                return len(self._proxies)
+
+            latencies = None if force else self._load()
+            if latencies is None:
+                candidates = list(dict.fromkeys(self.source()))
+                workers = max(1, min(self.max_checks, len(candidates)))
+                with ThreadPoolExecutor(workers, "cmc-proxy-check") as pool:
+                    results = pool.map(self._probe, candidates)
+                latencies = {
+                    url: latency
+                    for url, latency in zip(candidates, results)
+                    if latency is not None
+                }
+                logging.info(
+                    "%d of %d proxies passed their health check",
+                    len(latencies), len(candidates),
+                )
+                self._save(latencies)
+
+            with self._lock:
+                self._proxies = {
+                    url: self._proxies.get(url) or Proxy(url, latency)
+                    for url, latency in latencies.items()
+                }
+                self.refreshed_at = time.monotonic()
+
+                return len(self._proxies)
+
+    def choose(self) -> Optional[Dict[str, str]]:
+        """
+        Choose a proxy server for a request.
+
+        Of two proxies drawn at random among those in rotation, the one
+        with the better score is chosen, which favours fast and reliable
+        proxies while still spreading the load. Blocks while the proxies
+        are health-checked, once their TTL expired; call it off the event
+        loop of asynchronous callers.
+
+        Returns
+        -------
+            Dict[str, str]
+                The `proxies` parameter of `requests`.
+
+            NoneType
+                If no proxy server is available.
+        """
+        self.refresh()
+        with self._lock:
+            now = time.monotonic()
+            candidates = [
+                proxy for proxy in self._proxies.values()
+                if proxy.opened_at is None
+                or now - proxy.opened_at >= self.cooldown
+            ]
+            if not candidates:
+                return None
+            chosen = min(
+                random.sample(candidates, min(2, len(candidates))),
+                key=lambda proxy: proxy.score,
+            )
+            if chosen.opened_at is not None:
+                # Half-open: one trial request, the circuit re-arms meanwhile
+                chosen.opened_at = now
+
+            return chosen.as_dict()
+
+    def record(
+        self, url: str, latency: Optional[float] = None, error: bool = False,
+    ) -> None:
+        """
+        Record the outcome of a request sent through a proxy.
+
+        Parameters
+        ----------
+            url : str
+                URL of the proxy server.
+
+            latency : float, NoneType
+                Duration of the request in seconds. Default `None`.
+
+            error : bool
+                Whether the request failed. Default `False`.
+
+        Returns
+        -------
+            NoneType
+        """
+        with self._lock:
+            proxy = self._proxies.get(url)
+            if proxy is None:
+                return
+
+            alpha = self.smoothing
+            proxy.error_rate += alpha * (float(error) - proxy.error_rate)
+            if latency is not None:
+                proxy.latency += alpha * (latency - proxy.latency)
+
+            if not error:
+                proxy.failures = 0
+                proxy.opened_at = None
+                return
+
+            proxy.failures += 1
+            if proxy.failures >= self.failure_threshold:
+                if proxy.opened_at is None:
+                    logging.info("taking proxy %s out of rotation", url)
+                proxy.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        """
+        Return the state of the pool.
+
+        Returns
+        -------
+            dict
+                Number of proxies in the pool and in rotation, and the
+                latency and error rate of each.
+        """
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "proxies": len(self._proxies),
+                "open": sum(
+                    proxy.opened_at is not None
+                    and now - proxy.opened_at < self.cooldown
+                    for proxy in self._proxies.values()
+                ),
+                "scores": {
+                    url: {
+                        "latency": round(proxy.latency, 3),
+                        "error_rate": round(proxy.error_rate, 3),
+                    }
+                    for url, proxy in self._proxies.items()
+                },
+            }
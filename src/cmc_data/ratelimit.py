@@ -0,0 +1,234 @@
+"""
+Adaptive rate limiting.
+
+Token buckets keyed by host and by proxy server, shared by every request of
+a run. The rate of a bucket grows additively with successful requests and
+shrinks multiplicatively on "429 Too Many Requests" responses.
+"""
+
+# Import standard modules
+import threading
+from time import monotonic, sleep
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """
+    Token bucket which hands out reservations.
+
+    Tokens may go negative, which queues the reservations of concurrent
+    callers one after the other. Blocking a bucket puts it in debt of the
+    tokens of the block, so that the reservations made meanwhile are queued
+    after the block rather than all handed out when it ends.
+
+    Parameters
+    ----------
+        rate : float
+            Number of tokens added per second.
+
+        capacity : float
+            Maximum number of tokens, i.e. the allowed burst.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = max(self.updated, now)
+
+    def reserve(self, now: float) -> float:
+        """
+        Take a token.
+
+        Parameters
+        ----------
+            now : float
+                Current `time.monotonic` value.
+
+        Returns
+        -------
+            float
+                Number of seconds to wait before using the token.
+        """
+        self._refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        return wait
+
+    def block(self, now: float, seconds: float) -> None:
+        """
+        Hand out no token for a while.
+
+        Parameters
+        ----------
+            now : float
+                Current `time.monotonic` value.
+
+            seconds : float
+                Duration of the block.
+
+        Returns
+        -------
+            NoneType
+        """
+        self._refill(now)
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class RateLimiter:
+    """
+    Adaptive rate limiter shared across dates, workers and proxies.
+
+    Parameters
+    ----------
+        rate : float
+            Initial number of requests per second per bucket. Default 0.5,
+            i.e. one request every two seconds.
+
+        min_rate : float
+            Lower bound of the adapted rate. Default 0.05.
+
+        max_rate : float
+            Upper bound of the adapted rate. Default 5.
+
+        burst : float
+            Capacity of each bucket. Default 1.
+
+        increase : float
+            Rate added after each successful request. Default 0.05.
+
+        decrease : float
+            Factor applied to the rate after each throttled request.
+            Default 0.5.
+    """
+
+    def __init__(
+        self,
+        rate: float = 0.5,
+        min_rate: float = 0.05,
+        max_rate: float = 5.0,
+        burst: float = 1.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+    ) -> None:
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.throttled = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def acquire(self, *keys: str) -> float:
+        """
+        Wait until a request may be sent.
+
+        Parameters
+        ----------
+            *keys : str
+                Buckets the request counts against, e.g. the host and the
+                proxy server.
+
+        Returns
+        -------
+            float
+                Number of seconds waited.
+        """
+        with self._lock:
+            now = monotonic()
+            wait = max(
+                [self._bucket(key).reserve(now) for key in keys], default=0.0,
+            )
+            if wait > 0:
+                self.waits += 1
+                self.wait_seconds += wait
+
+        if wait > 0:
+            sleep(wait)
+
+        return wait
+
+    def succeed(self, *keys: str) -> None:
+        """
+        Raise the rate of buckets after a successful request.
+
+        Parameters
+        ----------
+            *keys : str
+                Buckets the request counted against.
+
+        Returns
+        -------
+            NoneType
+        """
+        with self._lock:
+            for key in keys:
+                bucket = self._bucket(key)
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def throttle(self, key: str, retry_after: Optional[float] = None) -> None:
+        """
+        Lower the rate of a bucket after a "429 Too Many Requests" response.
+
+        Parameters
+        ----------
+            key : str
+                Bucket which was throttled, i.e. the most specific one.
+
+            retry_after : float, NoneType
+                Number of seconds the server asked to wait before the next
+                request. Default `None`.
+
+        Returns
+        -------
+            NoneType
+        """
+        with self._lock:
+            now = monotonic()
+            bucket = self._bucket(key)
+            bucket._refill(now)
+            bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            if retry_after:
+                bucket.block(now, retry_after)
+            self.throttled += 1
+
+    def stats(self) -> dict:
+        """
+        Return the counters of the limiter.
+
+        Returns
+        -------
+            dict
+                Number of waits, seconds waited, number of throttled
+                requests and the current rate of each bucket.
+        """
+        with self._lock:
+            return {
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "throttled": self.throttled,
+                "rates": {
+                    key: round(bucket.rate, 3)
+                    for key, bucket in self._buckets.items()
+                },
+            }
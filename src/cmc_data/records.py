@@ -0,0 +1,251 @@
+"""
+Typed decoding of listing pages.
+
+Responses are parsed with `orjson` when installed, falling back to the
+standard `json` module, and each entry is validated into compact immutable
+records in a single pass. Entries which fail validation are set aside before
+any database work starts.
+"""
+
+# Import standard modules
+import datetime
+import json
+import logging
+from typing import Any, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+# Import local modules
+from cmc_data.helpers import parse_timestamp
+from cmc_data.metrics import DECODE_SECONDS
+
+try:
+    # Import third-party modules
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def loads(content: Union[bytes, str]) -> Any:
+    """
+    Parse a JSON document.
+
+    Parameters
+    ----------
+        content : bytes, str
+            The JSON document.
+
+    Returns
+    -------
+        Any
+            The decoded document.
+
+    Raises
+    ------
+        ValueError
+            * If `content` is not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+
+    return json.loads(content)
+
+
+class QuoteRecord(NamedTuple):
+    """Price of a listing in one currency."""
+
+    currency: str
+    price: float
+    volume_24h: Optional[float]
+    percent_change_1h: Optional[float]
+    percent_change_24h: Optional[float]
+    percent_change_7d: Optional[float]
+    market_cap: Optional[float]
+    fully_diluted_market_cap: Optional[float]
+    last_updated: datetime.datetime
+
+
+class PlatformRecord(NamedTuple):
+    """Blockchain a token is issued on."""
+
+    id: int
+    name: str
+    symbol: str
+    slug: str
+    token_address: str
+
+
+class Listing(NamedTuple):
+    """Single entry of a listing page."""
+
+    id: int
+    name: str
+    symbol: str
+    slug: str
+    date_added: Optional[datetime.datetime]
+    max_supply: Optional[float]
+    num_market_pairs: Optional[int]
+    circulating_supply: Optional[float]
+    total_supply: Optional[float]
+    cmc_rank: Optional[int]
+    last_updated: datetime.datetime
+    tags: Tuple[str, ...]
+    platform: Optional[PlatformRecord]
+    quotes: Tuple[QuoteRecord, ...]
+
+
+class DecodedPage(NamedTuple):
+    """Listings of a page which passed validation, and those which did not."""
+
+    listings: List[Listing]
+    rejected: List[Any]
+
+
+def _integer(value: Any, field: str, nullable: bool = True) -> Optional[int]:
+    if value is None and nullable:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"`{field}` should be an integer, got {value!r}")
+    return value
+
+
+def _number(value: Any, field: str, nullable: bool = True) -> Optional[float]:
+    if value is None and nullable:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"`{field}` should be a number, got {value!r}")
+    return value
+
+
+def _string(value: Any, field: str) -> str:
+    if not isinstance(value, str):
+        raise TypeError(f"`{field}` should be a string, got {value!r}")
+    return value
+
+
+def _timestamp(
+    value: Any, field: str, nullable: bool = True,
+) -> Optional[datetime.datetime]:
+    if value is None and not nullable:
+        raise ValueError(f"missing `{field}`")
+    if value is not None and not isinstance(value, str):
+        raise TypeError(f"`{field}` should be a timestamp, got {value!r}")
+    return parse_timestamp(value)
+
+
+def _quote(currency: str, value: dict) -> QuoteRecord:
+    return QuoteRecord(
+        currency=_string(currency, "quote"),
+        price=_number(value.get("price"), f"{currency} price", False),
+        volume_24h=_number(value.get("volume_24h"), "volume_24h"),
+        percent_change_1h=_number(
+            value.get("percent_change_1h"), "percent_change_1h",
+        ),
+        percent_change_24h=_number(
+            value.get("percent_change_24h"), "percent_change_24h",
+        ),
+        percent_change_7d=_number(
+            value.get("percent_change_7d"), "percent_change_7d",
+        ),
+        market_cap=_number(value.get("market_cap"), "market_cap"),
+        fully_diluted_market_cap=_number(
+            value.get("fully_diluted_market_cap"), "fully_diluted_market_cap",
+        ),
+        last_updated=_timestamp(
+            value.get("last_updated"), f"{currency} last_updated", False,
+        ),
+    )
+
+
+def decode_listing(entry: dict) -> Listing:
+    """
+    Validate a single listing entry into a record.
+
+    Parameters
+    ----------
+        entry : dict
+            Single listing from the "coinmarketcap" server.
+
+    Returns
+    -------
+        Listing
+            The validated record.
+
+    Raises
+    ------
+        AttributeError, KeyError, TypeError, ValueError
+            * If the entry is malformed.
+    """
+    platform = entry.get("platform")
+    if platform:
+        platform = PlatformRecord(
+            id=_integer(platform["id"], "platform id", False),
+            name=_string(platform["name"], "platform name"),
+            symbol=_string(platform["symbol"], "platform symbol"),
+            slug=_string(platform["slug"], "platform slug"),
+            token_address=_string(
+                platform["token_address"], "token_address",
+            ),
+        )
+
+    return Listing(
+        id=_integer(entry["id"], "id", False),
+        name=_string(entry["name"], "name"),
+        symbol=_string(entry["symbol"], "symbol"),
+        slug=_string(entry["slug"], "slug"),
+        date_added=_timestamp(entry["date_added"], "date_added"),
+        max_supply=_number(entry["max_supply"], "max_supply"),
+        num_market_pairs=_integer(
+            entry["num_market_pairs"], "num_market_pairs",
+        ),
+        circulating_supply=_number(
+            entry["circulating_supply"], "circulating_supply",
+        ),
+        total_supply=_number(entry["total_supply"], "total_supply"),
+        cmc_rank=_integer(entry["cmc_rank"], "cmc_rank"),
+        last_updated=_timestamp(
+            entry["last_updated"], "last_updated", False,
+        ),
+        tags=tuple(
+            _string(tag, "tags") for tag in entry.get("tags") or ()
+        ),
+        platform=platform or None,
+        quotes=tuple(
+            _quote(currency, value)
+            for currency, value in (entry.get("quote") or {}).items()
+        ),
+    )
+
+
+def decode_listings(data: Iterable[Any]) -> DecodedPage:
+    """
+    Validate a page of listings in one pass.
+
+    Parameters
+    ----------
+        data : Iterable[Any]
+            Listing entries from the "coinmarketcap" server; entries which
+            are already `Listing` records are passed through.
+
+    Returns
+    -------
+        DecodedPage
+            The valid listings, and the entries which failed validation.
+    """
+    with DECODE_SECONDS.time(step="records"):
+        return _decode_listings(data)
+
+
+def _decode_listings(data: Iterable[Any]) -> DecodedPage:
+    page = DecodedPage([], [])
+    for entry in data:
+        if isinstance(entry, Listing):
+            page.listings.append(entry)
+            continue
+        try:
+            page.listings.append(decode_listing(entry))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            logging.warning(
+                "entry failed validation: %s", entry, exc_info=True,
+            )
+            page.rejected.append(entry)
+
+    return page
@@ -0,0 +1,320 @@
+"""
+Local stand-in for the CoinMarketCap listings endpoint.
+
+`StubServer` serves `/v1/cryptocurrency/listings/historical` with the same
+`start`/`limit` pagination as the real endpoint and synthetic listings
+shaped like `data.json`, plus a fake proxy list page shaped like
+https://www.sslproxies.org. Latency, error and throttling rates and the
+maximum page size are configurable, so that the ingestion can be
+load-tested offline with `--base-url` and `--proxy-list-url`.
+
+The server also acts as a plain HTTP forward proxy for itself, so that the
+proxy servers it lists may be used.
+"""
+
+# Import standard modules
+import datetime
+import json
+import logging
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+# Import local modules
+from cmc_data.ingest import LISTINGS_ENDPOINT
+from cmc_data.synthetic import synthetic_listings
+
+# Path of the fake proxy list
+PROXY_LIST_PATH = "/proxies"
+
+
+def _closed_ports(count: int, host: str) -> List[int]:
+    """Find ports on which nothing listens, for dead proxy servers."""
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.socket()
+            sock.bind((host, 0))
+            sockets.append(sock)
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handle the requests of a `StubServer`."""
+
+    protocol_version = "HTTP/1.1"
+    server: "_HTTPServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug("stub server: " + format, *args)
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str = "application/json",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, **headers: str) -> None:
+        self._send(
+            status,
+            json.dumps({
+                "status": {"error_code": status, "error_message": message},
+            }).encode(),
+            headers=headers,
+        )
+
+    def do_GET(self) -> None:  # noqa: N802
+        stub = self.server.stub
+        # Requests sent through the server as a proxy carry a full URL
+        url = urlsplit(self.path)
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        if url.path == PROXY_LIST_PATH:
+            stub.count("proxies", 200)
+            self._send(200, stub.proxy_list_page(), "text/html")
+            return
+        if url.path.rstrip("/") in ("", "/v1"):
+            # Health checks of the proxy servers
+            stub.count("root", 200)
+            self._send(200, b"{}")
+            return
+        if url.path != LISTINGS_ENDPOINT:
+            stub.count("other", 404)
+            self._error(404, f"no such endpoint: {url.path}")
+            return
+
+        outcome = stub.draw()
+        if outcome == 429:
+            stub.count("listings", 429)
+            self._error(
+                429, "rate limit exceeded",
+                **{"Retry-After": str(stub.retry_after)},
+            )
+            return
+        if outcome == 500:
+            stub.count("listings", 500)
+            self._error(500, "internal server error")
+            return
+
+        query = {
+            name: values[-1] for name, values in parse_qs(url.query).items()
+        }
+        try:
+            date = datetime.date.fromisoformat(query["date"][:10])
+            start = int(query.get("start", 1))
+            limit = int(query.get("limit", 100))
+            if start < 1 or limit < 1:
+                raise ValueError("`start` and `limit` should be positive")
+        except (KeyError, ValueError) as error:
+            stub.count("listings", 400)
+            self._error(400, f"invalid parameters: {error!r}")
+            return
+
+        stub.count("listings", 200)
+        self._send(200, stub.listings_page(date, start, limit))
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "StubServer"
+
+
+class StubServer:
+    """
+    Local HTTP server standing in for CoinMarketCap and sslproxies.org.
+
+    Parameters
+    ----------
+        host : str
+            Address to listen on. Default "127.0.0.1".
+
+        port : int
+            Port to listen on; 0 picks a free port. Default 0.
+
+        coins : int
+            Number of listed coins per date. Default 5000.
+
+        seed : int
+            Seed of the synthetic listings and of the failures.
+            Default 0.
+
+        latency : float
+            Delay in seconds before every response. Default 0.
+
+        error_rate : float
+            Share of the listing requests answered with
+            "500 Internal Server Error". Default 0.
+
+        throttle_rate : float
+            Share of the listing requests answered with "429 Too Many
+            Requests". Default 0.
+
+        retry_after : int
+            Seconds in the `Retry-After` header of throttled responses.
+            Default 1.
+
+        page_size : int, NoneType
+            Maximum number of listings per page, whatever the requested
+            `limit`. If `None`, the `limit` is honoured. Default `None`.
+
+        dead_proxies : int
+            Number of unreachable proxy servers listed besides the server
+            itself. Default 0.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        coins: int = 5000,
+        seed: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+        page_size: Optional[int] = None,
+        dead_proxies: int = 0,
+    ) -> None:
+        self.coins = coins
+        self.seed = seed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.page_size = page_size
+
+        self._httpd = _HTTPServer((host, port), _Handler)
+        self._httpd.stub = self
+        self._thread: Optional[threading.Thread] = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests: Counter = Counter()
+        self._dead_ports = _closed_ports(dead_proxies, host)
+        self._listings = lru_cache(maxsize=8)(self._serialised_listings)
+
+    @property
+    def address(self) -> str:
+        """"host:port" the server listens on."""
+        host, port = self._httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server, e.g. for `--base-url`."""
+        return f"http://{self.address}"
+
+    @property
+    def proxy_list_url(self) -> str:
+        """URL of the fake proxy list, e.g. for `--proxy-list-url`."""
+        return self.url + PROXY_LIST_PATH
+
+    def draw(self) -> int:
+        """Draw the status of the next listing response."""
+        with self._lock:
+            value = self._random.random()
+        if value < self.throttle_rate:
+            return 429
+        if value < self.throttle_rate + self.error_rate:
+            return 500
+        return 200
+
+    def count(self, endpoint: str, status: int) -> None:
+        """Count a response."""
+        with self._lock:
+            self._requests[f"{endpoint} {status}"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of responses per endpoint and status."""
+        with self._lock:
+            return dict(self._requests)
+
+    def _serialised_listings(self, date: datetime.date) -> List[bytes]:
+        """Serialise every listing of a date once."""
+        return [
+            json.dumps(entry).encode()
+            for entry in synthetic_listings(self.coins, date, self.seed)
+        ]
+
+    def listings_page(
+        self, date: datetime.date, start: int, limit: int,
+    ) -> bytes:
+        """Return the body of a page of listings."""
+        if self.page_size is not None:
+            limit = min(limit, self.page_size)
+        entries = self._listings(date)[start - 1:start - 1 + limit]
+        status = json.dumps({
+            "timestamp": datetime.datetime.now(
+                datetime.timezone.utc
+            ).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z",
+            "error_code": 0,
+            "error_message": None,
+            "elapsed": 0,
+            "credit_count": 0,
+        }).encode()
+
+        return b'{"status":' + status + b',"data":[' \
+            + b",".join(entries) + b"]}"
+
+    def proxy_list_page(self) -> bytes:
+        """Return the body of the fake proxy list."""
+        host = self._httpd.server_address[0]
+        proxies = [self.address] + [
+            f"{host}:{port}" for port in self._dead_ports
+        ]
+        rows = "".join(
+            "<tr><td>{}</td><td>{}</td><td>XX</td><td>Localhost</td>"
+            "<td>elite proxy</td><td>no</td><td>no</td>"
+            "<td>1 sec ago</td></tr>".format(*proxy.rsplit(":", 1))
+            for proxy in proxies
+        )
+        return (
+            "<html><body><table><thead><tr><th>IP Address</th><th>Port</th>"
+            "<th>Code</th><th>Country</th><th>Anonymity</th><th>Google</th>"
+            "<th>Https</th><th>Last Checked</th></tr></thead>"
+            f"<tbody>{rows}</tbody></table></body></html>"
+        ).encode()
+
+    def start(self) -> "StubServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="cmc-stub", daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until interrupted."""
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
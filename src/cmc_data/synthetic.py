@@ -0,0 +1,185 @@
+"""
+Deterministic synthetic listings.
+
+Generate listing pages shaped like the responses of the "coinmarketcap"
+historical listings endpoint (see `data.json`) for any number of coins and
+dates. The same seed always yields the same pages, so that benchmarks and
+tests of different commits work on identical data.
+"""
+
+# Import standard modules
+import datetime
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+# Tags drawn for the synthetic coins
+TAGS = (
+    "mineable", "pow", "sha-256", "scrypt", "store-of-value", "payments",
+    "defi", "stablecoin", "smart-contracts", "collectibles-nfts", "dao",
+    "privacy", "medium-of-exchange", "governance", "yield-farming",
+)
+
+# Quote currencies of every listing, as requested by `extract_pages`
+CURRENCIES = ("BTC", "USD")
+
+# Share of the coins issued as tokens on the platform of another coin
+PLATFORM_SHARE = 0.3
+
+# Share of the nullable fields left null
+NULL_SHARE = 0.05
+
+# Number of coins which tokens may be issued on
+PLATFORMS = 10
+
+
+def _timestamp(value: datetime.datetime) -> str:
+    """Format a timestamp like the API does."""
+    return value.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _identities(coins: int, seed: int) -> List[Dict[str, Any]]:
+    """Generate the attributes of the coins which do not change daily."""
+    rng = random.Random(f"{seed}:identities")
+    identities = []
+    for coin_id in range(1, coins + 1):
+        identities.append({
+            "id": coin_id,
+            "name": f"Synthetic {coin_id}",
+            "symbol": f"S{coin_id:X}",
+            "slug": f"synthetic-{coin_id}",
+            "date_added": datetime.datetime(2013, 4, 28)
+            + datetime.timedelta(days=rng.randrange(3000)),
+            "tags": sorted(rng.sample(TAGS, rng.randrange(4))),
+            "max_supply": rng.choice((None, 10 ** rng.randrange(6, 12))),
+            "supply": rng.uniform(1e5, 1e11),
+            "price": 10 ** rng.uniform(-6, 4),
+            "platform": None,
+        })
+
+    for identity in identities[PLATFORMS:]:
+        if rng.random() < PLATFORM_SHARE:
+            platform = identities[rng.randrange(min(PLATFORMS, coins))]
+            identity["platform"] = {
+                "id": platform["id"],
+                "name": platform["name"],
+                "symbol": platform["symbol"],
+                "slug": platform["slug"],
+                "token_address": "0x%040x" % rng.getrandbits(160),
+            }
+
+    return identities
+
+
+def _nullable(rng: random.Random, value: Any) -> Any:
+    """Return `value`, or `None` with probability `NULL_SHARE`."""
+    return None if rng.random() < NULL_SHARE else value
+
+
+def synthetic_listings(
+    coins: int, date: datetime.date, seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Generate the listings of a snapshot date.
+
+    Parameters
+    ----------
+        coins : int
+            Number of listed coins.
+
+        date : datetime.date
+            The snapshot date.
+
+        seed : int
+            Seed of the generator. Default 0.
+
+    Returns
+    -------
+        List[Dict[str, Any]]
+            JSON-like listings ranked by market cap, as in the "data" of
+            the API response.
+    """
+    return next(synthetic_snapshots(coins, [date], seed))[1]
+
+
+def synthetic_snapshots(
+    coins: int, dates: Iterable[datetime.date], seed: int = 0,
+) -> Iterator[Tuple[datetime.date, List[Dict[str, Any]]]]:
+    """
+    Generate the listings of many snapshot dates.
+
+    The coins keep their identity, tags and platform across dates while
+    their prices and supplies drift.
+
+    Parameters
+    ----------
+        coins : int
+            Number of listed coins.
+
+        dates : Iterable[datetime.date]
+            The snapshot dates.
+
+        seed : int
+            Seed of the generator. Default 0.
+
+    Returns
+    -------
+        Iterator[Tuple[datetime.date, List[Dict[str, Any]]]]
+            The listings of each date.
+    """
+    identities = _identities(coins, seed)
+    for date in dates:
+        rng = random.Random(f"{seed}:{date:%Y-%m-%d}")
+        updated = datetime.datetime.combine(date, datetime.time(23, 55))
+        btc_price = identities[0]["price"] if identities else 1.0
+        entries = []
+        for identity in identities:
+            drift = (date.toordinal() % 365) / 365
+            price = identity["price"] * (1 + drift) * rng.uniform(0.9, 1.1)
+            supply = identity["supply"] * (1 + drift / 10)
+            last_updated = _timestamp(
+                updated + datetime.timedelta(seconds=rng.randrange(300))
+            )
+            quote = {}
+            for currency in CURRENCIES:
+                rate = 1 / btc_price if currency == "BTC" else 1.0
+                max_supply = identity["max_supply"]
+                quote[currency] = {
+                    "price": price * rate,
+                    "volume_24h": _nullable(
+                        rng, price * rate * supply * rng.random(),
+                    ),
+                    "percent_change_1h": _nullable(rng, rng.gauss(0, 1)),
+                    "percent_change_24h": _nullable(rng, rng.gauss(0, 5)),
+                    "percent_change_7d": _nullable(rng, rng.gauss(0, 10)),
+                    "market_cap": _nullable(rng, price * rate * supply),
+                    "fully_diluted_market_cap": price * rate * max_supply
+                    if max_supply else None,
+                    "last_updated": last_updated,
+                }
+            entries.append({
+                "id": identity["id"],
+                "name": identity["name"],
+                "symbol": identity["symbol"],
+                "slug": identity["slug"],
+                "num_market_pairs": _nullable(rng, rng.randrange(1, 20_000)),
+                "date_added": _timestamp(identity["date_added"]),
+                "tags": list(identity["tags"]),
+                "max_supply": identity["max_supply"],
+                "circulating_supply": supply,
+                "total_supply": _nullable(rng, supply * rng.uniform(1, 2)),
+                "platform": dict(identity["platform"])
+                if identity["platform"] else None,
+                "cmc_rank": None,
+                "last_updated": last_updated,
+                "quote": quote,
+            })
+
+        entries.sort(
+            key=lambda entry: entry["quote"]["USD"]["price"]
+            * entry["circulating_supply"],
+            reverse=True,
+        )
+        for rank, entry in enumerate(entries, 1):
+            entry["cmc_rank"] = rank
+
+        yield date, entries
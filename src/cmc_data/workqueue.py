@@ -0,0 +1,388 @@
+"""
+Work queue of snapshot dates shared by backfill workers.
+
+The `ingestion_job` table doubles as a queue: dates are enqueued as pending
+jobs, and each worker claims a few of them at a time with
+`SELECT ... FOR UPDATE SKIP LOCKED`, so that workers running in different
+containers never fetch the same date. A claim is a lease: the worker renews
+it with heartbeats while it ingests the dates, and the dates of a worker
+which died are claimed again once its lease expires.
+
+Leases are stamped with the clock of the workers, which should not drift
+apart by more than a fraction of the lease.
+"""
+
+# Import standard modules
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+# Import third-party modules
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data.backfill import backfill
+from cmc_data.checkpoint import COMPLETE, FAILED, PENDING, RUNNING
+from cmc_data.data_model.models import IngestionJob
+from cmc_data.loaders import insert_ignore
+
+
+def _now() -> datetime.datetime:
+    """Return the current time in UTC, without time zone."""
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def worker_name() -> str:
+    """Return a name identifying this process, e.g. "cmc-1:42"."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(session: Session, dates: Iterable[datetime.date]) -> int:
+    """
+    Add snapshot dates to the queue.
+
+    Dates which already have a job, whatever its status, are left alone,
+    so that every worker may enqueue the same range.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session.
+
+        dates : Iterable[datetime.date]
+            The snapshot dates.
+
+    Returns
+    -------
+        int
+            The number of pending dates in the queue.
+    """
+    insert_ignore(
+        session.connection(),
+        IngestionJob.__table__,
+        [
+            {"snapshot_date": date, "status": PENDING, "attempts": 0}
+            for date in sorted(set(dates))
+        ],
+        ["snapshot_date"],
+    )
+    session.commit()
+
+    return session.scalar(
+        select(func.count())
+        .select_from(IngestionJob)
+        .where(IngestionJob.status == PENDING)
+    )
+
+
+def _retry_delay(retry_backoff: float, attempts: int) -> datetime.timedelta:
+    """Delay between the end of the last attempt of a job and its retry."""
+    return datetime.timedelta(seconds=retry_backoff * 2 ** (attempts - 1))
+
+
+def _claimable(
+    now: datetime.datetime, max_attempts: int, retry_backoff: float = 0.0,
+) -> Any:
+    """Condition of the jobs which may be claimed."""
+    return or_(
+        IngestionJob.status == PENDING,
+        # Failed, and backed off since the end of the last attempt
+        and_(
+            IngestionJob.status == FAILED,
+            or_(IngestionJob.finished_at.is_(None), *(
+                and_(
+                    IngestionJob.attempts == attempts,
+                    IngestionJob.finished_at
+                    <= now - _retry_delay(retry_backoff, attempts),
+                )
+                for attempts in range(1, max_attempts)
+            )),
+            IngestionJob.attempts < max_attempts,
+        ),
+        # Abandoned by a worker which stopped renewing its lease
+        and_(
+            IngestionJob.status == RUNNING,
+            IngestionJob.lease_expires < now,
+        ),
+    )
+
+
+def claim(
+    session: Session,
+    worker: str,
+    limit: int = 1,
+    lease: float = 600.0,
+    max_attempts: int = 3,
+    retry_backoff: float = 0.0,
+) -> List[datetime.date]:
+    """
+    Claim the earliest snapshot dates of the queue.
+
+    Locked rows are skipped, so that concurrent workers claim different
+    dates without waiting for each other. Each claim is also guarded by
+    its own conditional update, which keeps the claims exclusive on
+    databases without row locks, such as SQLite.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session.
+
+        worker : str
+            Name of the worker, e.g. `worker_name()`.
+
+        limit : int
+            Maximum number of dates to claim. Default 1.
+
+        lease : float
+            Seconds before the claim expires unless renewed. Default 600.
+
+        max_attempts : int
+            Failed dates are claimed again until they were attempted this
+            many times. Default 3.
+
+        retry_backoff : float
+            Seconds after the end of its first attempt before a failed date
+            is claimed again, doubled for every subsequent attempt.
+            Default 0.
+
+    Returns
+    -------
+        List[datetime.date]
+            The claimed dates, oldest first; empty if the queue is drained.
+    """
+    now = _now()
+    claimable = _claimable(now, max_attempts, retry_backoff)
+    dates = session.execute(
+        select(IngestionJob.snapshot_date)
+        .where(claimable)
+        .order_by(IngestionJob.snapshot_date)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    claimed = []
+    for date in dates:
+        result = session.execute(
+            update(IngestionJob)
+            .where(IngestionJob.snapshot_date == date, claimable)
+            .values(
+                status=RUNNING,
+                claimed_by=worker,
+                lease_expires=now + datetime.timedelta(seconds=lease),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            claimed.append(date)
+    session.commit()
+
+    return claimed
+
+
+def _next_retry(
+    session: Session, max_attempts: int, retry_backoff: float,
+) -> Optional[float]:
+    """Return the seconds until a failed date may be retried, if any."""
+    retries = [
+        finished_at + _retry_delay(retry_backoff, attempts)
+        for attempts, finished_at in session.execute(
+            select(IngestionJob.attempts, IngestionJob.finished_at).where(
+                IngestionJob.status == FAILED,
+                IngestionJob.attempts < max_attempts,
+                IngestionJob.finished_at.isnot(None),
+            )
+        )
+    ]
+    session.commit()
+    if not retries:
+        return None
+
+    return max((min(retries) - _now()).total_seconds(), 0.0)
+
+
+def heartbeat(session: Session, worker: str, lease: float = 600.0) -> int:
+    """
+    Renew the leases of the running jobs of a worker.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session, not shared with another thread.
+
+        worker : str
+            Name of the worker.
+
+        lease : float
+            Seconds before the renewed claims expire. Default 600.
+
+    Returns
+    -------
+        int
+            The number of leases renewed.
+    """
+    result = session.execute(
+        update(IngestionJob)
+        .where(
+            IngestionJob.claimed_by == worker,
+            IngestionJob.status == RUNNING,
+        )
+        .values(
+            lease_expires=_now() + datetime.timedelta(seconds=lease),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+
+    return result.rowcount
+
+
+class Heartbeat:
+    """
+    Renew the leases of a worker in a background thread.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session used by the thread only.
+
+        worker : str
+            Name of the worker.
+
+        lease : float
+            Seconds before the claims expire; they are renewed three times
+            per lease. Default 600.
+    """
+
+    def __init__(
+        self, session: Session, worker: str, lease: float = 600.0,
+    ) -> None:
+        self.session = session
+        self.worker = worker
+        self.lease = lease
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="cmc-heartbeat", daemon=True,
+        )
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.lease / 3):
+            try:
+                heartbeat(self.session, self.worker, self.lease)
+            except Exception:
+                # The next beat may succeed before the lease expires
+                logging.warning("heartbeat failed", exc_info=True)
+                self.session.rollback()
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.session.close()
+
+
+async def run_worker(
+    session: Session,
+    worker: Optional[str] = None,
+    batch: int = 4,
+    lease: float = 600.0,
+    max_attempts: int = 3,
+    retry_backoff: float = 60.0,
+    **backfill_options: Any,
+) -> Dict[str, int]:
+    """
+    Claim and backfill snapshot dates until the queue is drained.
+
+    Failed dates are retried once backed off; while the only dates left
+    are backing off, the worker waits for them.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session, also used to record the jobs.
+
+        worker : str, NoneType
+            Name of the worker. If `None`, `worker_name()`. Default `None`.
+
+        batch : int
+            Number of dates claimed at once. Default 4.
+
+        lease : float
+            Seconds before a claim expires unless renewed. Default 600.
+
+        max_attempts : int
+            See `claim`. Default 3.
+
+        retry_backoff : float
+            See `claim`. Default 60.
+
+        **backfill_options : Any
+            Keyword arguments of `cmc_data.backfill.backfill`, except
+            `checkpoint`, `attempts` and `retry_backoff`: each claim is a
+            single attempt, and a failed date goes back to the queue, to be
+            claimed again until `max_attempts`, so that no other worker
+            claims it while it is being retried.
+
+    Returns
+    -------
+        Dict[str, int]
+            The number of dates claimed, and the sums of the backfill
+            summaries.
+    """
+    worker = worker or worker_name()
+    summary: Dict[str, int] = {"claimed": 0}
+    with Heartbeat(Session(session.get_bind()), worker, lease):
+        while True:
+            dates = claim(
+                session, worker, batch, lease, max_attempts, retry_backoff,
+            )
+            if not dates:
+                wait = _next_retry(session, max_attempts, retry_backoff)
+                if wait is None:
+                    break
+                await asyncio.sleep(wait)
+                continue
+            logging.info("%s claimed %s", worker, [str(d) for d in dates])
+            summary["claimed"] += len(dates)
+            counts = await backfill(
+                dates, checkpoint=session, session=session, attempts=1,
+                **backfill_options,
+            )
+            for name, count in counts.items():
+                summary[name] = summary.get(name, 0) + count
+
+    logging.info("worker %s summary: %s", worker, summary)
+
+    return summary
+
+
+def queue_stats(session: Session) -> Dict[str, int]:
+    """
+    Count the jobs of the queue by status.
+
+    Parameters
+    ----------
+        session : sqlalchemy.orm.Session
+            Database session.
+
+    Returns
+    -------
+        Dict[str, int]
+            The number of dates which are pending, running, complete and
+            failed.
+    """
+    stats = dict.fromkeys((PENDING, RUNNING, COMPLETE, FAILED), 0)
+    stats.update(session.execute(
+        select(IngestionJob.status, func.count())
+        .group_by(IngestionJob.status)
+    ).all())
+
+    return stats
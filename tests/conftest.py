@@ -0,0 +1,83 @@
+"""Shared fixtures."""
+
+# Import standard modules
+import json
+from pathlib import Path
+
+# Import third-party modules
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import create_engine
+from sqlalchemy.pool import StaticPool
+
+# Import local modules
+from cmc_data.data_model import Base
+
+DATA = json.loads(
+    (Path(__file__).parent.parent / "data.json").read_text(encoding="utf-8")
+)
+DATA.append({
+    "id": 825,
+    "name": "Tether",
+    "symbol": "USDT",
+    "slug": "tether",
+    "num_market_pairs": 18771,
+    "date_added": "2015-02-25T00:00:00.000Z",
+    "tags": ["payments", "stablecoin"],
+    "max_supply": None,
+    "circulating_supply": 69043109914.2716,
+    "total_supply": 71382497034.74619,
+    "platform": {
+        "id": 1027,
+        "name": "Ethereum",
+        "symbol": "ETH",
+        "slug": "ethereum",
+        "token_address": "0xdac17f958d2ee523a2206206994597c13d831ec7",
+    },
+    "cmc_rank": 5,
+    "last_updated": "2021-10-20T23:00:00.000Z",
+    "quote": {
+        "USD": {
+            "price": 0.999940347223595,
+            "volume_24h": 70187915899.85,
+            "percent_change_1h": 0.016157808294,
+            "percent_change_24h": -0.017622106384,
+            "percent_change_7d": -0.015634486349,
+            "market_cap": 69038991301.0736,
+            "last_updated": "2021-10-20T23:00:00.000Z",
+        },
+    },
+})
+
+
+@pytest.fixture
+def listings():
+    """A page of listings, including a token on a platform."""
+    return json.loads(json.dumps(DATA))
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite database with the data model."""
+    # A single connection, shared with the writer threads
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    """The SQL statements executed on `engine`, recorded as they run."""
+    executed = []
+
+    def record(connection, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
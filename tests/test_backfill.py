@@ -0,0 +1,111 @@
+"""Test the concurrent backfill engine."""
+
+# Import standard modules
+import asyncio
+import datetime
+import threading
+import time
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from cmc_data import backfill as backfill_module
+from cmc_data.backfill import backfill, date_range
+from cmc_data.bulk import RowBatches, build_batches
+
+
+def test_date_range():
+    dates = list(
+        date_range(datetime.date(2013, 4, 28), datetime.date(2013, 5, 13))
+    )
+
+    assert dates == [
+        datetime.date(2013, 4, 28),
+        datetime.date(2013, 5, 5),
+        datetime.date(2013, 5, 12),
+    ]
+    with pytest.raises(ValueError):
+        next(date_range(dates[0], dates[-1], 0))
+
+
+def test_backfill_overlaps_fetches_with_single_writer(monkeypatch):
+    writers = set()
+
+    def extract_pages(date, proxy, client, server):
+        time.sleep(0.05)
+        if date.day == 5:
+            raise ConnectionError
+        yield [{"date": date}]
+        yield [{"date": date}]
+
+    def ingest_snapshot(date, data, **options):
+        writers.add(threading.current_thread().name)
+        return {"entries": len(data), "rejected": 0}
+
+    monkeypatch.setattr(backfill_module, "extract_pages", extract_pages)
+    monkeypatch.setattr(backfill_module, "ingest_snapshot", ingest_snapshot)
+    dates = list(
+        date_range(datetime.date(2013, 4, 28), datetime.date(2013, 8, 1))
+    )
+
+    started = time.perf_counter()
+    summary = asyncio.run(
+        backfill(dates, workers=len(dates), attempts=1, bulk=True)
+    )
+
+    assert time.perf_counter() - started < 0.05 * len(dates) / 2
+    assert summary == {
+        "skipped": 0,
+        "retried": 0,
+        "fetch_failed": 1,
+        "ingest_failed": 0,
+        "ingested": len(dates) - 1,
+    }
+    assert len(writers) == 1
+
+
+def test_proxies_are_chosen_off_the_event_loop(monkeypatch):
+    choosers = []
+
+    def choose_proxy():
+        choosers.append(threading.current_thread())
+        return None
+
+    def extract_pages(date, proxy, client, server):
+        yield [{"date": date}]
+
+    def ingest_snapshot(date, data, **options):
+        return {"entries": len(data), "rejected": 0}
+
+    monkeypatch.setattr(backfill_module, "extract_pages", extract_pages)
+    monkeypatch.setattr(backfill_module, "ingest_snapshot", ingest_snapshot)
+
+    asyncio.run(backfill(
+        [datetime.date(2021, 1, 3)], choose_proxy=choose_proxy,
+    ))
+
+    assert choosers and threading.main_thread() not in choosers
+
+
+def test_backfill_converts_pages_on_processes(monkeypatch, listings):
+    written = []
+
+    def extract_pages(date, proxy, client, server):
+        yield listings
+
+    def ingest_snapshot(date, data, **options):
+        written.append(data)
+        return {"entries": len(data.markets), "rejected": 0}
+
+    monkeypatch.setattr(backfill_module, "extract_pages", extract_pages)
+    monkeypatch.setattr(backfill_module, "ingest_snapshot", ingest_snapshot)
+
+    summary = asyncio.run(backfill(
+        [datetime.date(2021, 1, 3)], processes=2, chunk_size=2,
+    ))
+
+    assert summary["ingested"] == 1
+    assert len(written) == 1
+    assert isinstance(written[0], RowBatches)
+    assert written[0] == build_batches(listings)
@@ -0,0 +1,81 @@
+"""Test the set-based bulk ingestion."""
+
+# Import standard modules
+import datetime
+
+# Import third-party modules
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data.bulk import (
+    build_batches, merge_batches, split_page, write_batches,
+)
+from cmc_data.data_model.models import (
+    Coin, Market, Platform, Quote, Tag, TagReference,
+)
+from cmc_data.ingest import ingest_snapshot
+
+
+def count(connection, model) -> int:
+    """Count the rows of a table."""
+    return connection.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_build_batches_groups_rows_by_table(listings):
+    batches = build_batches(listings)
+
+    assert not batches.rejected
+    assert len(batches.markets) == len(listings)
+    assert 1027 in batches.coins  # Platform coin stub
+    assert batches.platforms[825]["token_address"].startswith(b"0x")
+    assert "stablecoin" in batches.tag_names
+
+
+def test_build_batches_rejects_malformed_entries(listings):
+    malformed = [{"id": 99, "name": "Broken"}, listings[0]]
+
+    batches = build_batches(malformed)
+
+    assert batches.rejected == [malformed[0]]
+    assert list(batches.coins) == [1]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+def test_merged_chunks_match_whole_page(listings, chunk_size):
+    malformed = [{"id": 99, "name": "Broken"}, *listings]
+
+    merged = merge_batches(
+        build_batches(chunk) for chunk in split_page(malformed, chunk_size)
+    )
+
+    assert merged == build_batches(malformed)
+    with pytest.raises(ValueError):
+        split_page(malformed, 0)
+
+
+def test_write_batches(engine, listings):
+    with engine.begin() as connection:
+        counts = write_batches(connection, build_batches(listings))
+        # Every table is upserted on the second pass
+        write_batches(connection, build_batches(listings))
+
+        assert counts["market_stats"] == len(listings)
+        assert count(connection, Coin) == len(listings) + 1
+        assert count(connection, Platform) == 1
+        assert count(connection, TagReference) == counts["tag_ref"]
+        assert count(connection, Tag) == counts["tag"]
+        assert count(connection, Market) == len(listings)
+        assert count(connection, Quote) == counts["quote"]
+
+
+def test_ingest_snapshot_writes_prebuilt_batches(engine, listings):
+    batches = build_batches([{"id": 99, "name": "Broken"}, *listings])
+
+    with Session(engine) as session:
+        counts = ingest_snapshot(
+            datetime.date(2021, 1, 3), batches, copy=False, session=session,
+        )
+        assert counts == {"entries": len(listings), "rejected": 1}
+        assert count(session.connection(), Market) == len(listings)
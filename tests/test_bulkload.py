@@ -0,0 +1,139 @@
+"""Test the deferred indexes and foreign keys of bulk loads."""
+
+# Import standard modules
+import datetime
+
+# Import third-party modules
+import pytest
+from click.testing import CliRunner
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data import data_model
+from cmc_data.__main__ import cli
+from cmc_data.data_model import create_db_engine
+from cmc_data.data_model import __main__ as data_model_cli
+from cmc_data.data_model import bulkload
+from cmc_data.data_model.bulkload import (
+    BULK_LOAD_TABLES, bulk_load, secondary_indexes,
+)
+from cmc_data.data_model.models import Market, Quote
+from cmc_data.ingest import ingest_data
+
+SECONDARY = {
+    index.name
+    for table in BULK_LOAD_TABLES
+    for index in secondary_indexes(table)
+}
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'cmc.sqlite'}")
+    data_model.Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def indexes(engine):
+    inspector = inspect(engine)
+    return {
+        index["name"]
+        for table in BULK_LOAD_TABLES
+        for index in inspector.get_indexes(table.name)
+    }
+
+
+def foreign_keys(engine):
+    with engine.connect() as connection:
+        return connection.execute(text("PRAGMA foreign_keys")).scalar()
+
+
+def test_secondary_indexes_keep_natural_keys():
+    assert SECONDARY == {
+        "ix_market_stats_last_updated",
+        "ix_quote_coin_id_last_updated",
+        "ix_quote_last_updated",
+        "ix_tag_tag_id",
+    }
+
+
+def test_indexes_are_rebuilt_from_the_model(monkeypatch):
+    statements = []
+    monkeypatch.setattr(
+        bulkload, "_execute",
+        lambda engine, statement: statements.append(statement),
+    )
+
+    index, = (
+        index for index in Quote.__table__.indexes
+        if index.name == "ix_quote_last_updated"
+    )
+    bulkload._create_index(None, index)
+
+    assert "USING brin" in str(
+        statements[0].compile(dialect=postgresql.dialect())
+    )
+
+
+def test_bulk_load_defers_and_restores_schema(sqlite_engine, listings):
+    with bulk_load(sqlite_engine, workers=2) as dropped:
+        assert set(dropped) == SECONDARY
+        assert not indexes(sqlite_engine) & SECONDARY
+        assert foreign_keys(sqlite_engine) == 0
+        with Session(sqlite_engine) as session:
+            ingest_data(listings, bulk=True, session=session)
+
+    assert indexes(sqlite_engine) >= SECONDARY
+    assert foreign_keys(sqlite_engine) == 1
+    with sqlite_engine.connect() as connection:
+        assert connection.execute(
+            select(func.count()).select_from(Market)
+        ).scalar() == len(listings)
+        # Statistics of the planner
+        assert connection.execute(
+            text("SELECT count(*) FROM sqlite_stat1")
+        ).scalar() > 0
+
+
+def test_schema_is_restored_after_failure(sqlite_engine):
+    with pytest.raises(RuntimeError):
+        with bulk_load(sqlite_engine):
+            raise RuntimeError("interrupted")
+
+    assert indexes(sqlite_engine) >= SECONDARY
+    assert foreign_keys(sqlite_engine) == 1
+
+
+def test_orphans_fail_validation(sqlite_engine):
+    with pytest.raises(ValueError, match="violate its foreign keys"):
+        with bulk_load(sqlite_engine):
+            with sqlite_engine.begin() as connection:
+                connection.execute(Quote.__table__.insert(), {
+                    "coin_id": 404, "currency": "USD", "price": 1.0,
+                    "last_updated": datetime.datetime(2021, 1, 1),
+                })
+
+    assert indexes(sqlite_engine) >= SECONDARY
+
+
+def test_restore_schema_command(sqlite_engine, monkeypatch):
+    with sqlite_engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_quote_last_updated"))
+    monkeypatch.setattr(data_model_cli, "get_engine", lambda: sqlite_engine)
+
+    result = CliRunner().invoke(data_model_cli.cli, ["restore-schema"])
+
+    assert result.exit_code == 0, result.output
+    assert result.output == "Restored ix_quote_last_updated.\n"
+    assert indexes(sqlite_engine) >= SECONDARY
+
+
+def test_workers_cannot_bulk_load():
+    # Workers would restore the schema while the others still load
+    result = CliRunner().invoke(cli, ["worker", "--bulk-load"])
+
+    assert result.exit_code == 2
+    assert "--bulk-load" in result.output
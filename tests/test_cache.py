@@ -0,0 +1,76 @@
+"""Test the on-disk response cache."""
+
+# Import standard modules
+import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from cmc_data.cache import CacheMiss, ResponseCache
+from cmc_data.client import Client
+
+URL = "https://web-api.coinmarketcap.com/v1/cryptocurrency/listings/historical"
+
+
+def test_key_normalizes_parameters():
+    params = {"date": datetime.date(2013, 4, 28), "start": 1, "limit": None}
+
+    assert ResponseCache.key(URL, params) == ResponseCache.key(
+        URL + "?ignored", {"start": "1", "date": "2013-04-28"},
+    )
+    assert ResponseCache.key(URL, params) != \
+        ResponseCache.key(URL, {**params, "start": 5001})
+
+
+def test_round_trip(tmp_path):
+    cache = ResponseCache(tmp_path)
+
+    assert cache.get(URL, {"start": 1}) is None
+    cache.put(URL, {"start": 1}, b'{"data": []}')
+
+    assert cache.get(URL, {"start": 1}) == b'{"data": []}'
+    assert cache.size == sum(
+        path.stat().st_size for path in tmp_path.glob("*/*.gz")
+    )
+
+
+def test_counters_are_shared_by_threads(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put(URL, {"start": 1}, b'{"data": []}')
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(
+            lambda start: cache.get(URL, {"start": start % 2}), range(400),
+        ))
+
+    assert (cache.hits, cache.misses) == (200, 200)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    content = os.urandom(1024)  # Incompressible
+    cache = ResponseCache(tmp_path, max_bytes=2 * 1024 + 200)
+    for start in range(2):
+        cache.put(URL, {"start": start}, content)
+        os.utime(cache._path(cache.key(URL, {"start": start})), (start, start))
+
+    cache.get(URL, {"start": 0})
+    cache.put(URL, {"start": 2}, content)
+
+    assert cache.get(URL, {"start": 0}) == content
+    assert cache.get(URL, {"start": 1}) is None
+    assert cache.get(URL, {"start": 2}) == content
+    assert cache.size <= cache.max_bytes
+
+
+def test_replay_never_touches_the_network(tmp_path):
+    cache = ResponseCache(tmp_path, offline=True)
+    cache.put(URL, {"start": 1}, b'{"data": [1]}')
+    client = Client(cache=cache)
+    client.session = None  # Any request would fail
+
+    assert client.get_json(URL, params={"start": 1}) == {"data": [1]}
+    with pytest.raises(CacheMiss):
+        client.get_json(URL, params={"start": 5001})
@@ -0,0 +1,115 @@
+"""Test the ingestion checkpoints and the resumable backfill."""
+
+# Import standard modules
+import asyncio
+import datetime
+
+# Import third-party modules
+import pytest
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data import backfill as backfill_module
+from cmc_data import checkpoint
+from cmc_data.backfill import backfill, date_range
+from cmc_data.checkpoint import (
+    COMPLETE, FAILED, completed_dates, finish_job, missing_dates,
+    missing_pairs, start_job,
+)
+from cmc_data.data_model.models import Coin, IngestionJob, Market
+
+DATES = list(date_range(datetime.date(2021, 1, 3), datetime.date(2021, 2, 1)))
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def test_jobs_record_attempts_and_outcome(session):
+    start_job(session, DATES[0])
+    finish_job(session, DATES[0], FAILED, error="boom")
+    start_job(session, DATES[0])
+    finish_job(session, DATES[0], COMPLETE, pages=2, entries=9, rejected=1)
+
+    job = session.get(IngestionJob, DATES[0])
+    assert (job.status, job.attempts, job.entries, job.error) == (
+        COMPLETE, 2, 9, None,
+    )
+    assert job.duration >= 0
+    assert completed_dates(session, DATES) == {DATES[0]}
+
+
+def test_backfill_resumes_and_retries(monkeypatch, session):
+    calls = []
+
+    def extract_pages(date, proxy, client, server):
+        calls.append(date)
+        if calls.count(date) == 1 and date == DATES[2]:
+            raise ConnectionError
+        yield [{"date": date}] * 3
+
+    def ingest_snapshot(date, data, **options):
+        return {"entries": len(data) - 1, "rejected": 1}
+
+    monkeypatch.setattr(backfill_module, "extract_pages", extract_pages)
+    monkeypatch.setattr(backfill_module, "ingest_snapshot", ingest_snapshot)
+    start_job(session, DATES[0])
+    finish_job(session, DATES[0], COMPLETE)
+
+    summary = asyncio.run(
+        backfill(DATES, checkpoint=session, retry_backoff=0)
+    )
+
+    assert summary == {
+        "skipped": 1,
+        "retried": 1,
+        "fetch_failed": 0,
+        "ingest_failed": 0,
+        "ingested": len(DATES) - 1,
+    }
+    assert DATES[0] not in calls
+    assert completed_dates(session, DATES) == set(DATES)
+    job = session.get(IngestionJob, DATES[2])
+    assert (job.attempts, job.pages, job.entries, job.rejected) == (2, 1, 2, 1)
+
+    # Nothing left to do after a restart
+    calls.clear()
+    summary = asyncio.run(backfill(DATES, checkpoint=session))
+    assert summary["skipped"] == len(DATES) and not calls
+
+
+@pytest.mark.parametrize("chunk_size", [100, 2])
+def test_missing_dates_and_pairs(session, monkeypatch, chunk_size):
+    monkeypatch.setattr(checkpoint, "PROBE_CHUNK_SIZE", chunk_size)
+    session.add_all([
+        Coin(id=1, name="bitcoin", symbol="btc", slug="bitcoin"),
+        Coin(
+            id=2, name="late", symbol="lt", slug="late",
+            date_added=datetime.datetime(2021, 1, 15),
+        ),
+    ])
+    session.add_all([
+        Market(coin_id=1, last_updated=datetime.datetime(2021, 1, 3, 23, 59)),
+        Market(coin_id=2, last_updated=datetime.datetime(2021, 1, 17, 12)),
+        Market(coin_id=1, last_updated=datetime.datetime(2021, 1, 24)),
+    ])
+    session.commit()
+
+    assert missing_dates(session, DATES) == [DATES[1], DATES[4]]
+    assert missing_pairs(session, DATES, [1, 2]) == [
+        (1, DATES[1]), (1, DATES[2]), (1, DATES[4]),
+        (2, DATES[3]), (2, DATES[4]),
+    ]
+    assert missing_dates(session, []) == []
+
+
+def test_gaps_are_probed_on_the_index(session, statements):
+    missing_dates(session, DATES)
+    missing_pairs(session, DATES, [1])
+
+    assert len(statements) == 3
+    # The `last_updated` column is compared as is, not wrapped in DATE()
+    assert not [sql for sql in statements if "date(" in sql.lower()]
+    assert sum("EXISTS" in sql for sql in statements) == 2
@@ -0,0 +1,94 @@
+"""Test the pooled HTTP client."""
+
+# Import standard modules
+from types import SimpleNamespace
+
+# Import third-party modules
+import pytest
+import requests
+
+# Import local modules
+from cmc_data import client as client_module
+from cmc_data.client import Client, retry_after_seconds
+from cmc_data.ratelimit import RateLimiter
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Record the backoff delays instead of sleeping."""
+    recorded = []
+    monkeypatch.setattr(client_module, "sleep", recorded.append)
+    return recorded
+
+
+def respond(client, *outcomes):
+    """Make the client session return or raise `outcomes` in turn."""
+    outcomes = list(outcomes)
+
+    def get(url, **kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(
+            status_code=outcome[0], headers=outcome[1], content=b"",
+        )
+
+    client.session.get = get
+
+
+def unlimited() -> RateLimiter:
+    """Rate limiter which never waits."""
+    return RateLimiter(rate=1e9, max_rate=1e9, min_rate=1e9)
+
+
+def test_retries_transient_failures_with_backoff(delays):
+    client = Client(backoff=1, jitter=0, limiter=unlimited())
+    respond(
+        client,
+        requests.ConnectionError(),
+        (503, {"Retry-After": "30"}),
+        (500, {}),
+        (200, {}),
+    )
+
+    assert client.get("url").status_code == 200
+    assert delays == [1, 30, 4]
+
+
+def test_throttled_requests_slow_the_limiter_down(delays, monkeypatch):
+    limiter = RateLimiter(rate=1, burst=1)
+    client = Client(jitter=0, limiter=limiter)
+    respond(client, (429, {"Retry-After": "7"}), (200, {}))
+
+    waits = []
+    monkeypatch.setattr(
+        limiter, "acquire", lambda *keys: waits.append(keys) or 0.0,
+    )
+    client.get("https://example.com/v1", proxies={"https": "http://p:1"})
+
+    assert not delays
+    assert waits[0] == ("example.com", "http://p:1")
+    assert limiter.throttled == 1
+    assert limiter._buckets["http://p:1"].rate == 0.5 + limiter.increase
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds("12") == 12
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert retry_after_seconds("soon") is None
+
+
+def test_gives_up_after_retries(delays):
+    client = Client(retries=1, jitter=0, limiter=unlimited())
+    respond(client, (500, {}), (502, {}))
+    assert client.get("url").status_code == 502
+
+    respond(client, requests.Timeout(), requests.Timeout())
+    with pytest.raises(requests.Timeout):
+        client.get("url")
+
+
+def test_backoff_is_capped_and_jittered():
+    client = Client(backoff=1, max_backoff=10, jitter=0.5, limiter=unlimited())
+
+    assert 10 <= client.backoff_delay(8) <= 10.5
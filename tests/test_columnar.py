@@ -0,0 +1,113 @@
+"""Test the columnar snapshot representation."""
+
+# Import standard modules
+import datetime
+import io
+
+# Import third-party modules
+import pytest
+from click.testing import CliRunner
+from sqlalchemy import func, select
+
+# Import local modules
+from cmc_data.__main__ import cli
+from cmc_data.bulk import (
+    build_batches, merge_batches, split_page, write_batches,
+)
+from cmc_data.data_model.models import Market, Quote
+from cmc_data.records import decode_listings
+
+np = pytest.importorskip("numpy")
+
+from cmc_data.columnar import Snapshot  # noqa: E402
+
+
+@pytest.fixture
+def snapshot(listings):
+    return Snapshot.from_listings(decode_listings(listings).listings)
+
+
+def test_columns_match_row_batches(listings, snapshot):
+    batches = build_batches(listings)
+
+    assert len(snapshot) == len(listings)
+    assert snapshot.rows("market_stats") == batches.markets
+    assert snapshot.rows("quote") == batches.quotes
+
+
+def test_nulls_are_vectorised(listings, snapshot):
+    tether = snapshot.quotes["coin_id"] == 825
+
+    assert np.isnan(snapshot.quotes["fully_diluted_mc"][tether]).all()
+    assert snapshot.rows("quote")[-1]["fully_diluted_mc"] is None
+    assert snapshot.dates()[0] == datetime.date(2013, 4, 28)
+    assert snapshot.dates()[-1] == datetime.date(2021, 10, 20)
+
+
+def test_fill_market_cap(snapshot):
+    tether = np.flatnonzero(snapshot.quotes["coin_id"] == 825)[0]
+    snapshot.quotes["market_cap"][tether] = np.nan
+
+    assert snapshot.fill_market_cap() == 1
+    assert snapshot.quotes["market_cap"][tether] == pytest.approx(
+        0.999940347223595 * 69043109914.2716,
+    )
+    assert snapshot.fill_market_cap() == 0
+
+
+def test_dominance(snapshot):
+    dominance = snapshot.dominance("USD")
+
+    assert sum(dominance.values()) == pytest.approx(1)
+    assert max(dominance, key=dominance.get) == 825
+
+
+def test_csv_export(snapshot):
+    buffer = io.StringIO(newline="")
+
+    snapshot.to_csv("quote", buffer)
+
+    lines = buffer.getvalue().splitlines()
+    assert lines[0].startswith("coin_id,currency,price")
+    assert len(lines) == len(snapshot.quotes["coin_id"]) + 1
+    assert lines[-1].startswith("825,USD,0.999940347223595,")
+    assert lines[-1].endswith(",,2021-10-20T23:00:00.000000")
+
+
+def test_npz_round_trip(snapshot, tmp_path):
+    snapshot.to_npz(tmp_path / "snapshot.npz")
+
+    assert Snapshot.from_npz(tmp_path / "snapshot.npz") == snapshot
+
+
+def test_columnar_batches(engine, listings):
+    batches = build_batches(listings, columnar=True)
+    merged = merge_batches(
+        build_batches(chunk, columnar=True)
+        for chunk in split_page(listings, 3)
+    )
+
+    assert not batches.markets and not batches.quotes
+    assert batches.listed == len(listings)
+    assert merged == batches
+    with engine.begin() as connection:
+        counts = write_batches(connection, batches)
+        write_batches(connection, merged)
+        stored = connection.execute(
+            select(func.count()).select_from(Quote)
+        ).scalar()
+        assert counts["quote"] == stored \
+            == len(batches.snapshot.quotes["coin_id"])
+        assert connection.execute(
+            select(func.count()).select_from(Market)
+        ).scalar() == len(listings)
+
+
+@pytest.mark.parametrize("option", ["--delta=memory", "--rollups", "--bulk"])
+def test_export_rejects_ingestion_options(option, tmp_path):
+    result = CliRunner().invoke(cli, [
+        "export", "--date", "2013-04-28", "--output", str(tmp_path), option,
+    ])
+
+    assert result.exit_code == 2
+    assert option.split("=")[0] in result.output
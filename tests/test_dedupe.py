@@ -0,0 +1,171 @@
+"""Test the natural keys and the deduplication of the snapshot tables."""
+
+# Import standard modules
+import datetime
+
+# Import third-party modules
+import pytest
+from sqlalchemy import MetaData, UniqueConstraint, event, func, select
+from sqlalchemy.engine import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data.bulk import build_batches, write_batches
+from cmc_data.data_model import Base
+from cmc_data.data_model import dedupe as dedupe_module
+from cmc_data.data_model.dedupe import (
+    DEDUPLICATED_TABLES, dedupe, enforce_natural_key, natural_key,
+)
+from cmc_data.data_model.models import Coin, Market, Quote, Tag
+from cmc_data.ingest import ingest_data
+
+TIMESTAMP = datetime.datetime(2021, 10, 20)
+
+
+def test_natural_keys():
+    assert [natural_key(table) for table in DEDUPLICATED_TABLES] == [
+        ["coin_id", "last_updated"],
+        ["coin_id", "currency", "last_updated"],
+        ["coin_id", "tag_id"],
+    ]
+    assert natural_key(Coin.__table__) is None
+
+
+def test_reingestion_is_a_no_op(engine, listings):
+    with engine.begin() as connection:
+        write_batches(connection, build_batches(listings))
+        tables = {
+            table.name: connection.execute(
+                select(func.count()).select_from(table)
+            ).scalar()
+            for table in DEDUPLICATED_TABLES
+        }
+        write_batches(connection, build_batches(listings + listings))
+
+        for table in DEDUPLICATED_TABLES:
+            assert connection.execute(
+                select(func.count()).select_from(table)
+            ).scalar() == tables[table.name]
+
+        with pytest.raises(IntegrityError):
+            connection.execute(Market.__table__.insert(), [
+                {"coin_id": 1, "last_updated": TIMESTAMP},
+            ] * 2)
+
+
+def test_orm_reingestion_looks_up_keys_per_page(engine, listings):
+    listings[0]["tags"] = ["mineable", "Mineable"]
+    lookups = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(connection, cursor, statement, *args):
+        if statement.startswith("SELECT") and (
+            "FROM market_stats" in statement or "FROM tag " in statement
+        ):
+            lookups.append(statement)
+
+    with Session(engine) as session:
+        assert ingest_data(listings, session=session) == 0
+        assert ingest_data(listings, session=session) == 0
+
+        assert len(lookups) == 4
+        assert session.scalar(
+            select(func.count()).select_from(Market)
+        ) == len(listings)
+        assert session.scalar(
+            select(func.count()).select_from(Tag).where(Tag.coin_id == 1)
+        ) == 1
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def legacy_engine():
+    """Database populated before the natural keys were enforced."""
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table = table.to_metadata(metadata)
+        for constraint in list(table.constraints):
+            if isinstance(constraint, UniqueConstraint):
+                table.constraints.discard(constraint)
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_dedupe(legacy_engine):
+    engine = legacy_engine
+    with engine.begin() as connection:
+        connection.execute(Coin.__table__.insert(), [
+            {"id": 1, "name": "bitcoin", "symbol": "btc", "slug": "bitcoin"},
+        ])
+        connection.execute(Market.__table__.insert(), [
+            {"coin_id": 1, "last_updated": TIMESTAMP},
+        ] * 3)
+        connection.execute(Quote.__table__.insert(), [
+            {
+                "coin_id": 1, "currency": currency, "price": 1.0,
+                "last_updated": TIMESTAMP,
+            }
+            for currency in ("USD", "BTC", "USD", "USD")
+        ])
+        connection.execute(Tag.__table__.insert(), [
+            {"coin_id": 1, "tag_id": 1},
+        ] * 2)
+
+    assert dedupe(engine, batch_size=2) == {
+        "market_stats": 2, "quote": 2, "tag": 1,
+    }
+    with engine.begin() as connection:
+        assert connection.execute(select(Quote.id)).scalars().all() == [1, 2]
+        with pytest.raises(IntegrityError):
+            connection.execute(Market.__table__.insert(), [
+                {"coin_id": 1, "last_updated": TIMESTAMP},
+            ])
+
+
+def test_dedupe_deletes_duplicates_written_meanwhile(
+    legacy_engine, monkeypatch,
+):
+    engine = legacy_engine
+    delete_duplicates = dedupe_module.delete_duplicates
+    calls = []
+
+    def racing_delete(engine, table, batch_size):
+        deleted = delete_duplicates(engine, table, batch_size)
+        if table is Market.__table__ and not calls:
+            # An ingestion writes a duplicate before the key is enforced
+            with engine.begin() as connection:
+                connection.execute(Market.__table__.insert(), [
+                    {"coin_id": 1, "last_updated": TIMESTAMP},
+                ] * 2)
+        calls.append(table.name)
+        return deleted
+
+    monkeypatch.setattr(dedupe_module, "delete_duplicates", racing_delete)
+
+    assert dedupe(engine)["market_stats"] == 1
+    assert calls.count("market_stats") == 2
+
+
+def test_invalid_natural_key_index_is_rebuilt(legacy_engine, monkeypatch):
+    engine = legacy_engine
+    enforce_natural_key(engine, Market.__table__)
+    # As left behind by a failed concurrent build
+    validity = iter([False])
+    monkeypatch.setattr(
+        dedupe_module, "_index_is_valid",
+        lambda engine, name: next(validity, True),
+    )
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute",
+        lambda connection, cursor, statement, *args:
+            statements.append(statement),
+    )
+
+    enforce_natural_key(engine, Market.__table__)
+
+    assert statements[0].startswith("DROP INDEX")
+    assert statements[1].startswith("CREATE UNIQUE INDEX")
@@ -0,0 +1,93 @@
+"""Test the change detection of the append-only tables."""
+
+# Import standard modules
+import copy
+import datetime
+
+# Import third-party modules
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data import ingest
+from cmc_data.columnar import numpy_available
+from cmc_data.data_model.models import Fingerprint, Market, Quote
+from cmc_data.delta import FingerprintStore, fingerprint
+from cmc_data.ingest import ingest_data
+
+
+def count(session, model):
+    return session.scalar(select(func.count()).select_from(model))
+
+
+def test_fingerprint():
+    timestamp = datetime.datetime(2021, 1, 3, 23, 55)
+
+    assert fingerprint([21000000, None, timestamp]) \
+        == fingerprint([21000000.0, None, timestamp])
+    assert fingerprint([1, timestamp]) != fingerprint([2, timestamp])
+    assert -2 ** 63 <= fingerprint([]) < 2 ** 63
+
+
+@pytest.mark.parametrize("columnar", [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(
+        not numpy_available(), reason="requires NumPy",
+    )),
+])
+def test_unchanged_rows_are_suppressed(engine, listings, columnar):
+    delta = FingerprintStore()
+    changed = copy.deepcopy(listings)
+    changed[0]["cmc_rank"] = 2
+    changed[0]["last_updated"] = "2013-04-29T23:55:01.000Z"
+    quotes = sum(len(listing["quote"]) for listing in listings)
+
+    with Session(engine) as session:
+        ingest_data(listings, session=session, delta=delta, columnar=columnar)
+        assert delta.stats() == {"market_stats": 0, "quote": 0}
+
+        ingest_data(changed, session=session, delta=delta, columnar=columnar)
+
+        assert delta.stats() == {
+            "market_stats": len(listings) - 1, "quote": quotes,
+        }
+        assert count(session, Market) == len(listings) + 1
+        assert count(session, Quote) == quotes
+
+
+def test_fingerprints_persist_in_side_table(engine, listings):
+    with Session(engine) as session:
+        ingest_data(listings, session=session, delta=FingerprintStore(True))
+        assert count(session, Fingerprint) == len(listings) + sum(
+            len(listing["quote"]) for listing in listings
+        )
+
+        delta = FingerprintStore(persist=True)
+        ingest_data(listings, session=session, delta=delta)
+
+    assert delta.stats()["market_stats"] == len(listings)
+
+
+def test_warm_does_not_inspect_the_schema(engine, listings, statements):
+    # The table is created once by `init-db`, not in every transaction
+    with Session(engine) as session:
+        ingest_data(listings, session=session, delta=FingerprintStore(True))
+
+    assert not [
+        statement for statement in statements
+        if "sqlite_master" in statement or "PRAGMA" in statement
+    ]
+
+
+def test_failed_write_invalidates_store(engine, listings, monkeypatch):
+    delta = FingerprintStore()
+
+    def write_batches(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(ingest, "write_batches", write_batches)
+    with Session(engine) as session, pytest.raises(RuntimeError):
+        ingest_data(listings, session=session, delta=delta)
+
+    assert not delta.warmed and len(delta) == 0
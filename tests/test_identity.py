@@ -0,0 +1,106 @@
+"""Test the run-scoped identity cache."""
+
+# Import standard modules
+import copy
+
+# Import third-party modules
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data import ingest
+from cmc_data.bulk import build_batches, write_batches
+from cmc_data.data_model.models import Market
+from cmc_data.identity import IdentityCache
+from cmc_data.ingest import ingest_data
+
+
+def test_miss_is_authoritative_until_eviction():
+    cache = IdentityCache(max_entries=2)
+    cache._maps["coin"].complete = True
+
+    cache.add("coin", 1)
+    cache.add("coin", 2)
+    assert cache.contains("coin", 3) is False
+
+    cache.contains("coin", 1)  # Most recently used
+    cache.add("coin", 3)
+    assert cache.contains("coin", 1) is True
+    assert cache.contains("coin", 2) is None
+
+
+def test_shared_cache_miss_is_not_authoritative(engine, listings):
+    with engine.begin() as connection:
+        cache = IdentityCache(shared=True)
+        cache.warm(connection)
+
+    assert cache.contains("coin", 1) is None
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_writers_see_each_others_rows(engine, listings, shared):
+    later = copy.deepcopy(listings)
+    for listing in later:
+        listing["last_updated"] = "2021-11-01T00:00:00.000Z"
+        for quote in listing["quote"].values():
+            quote["last_updated"] = "2021-11-01T00:00:00.000Z"
+
+    with Session(engine) as first, Session(engine) as second:
+        cache = IdentityCache(shared=shared)
+        cache.warm(first)
+        # Another worker stores the coins, platforms and tags meanwhile
+        assert ingest_data(listings, session=second) == 0
+
+        assert ingest_data(later, session=first, cache=cache) == 0
+        assert first.scalar(
+            select(func.count()).select_from(Market)
+        ) == 2 * len(listings)
+
+
+def test_persistent_conflict_fails_the_page(engine, listings, monkeypatch):
+    add_listing = ingest._add_listing
+
+    def conflicting(session, cache, listing, stored_tags):
+        if listing.id == 825:
+            raise IntegrityError("INSERT", {}, Exception("conflict"))
+        return add_listing(session, cache, listing, stored_tags)
+
+    monkeypatch.setattr(ingest, "_add_listing", conflicting)
+    with Session(engine) as session:
+        # Rather than a rejected entry, which would leave the date complete
+        with pytest.raises(IntegrityError):
+            ingest_data(listings, session=session, cache=IdentityCache())
+
+        assert session.scalar(
+            select(func.count()).select_from(Market)
+        ) == len(listings) - 1
+
+
+def test_warm_loads_reference_tables(engine, listings):
+    with engine.begin() as connection:
+        write_batches(connection, build_batches(listings))
+        cache = IdentityCache()
+        cache.warm(connection)
+
+    assert cache.contains("coin", 1027) is True
+    assert cache.contains("coin", 999_999) is False
+    assert cache.get("tag_ref", "mineable") is not None
+
+
+def test_repeat_snapshot_makes_no_lookups(engine, listings):
+    statements = []
+    cache = IdentityCache()
+    with engine.begin() as connection:
+        cache.warm(connection)
+        write_batches(connection, build_batches(listings), cache)
+
+        event.listen(
+            connection, "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        counts = write_batches(connection, build_batches(listings), cache)
+
+    assert not [sql for sql in statements if sql.startswith("SELECT")]
+    assert counts["coin"] == counts["platform"] == counts["tag_ref"] == 0
@@ -0,0 +1,128 @@
+"""Test the latest state of the coins."""
+
+# Import standard modules
+import copy
+import datetime
+
+# Import third-party modules
+import pytest
+from click.testing import CliRunner
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Import local modules
+import cmc_data
+from cmc_data.columnar import numpy_available
+from cmc_data.data_model import __main__ as data_model_cli
+from cmc_data.data_model.models import CoinLatest
+from cmc_data.delta import FingerprintStore
+from cmc_data.ingest import ingest_data
+from cmc_data.latest import latest_quote, latest_quotes, top_coins
+
+
+def shift(listings, days, factor):
+    """Move the listings `days` later, multiplying their prices."""
+    shifted = copy.deepcopy(listings)
+    for listing in shifted:
+        listing["last_updated"] = f"2021-11-{days:02d}T00:00:00.000Z"
+        for quote in listing["quote"].values():
+            quote["last_updated"] = f"2021-11-{days:02d}T00:00:00.000Z"
+            quote["price"] *= factor
+            if quote["market_cap"] is not None:
+                quote["market_cap"] *= factor
+    return shifted
+
+
+@pytest.mark.parametrize("columnar", [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(
+        not numpy_available(), reason="requires NumPy",
+    )),
+])
+def test_ingestion_keeps_newest_rows(engine, listings, columnar):
+    with Session(engine) as session:
+        ingest_data(
+            shift(listings, 2, 2), session=session, coin_latest=True,
+            columnar=columnar,
+        )
+        # An older snapshot, e.g. from a backfill, is not newer
+        ingest_data(
+            shift(listings, 1, 3), session=session, coin_latest=True,
+            columnar=columnar,
+        )
+
+        bitcoin = latest_quote(1, session=session)
+        assert bitcoin.price == pytest.approx(2 * 134.210021972656)
+        assert bitcoin.last_updated == datetime.datetime(2021, 11, 2)
+        assert bitcoin.cmc_rank == 1
+        assert session.scalar(
+            select(func.count()).select_from(CoinLatest)
+        ) == 15
+
+
+def test_change_detection_keeps_changed_quotes(engine, listings):
+    # Only the quotes moved: the unchanged market stats are skipped
+    later = copy.deepcopy(listings)
+    for listing in later:
+        for quote in listing["quote"].values():
+            quote["last_updated"] = "2021-11-01T00:00:00.000Z"
+            quote["price"] *= 2
+
+    delta = FingerprintStore()
+    with Session(engine) as session:
+        ingest_data(listings, session=session, delta=delta, coin_latest=True)
+        ingest_data(later, session=session, delta=delta, coin_latest=True)
+        assert delta.stats()["market_stats"] == len(listings)
+
+        bitcoin = latest_quote(1, session=session)
+        assert bitcoin.price == pytest.approx(2 * 134.210021972656)
+        assert bitcoin.last_updated == datetime.datetime(2021, 11, 1)
+        assert bitcoin.market_updated == datetime.datetime(
+            2013, 4, 28, 23, 55, 1,
+        )
+        assert bitcoin.cmc_rank == 1
+
+
+def test_update_does_not_inspect_the_schema(engine, listings, statements):
+    with Session(engine) as session:
+        ingest_data(listings, session=session, coin_latest=True)
+
+        assert latest_quote(1, session=session) is not None
+    assert not [
+        statement for statement in statements
+        if "sqlite_master" in statement or "PRAGMA" in statement
+    ]
+
+
+def test_accessors(engine, listings):
+    with Session(engine) as session:
+        ingest_data(listings, session=session, coin_latest=True)
+
+        assert latest_quote(1, "EUR", session=session) is None
+        assert set(latest_quotes([1, 825, 9999], session=session)) == {
+            1, 825,
+        }
+        by_cap = top_coins(3, session=session)
+        assert [row.coin_id for row in by_cap] == [825, 1, 2]
+        assert by_cap[0].market_cap >= by_cap[1].market_cap
+        by_rank = top_coins(3, by="cmc_rank", session=session)
+        assert [row.cmc_rank for row in by_rank] == [1, 2, 3]
+        with pytest.raises(ValueError):
+            top_coins(by="price", session=session)
+
+    assert cmc_data.top_coins is top_coins
+
+
+def test_rebuild_latest_command(engine, listings, monkeypatch):
+    with Session(engine) as session:
+        ingest_data(listings, session=session, bulk=True)
+        ingest_data(shift(listings, 1, 2), session=session, bulk=True)
+    monkeypatch.setattr(data_model_cli, "get_engine", lambda: engine)
+
+    result = CliRunner().invoke(data_model_cli.cli, ["rebuild-latest"])
+
+    assert result.exit_code == 0, result.output
+    assert result.output == "Rebuilt 15 latest rows.\n"
+    with Session(engine) as session:
+        assert latest_quote(1, "BTC", session=session).last_updated \
+            == datetime.datetime(2021, 11, 1)
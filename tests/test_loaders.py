@@ -0,0 +1,148 @@
+"""Test the loaders for the append-only tables."""
+
+# Import standard modules
+import datetime
+from types import SimpleNamespace
+
+# Import third-party modules
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+
+# Import local modules
+from cmc_data.data_model.models import Coin, Market
+from cmc_data.loaders import copy_rows, load_rows, load_snapshot, upsert
+from cmc_data.records import decode_listings
+
+ROWS = [
+    {
+        "coin_id": 1,
+        "num_market_pairs": None,
+        "circulating_supply": 11091325.5,
+        "total_supply": 11091325,
+        "cmc_rank": 1,
+        "last_updated": datetime.datetime(2013, 4, 28, 23, 55, 1),
+    },
+]
+
+
+class FakeCursor:
+    """DBAPI cursor recording the `copy_expert` calls."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def execute(self, statement):
+        self.calls.append((statement, None))
+
+    def copy_expert(self, statement, buffer):
+        self.calls.append((statement, buffer.read()))
+
+    def close(self):
+        pass
+
+
+def fake_connection(calls):
+    """PostgreSQL connection whose cursors record the statements."""
+    return SimpleNamespace(
+        dialect=postgresql.dialect(),
+        connection=SimpleNamespace(cursor=lambda: FakeCursor(calls)),
+    )
+
+
+def test_copy_rows_streams_csv():
+    calls = []
+
+    copy_rows(fake_connection(calls), Market.__table__, ROWS)
+
+    statement, payload = calls[0]
+    assert statement.startswith("COPY market_stats (coin_id, ")
+    assert payload == "1,,11091325.5,11091325,1,2013-04-28 23:55:01\r\n"
+
+
+def test_copy_rows_skips_stored_keys_through_staging_table():
+    calls = []
+
+    copy_rows(
+        fake_connection(calls), Market.__table__, ROWS,
+        ["coin_id", "last_updated"],
+    )
+
+    statements = [statement for statement, _ in calls]
+    assert statements[0].startswith(
+        "CREATE TEMPORARY TABLE IF NOT EXISTS staging_market_stats "
+        "(LIKE market_stats"
+    )
+    assert statements[2].startswith("COPY staging_market_stats (coin_id, ")
+    assert statements[3].startswith("INSERT INTO market_stats (coin_id, ")
+    assert statements[3].endswith(
+        "ON CONFLICT (coin_id, last_updated) DO NOTHING"
+    )
+
+
+def test_load_rows_falls_back_to_inserts(engine):
+    with engine.begin() as connection:
+        connection.execute(
+            Coin.__table__.insert(),
+            {"id": 1, "name": "bitcoin", "symbol": "btc", "slug": "bitcoin"},
+        )
+        load_rows(connection, Market.__table__, ROWS, copy=True)
+
+        assert connection.execute(
+            select(func.count()).select_from(Market)
+        ).scalar() == 1
+
+
+def test_upsert_replaces_conflicting_rows(engine):
+    rows = [
+        {"id": 1, "name": "bitcoin", "symbol": "btc", "slug": "bitcoin"},
+        {"id": 2, "name": "litecoin", "symbol": "ltc", "slug": "litecoin"},
+    ]
+    with engine.begin() as connection:
+        upsert(connection, Coin.__table__, rows[:1], ["id"])
+        upsert(
+            connection, Coin.__table__,
+            [{**rows[0], "name": "btc"}, rows[1]], ["id"],
+        )
+
+        assert connection.execute(
+            select(Coin.id, Coin.name).order_by(Coin.id)
+        ).all() == [(1, "btc"), (2, "litecoin")]
+
+
+def test_upsert_keeps_newer_rows(engine):
+    row = {
+        "id": 1, "coin_id": 1, "num_market_pairs": 7,
+        "circulating_supply": 1.0, "total_supply": 1.0, "cmc_rank": 1,
+        "last_updated": datetime.datetime(2021, 1, 2),
+    }
+    with engine.begin() as connection:
+        upsert(connection, Market.__table__, [row], ["id"])
+        older = {
+            **row, "cmc_rank": 2,
+            "last_updated": datetime.datetime(2021, 1, 1),
+        }
+        upsert(
+            connection, Market.__table__, [older], ["id"],
+            newer="last_updated",
+        )
+
+        assert connection.execute(select(Market.cmc_rank)).scalar() == 1
+
+
+def test_load_snapshot_copies_columns(listings):
+    pytest.importorskip("numpy")
+    from cmc_data.columnar import Snapshot
+
+    calls = []
+    dialect = postgresql.psycopg2.dialect()
+    connection = fake_connection(calls)
+    connection.dialect = dialect
+    snapshot = Snapshot.from_listings(decode_listings(listings[:1]).listings)
+
+    load_snapshot(connection, Market.__table__, snapshot, copy=True)
+
+    statement, payload = calls[0]
+    assert statement.startswith("COPY market_stats (coin_id, ")
+    assert payload.startswith("1,")
+    assert payload.endswith(",1,2013-04-28T23:55:01.000000\r\n")
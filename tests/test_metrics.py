@@ -0,0 +1,143 @@
+"""Test the pipeline metrics."""
+
+# Import standard modules
+import datetime
+import json
+
+# Import third-party modules
+import pytest
+import requests
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data import metrics
+from cmc_data.client import Client
+from cmc_data.ingest import LISTINGS_ENDPOINT, get_data, ingest_data
+from cmc_data.metrics import Registry
+from cmc_data.ratelimit import RateLimiter
+from cmc_data.stub import StubServer
+
+DATE = datetime.date(2021, 1, 3)
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    metrics.REGISTRY.reset()
+    yield
+    metrics.REGISTRY.reset()
+
+
+@pytest.fixture
+def registry():
+    registry = Registry()
+    requests_total = registry.counter(
+        "requests_total", "Requests.", ["table"],
+    )
+    duration = registry.histogram(
+        "duration_seconds", "Duration.", buckets=(0.1, 1.0),
+    )
+    requests_total.inc(2, table="coin")
+    requests_total.inc(table='a"b')
+    duration.observe(0.1)
+    duration.observe(0.5)
+    duration.observe(5)
+    return registry
+
+
+def test_render(registry):
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{table="a\\"b"} 1',
+        'requests_total{table="coin"} 2',
+        "# HELP duration_seconds Duration.",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{le="0.1"} 1',
+        'duration_seconds_bucket{le="1.0"} 2',
+        'duration_seconds_bucket{le="+Inf"} 3',
+        "duration_seconds_sum 5.6",
+        "duration_seconds_count 3",
+    ]
+
+
+def test_summary(registry):
+    registry.histogram("unused_seconds", "Never observed.")
+
+    assert registry.summary() == {
+        "requests_total": {'{table="a\\"b"}': 1, '{table="coin"}': 2},
+        "duration_seconds": {
+            "count": 3, "sum": 5.6, "mean": pytest.approx(5.6 / 3), "max": 5,
+        },
+    }
+
+
+def test_labels_are_checked(registry):
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Duplicate.")
+    with pytest.raises(ValueError):
+        registry.histogram("other_seconds", "Other.").observe(1, step="json")
+
+
+def test_write_and_serve(registry, tmp_path):
+    path = tmp_path / "cmc.prom"
+    registry.write(path)
+    assert path.read_text() == registry.render()
+    assert [file.name for file in tmp_path.iterdir()] == ["cmc.prom"]
+
+    server = registry.serve(0, "127.0.0.1")
+    try:
+        response = requests.get(
+            "http://127.0.0.1:%d/metrics" % server.server_address[1],
+            timeout=5,
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert response.text == registry.render()
+
+
+def test_pipeline_is_instrumented(engine):
+    client = Client(
+        retries=5, backoff=0, jitter=0, timeout=5,
+        limiter=RateLimiter(1000, max_rate=1000),
+    )
+    with client, StubServer(
+        coins=12, throttle_rate=0.5, retry_after=0, seed=1,
+    ) as server:
+        data = get_data(
+            server.url + LISTINGS_ENDPOINT, client,
+            params={"date": DATE, "start": 1, "limit": 5},
+        )
+        stats = server.stats()
+
+    data.append({"id": "invalid"})
+    with Session(engine) as session:
+        assert ingest_data(data, bulk=True, session=session) == 1
+
+    summary = json.loads(json.dumps(metrics.summary()))
+    assert metrics.PAGES.value() == 3
+    assert metrics.HTTP_REQUEST_SECONDS.count(status=200) == 3
+    assert metrics.HTTP_REQUEST_SECONDS.count(status=429) \
+        == metrics.HTTP_RETRIES.value() == stats["listings 429"] > 0
+    assert metrics.HTTP_RESPONSE_BYTES.value() > 0
+    assert metrics.RATELIMIT_WAIT_SECONDS.count() == sum(stats.values())
+    assert metrics.DECODE_SECONDS.count(step="json") == 3
+    assert metrics.DECODE_SECONDS.count(step="records") == 1
+    assert metrics.TRANSFORM_SECONDS.count() == 1
+    assert metrics.WRITE_SECONDS.count() == 1
+    assert metrics.ROWS_WRITTEN.value(table="market_stats") == 12
+    assert metrics.ROWS_WRITTEN.value(table="quote") == 24
+    assert metrics.REJECTED_ENTRIES.value() == 1
+    assert summary["cmc_pages_total"] == 3
+    assert summary["cmc_write_seconds"]["count"] == 1
+
+
+def test_entry_ingestion_counts_rows(engine, listings):
+    with Session(engine) as session:
+        assert ingest_data(listings, session=session) == 0
+
+    assert metrics.WRITE_SECONDS.count() == 1
+    assert metrics.ROWS_WRITTEN.value(table="market_stats") == len(listings)
+    assert metrics.ROWS_WRITTEN.value(table="coin") >= len(listings)
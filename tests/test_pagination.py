@@ -0,0 +1,72 @@
+"""Test the streaming pagination of the listings."""
+
+# Import standard modules
+from types import SimpleNamespace
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from cmc_data import get_data, ingest, iter_pages
+
+
+@pytest.fixture
+def server():
+    """Fake client of a listings endpoint serving `server.total` entries."""
+    requests_sent = []
+
+    def get_json(url, params=None, **kwargs):
+        requests_sent.append(params)
+        start, limit = params["start"], params["limit"]
+        return {
+            "data": list(range(start, min(start + limit, fake.total + 1))),
+        }
+
+    fake = SimpleNamespace(total=0, requests=requests_sent, get_json=get_json)
+    return fake
+
+
+@pytest.mark.parametrize(
+    "total, pages, requests", [(0, 0, 1), (7, 3, 3), (9, 3, 4), (10, 4, 4)],
+)
+def test_iter_pages_stops_on_short_or_empty_page(
+    server, total, pages, requests,
+):
+    server.total = total
+
+    content = list(
+        iter_pages("url", server, params={"limit": 3, "start": 1})
+    )
+
+    assert len(content) == pages
+    assert [entry for page in content for entry in page] == \
+        list(range(1, total + 1))
+    assert len(server.requests) == requests
+
+
+def test_get_data_concatenates_pages(server):
+    server.total = 12_345
+
+    assert len(get_data("url", server, params={"limit": 5000})) == 12_345
+
+
+@pytest.mark.parametrize("stop", ["close", "error"])
+def test_owned_client_is_closed_early(server, monkeypatch, stop):
+    server.total = 10
+    server.closed = 0
+
+    def close():
+        server.closed += 1
+
+    server.close = close
+    monkeypatch.setattr(ingest, "Client", lambda: server)
+
+    pages = iter_pages("url", params={"limit": 3})
+    assert next(pages) == [1, 2, 3]
+    if stop == "close":
+        pages.close()
+    else:
+        with pytest.raises(RuntimeError):
+            pages.throw(RuntimeError("consumer failed"))
+
+    assert server.closed == 1
@@ -0,0 +1,81 @@
+"""Test the time partitioning of the snapshot tables."""
+
+# Import standard modules
+import datetime
+
+# Import third-party modules
+import pytest
+from sqlalchemy import func, inspect, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+# Import local modules
+from cmc_data.data_model.models import Market
+from cmc_data.data_model.partitioning import (
+    PARTITION_NAME, create_partitioned_tables, next_month, partition_manager,
+    partition_name, partitioned_metadata,
+)
+from cmc_data.ingest import ingest_data
+
+
+def test_partitioned_ddl():
+    metadata = partitioned_metadata()
+    quote = metadata.tables["quote"]
+    dialect = postgresql.dialect()
+
+    ddl = str(CreateTable(quote).compile(dialect=dialect))
+    assert "PRIMARY KEY (id, last_updated)" in ddl
+    assert ddl.rstrip().endswith("PARTITION BY RANGE (last_updated)")
+    assert "PARTITION BY" not in str(
+        CreateTable(metadata.tables["coin"]).compile(dialect=dialect)
+    )
+
+    brin = next(
+        index for index in quote.indexes
+        if index.name == "ix_quote_last_updated"
+    )
+    assert "USING brin" in str(CreateIndex(brin).compile(dialect=dialect))
+
+
+def test_time_series_indexes(engine):
+    indexes = {
+        index["name"]: index["column_names"]
+        for table in ("market_stats", "quote")
+        for index in inspect(engine).get_indexes(table)
+    }
+
+    assert indexes["ix_quote_coin_id_last_updated"] == [
+        "coin_id", "last_updated",
+    ]
+    assert indexes["ix_market_stats_last_updated"] == ["last_updated"]
+
+
+def test_partition_names():
+    start = datetime.date(2021, 12, 1)
+
+    assert next_month(start) == datetime.date(2022, 1, 1)
+    assert partition_name("quote", start) == "quote_y2021m12"
+    assert PARTITION_NAME.match("market_stats_y2021m12")["table"] == (
+        "market_stats"
+    )
+
+
+def test_partitioning_requires_postgres(engine):
+    with pytest.raises(ValueError):
+        create_partitioned_tables(engine)
+
+    manager = partition_manager(engine)
+    assert manager is partition_manager(engine)
+    assert manager.ensure([datetime.datetime(2021, 1, 3)]) == []
+    assert manager.drop_before(datetime.date(2022, 1, 1)) == []
+
+
+def test_sessions_bound_to_connections(engine, listings):
+    with engine.connect() as connection:
+        assert partition_manager(connection) is partition_manager(engine)
+        with Session(bind=connection) as session:
+            assert ingest_data(listings, session=session) == 0
+            assert session.scalar(
+                select(func.count()).select_from(Market)
+            ) == len(listings)
@@ -0,0 +1,142 @@
+"""Test the proxy server pool."""
+
+# Import standard modules
+import threading
+import time
+from types import SimpleNamespace
+
+# Import third-party modules
+import requests
+
+# Import local modules
+from cmc_data import proxies as proxies_module
+from cmc_data.client import Client
+from cmc_data.proxies import ProxyPool, file_source
+from cmc_data.ratelimit import RateLimiter
+
+LATENCIES = {
+    "http://10.0.0.1:80": 0.1,
+    "http://10.0.0.2:80": 0.5,
+    "http://10.0.0.3:80": None,  # Dead
+}
+
+
+def check(url):
+    """Fake health check taking a little while."""
+    time.sleep(0.05)
+    if LATENCIES[url] is None:
+        raise requests.ConnectionError
+    return LATENCIES[url]
+
+
+def test_file_source(tmp_path):
+    path = tmp_path / "proxies.txt"
+    path.write_text("# Comment\n10.0.0.1:80\n\nhttps://10.0.0.9:443\n")
+
+    assert file_source(path)() == [
+        "http://10.0.0.1:80", "https://10.0.0.9:443",
+    ]
+
+
+def test_checks_run_concurrently_and_are_cached(tmp_path):
+    sources = []
+
+    def source():
+        sources.append(threading.current_thread().name)
+        return list(LATENCIES)
+
+    cache_file = tmp_path / "proxies.json"
+    pool = ProxyPool(source, check=check, cache_file=cache_file)
+
+    started = time.perf_counter()
+    assert pool.refresh() == 2
+    assert time.perf_counter() - started < 0.05 * len(LATENCIES)
+    assert pool.choose()["https"] in LATENCIES
+
+    # Fresh within the TTL, including for the next run
+    pool.refresh()
+    assert ProxyPool(source, check=check, cache_file=cache_file).refresh() == 2
+    assert len(sources) == 1
+    assert ProxyPool(source, check=check, ttl=0, cache_file=cache_file)\
+        .refresh() == 2
+    assert len(sources) == 2
+
+
+def test_health_checks_do_not_block_the_pool():
+    checking = threading.Event()
+    release = threading.Event()
+
+    def slow_check(url):
+        checking.set()
+        release.wait(5)
+        return LATENCIES[url] or 1.0
+
+    pool = ProxyPool(lambda: list(LATENCIES)[:1], check=lambda url: 0.1)
+    pool.refresh()
+    pool.check = slow_check
+    refresher = threading.Thread(target=pool.refresh, args=(True,))
+    refresher.start()
+    try:
+        assert checking.wait(5)
+        recorder = threading.Thread(
+            target=pool.record, args=(list(LATENCIES)[0], 0.2),
+        )
+        recorder.start()
+        recorder.join(1)
+
+        assert not recorder.is_alive()
+        assert pool.stats()["proxies"] == 1
+    finally:
+        release.set()
+        refresher.join()
+
+
+def test_circuit_breaker(monkeypatch):
+    pool = ProxyPool(
+        lambda: list(LATENCIES), check=check, failure_threshold=2,
+        cooldown=60,
+    )
+    pool.refresh()
+    slow = "http://10.0.0.2:80"
+    fast = "http://10.0.0.1:80"
+
+    for _ in range(2):
+        pool.record(fast, error=True)
+    assert pool.stats()["open"] == 1
+    assert all(pool.choose()["http"] == slow for _ in range(10))
+
+    # Half-open after the cooldown: one trial, then closed on success
+    now = time.monotonic()
+    monkeypatch.setattr(proxies_module.time, "monotonic", lambda: now + 61)
+    pool.record(slow, error=True)
+    pool.record(slow, error=True)
+    assert pool.choose()["http"] == fast
+    pool.record(fast, 0.1)
+    assert pool.stats()["open"] == 1  # Only the slow one
+
+
+def test_choice_favours_low_scores():
+    pool = ProxyPool(lambda: list(LATENCIES), check=check)
+    pool.refresh()
+
+    chosen = [pool.choose()["http"] for _ in range(50)]
+
+    # With two candidates, both are drawn and the best one wins
+    assert set(chosen) == {"http://10.0.0.1:80"}
+
+
+def test_client_reports_to_pool(monkeypatch):
+    pool = ProxyPool(lambda: list(LATENCIES), check=check)
+    pool.refresh()
+    client = Client(
+        retries=0,
+        limiter=RateLimiter(rate=1e9, max_rate=1e9, min_rate=1e9),
+        proxy_pool=pool,
+    )
+    client.session.get = lambda url, **kwargs: SimpleNamespace(
+        status_code=503, headers={}, content=b"",
+    )
+
+    client.get("https://example.com", proxies=pool.choose())
+
+    assert pool.stats()["scores"]["http://10.0.0.1:80"]["error_rate"] > 0
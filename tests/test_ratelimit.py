@@ -0,0 +1,53 @@
+"""Test the adaptive rate limiter."""
+
+# Import local modules
+from cmc_data import ratelimit
+from cmc_data.ratelimit import RateLimiter, TokenBucket
+
+
+def test_token_bucket_queues_reservations():
+    bucket = TokenBucket(rate=2, capacity=1)
+    now = bucket.updated
+
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == 0.5
+    assert bucket.reserve(now) == 1.0
+    assert bucket.reserve(now + 10) == 0
+
+
+def test_reservations_made_during_a_block_are_queued():
+    bucket = TokenBucket(rate=2, capacity=1)
+    now = bucket.updated
+    bucket.reserve(now)
+    bucket.block(now, 30)
+
+    waits = [bucket.reserve(now + 1) for _ in range(3)]
+
+    # One after the other once the block ends, rather than all at once
+    assert waits == [29.5, 30.0, 30.5]
+    assert bucket.reserve(now + 40) == 0
+
+
+def test_acquire_waits_for_every_bucket(monkeypatch):
+    slept = []
+    monkeypatch.setattr(ratelimit, "sleep", slept.append)
+    limiter = RateLimiter(rate=1, burst=1)
+
+    limiter.acquire("host", "proxy-a")
+    limiter.acquire("host", "proxy-b")
+
+    assert len(slept) == 1 and 0.9 < slept[0] <= 1
+    assert limiter.stats()["waits"] == 1
+
+
+def test_rate_adapts_to_throttling():
+    limiter = RateLimiter(rate=1, min_rate=0.2, max_rate=1.1, increase=0.5)
+
+    limiter.succeed("host")
+    assert limiter.stats()["rates"]["host"] == 1.1
+
+    for _ in range(5):
+        limiter.throttle("host", retry_after=30)
+    assert limiter.stats()["rates"]["host"] == 0.2
+    assert limiter.stats()["throttled"] == 5
+    assert limiter._buckets["host"].reserve(ratelimit.monotonic()) > 29
@@ -0,0 +1,51 @@
+"""Test the typed decoding of listing pages."""
+
+# Import standard modules
+import datetime
+import json
+import sys
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from cmc_data.records import Listing, decode_listing, decode_listings, loads
+
+
+def test_decode_listing(listings):
+    tether = decode_listing(listings[-1])
+
+    assert tether.platform.id == 1027
+    assert tether.tags == ("payments", "stablecoin")
+    assert tether.quotes[0].currency == "USD"
+    assert tether.quotes[0].last_updated == datetime.datetime(
+        2021, 10, 20, 23,
+    )
+
+
+@pytest.mark.parametrize("change", [
+    {"id": "1"},
+    {"cmc_rank": 1.5},
+    {"tags": [None]},
+    {"last_updated": "yesterday"},
+    {"quote": {"USD": {"price": None}}},
+    {"quote": {"USD": {"price": "1", "last_updated": "2021-10-20T23:00Z"}}},
+    {"platform": {"id": 1027}},
+])
+def test_decode_listings_separates_invalid_entries(listings, change):
+    invalid = {**listings[0], **change}
+
+    page = decode_listings([invalid, listings[1]])
+
+    assert page.rejected == [invalid]
+    assert [listing.id for listing in page.listings] == [listings[1]["id"]]
+
+
+def test_records_are_compact(listings):
+    page = decode_listings(loads(json.dumps(listings).encode()))
+
+    assert not page.rejected
+    assert decode_listings(page.listings).listings == page.listings
+    assert not hasattr(page.listings[0], "__dict__")
+    assert sys.getsizeof(page.listings[0]) < sys.getsizeof(listings[0])
+    assert isinstance(page.listings[0], Listing)
@@ -0,0 +1,100 @@
+"""Test the per-coin rollups of the quotes."""
+
+# Import standard modules
+import copy
+import datetime
+
+# Import third-party modules
+import pytest
+from click.testing import CliRunner
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data.data_model import __main__ as data_model_cli
+from cmc_data.data_model.models import QuoteRollup
+from cmc_data.data_model.rollup import bucket_start, rebuild_rollups
+from cmc_data.ingest import ingest_data
+
+
+def rollups(engine):
+    with Session(engine) as session:
+        return {
+            (row.coin_id, row.currency, row.period, row.bucket): (
+                row.samples, row.open_price, row.high_price, row.low_price,
+                row.close_price, row.best_rank, row.worst_rank,
+                row.close_rank,
+            )
+            for row in session.scalars(select(QuoteRollup))
+        }
+
+
+def test_bucket_start():
+    # A Sunday
+    value = datetime.datetime(2013, 4, 28, 23, 55)
+
+    assert bucket_start("week", value) == datetime.date(2013, 4, 22)
+    assert bucket_start("week", value.date()) == datetime.date(2013, 4, 22)
+    assert bucket_start("month", value) == datetime.date(2013, 4, 1)
+    with pytest.raises(ValueError):
+        bucket_start("day", value)
+
+
+def test_ingestion_refreshes_rollups(engine, listings):
+    later = copy.deepcopy(listings)
+    for listing in later:
+        listing["last_updated"] = "2013-04-30T23:55:01.000Z"
+        listing["cmc_rank"] += 1
+        for quote in listing["quote"].values():
+            quote["last_updated"] = "2013-04-30T23:55:01.000Z"
+            quote["price"] *= 2
+
+    with Session(engine) as session:
+        ingest_data(listings, session=session, rollups=True)
+        first = rollups(engine)
+        ingest_data(later, session=session, rollups=True)
+
+    # The USD quote of Bitcoin is from Sunday and the BTC one from Monday
+    week = datetime.date(2013, 4, 22)
+    assert first[1, "USD", "week", week] == (
+        1, 134.210021972656, 134.210021972656, 134.210021972656,
+        134.210021972656, 1, 1, 1,
+    )
+    assert (1, "BTC", "week", week) not in first
+
+    refreshed = rollups(engine)
+    assert refreshed[1, "USD", "week", week] == first[1, "USD", "week", week]
+    assert refreshed[1, "USD", "month", datetime.date(2013, 4, 1)] == (
+        2, 134.210021972656, 268.420043945312, 134.210021972656,
+        268.420043945312, 1, 2, 2,
+    )
+    assert refreshed[825, "USD", "week", datetime.date(2021, 10, 18)][0] == 1
+
+    # Incremental refreshes agree with a rebuild from scratch
+    with engine.begin() as connection:
+        connection.execute(QuoteRollup.__table__.delete())
+    assert sum(rebuild_rollups(engine).values()) == len(refreshed)
+    assert rollups(engine) == refreshed
+
+
+def test_refresh_does_not_inspect_the_schema(engine, listings, statements):
+    with Session(engine) as session:
+        ingest_data(listings, session=session, rollups=True)
+
+    assert rollups(engine)
+    assert not [
+        statement for statement in statements
+        if "sqlite_master" in statement or "PRAGMA" in statement
+    ]
+
+
+def test_rebuild_rollups_command(engine, listings, monkeypatch):
+    with Session(engine) as session:
+        ingest_data(listings, session=session, bulk=True)
+    monkeypatch.setattr(data_model_cli, "get_engine", lambda: engine)
+
+    result = CliRunner().invoke(data_model_cli.cli, ["rebuild-rollups"])
+
+    assert result.exit_code == 0, result.output
+    assert "Rebuilt 15 monthly rollups." in result.output
+    assert len(rollups(engine)) == 30
@@ -0,0 +1,87 @@
+"""Test the SQLite backend."""
+
+# Import standard modules
+from concurrent.futures import ThreadPoolExecutor
+
+# Import third-party modules
+import pytest
+from click.testing import CliRunner
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data import data_model
+from cmc_data.data_model import create_db_engine, load_config
+from cmc_data.data_model.__main__ import cli
+from cmc_data.data_model.models import Market, Platform
+from cmc_data.ingest import ingest_data
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'cmc.sqlite'}")
+    data_model.Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def pragma(connection, name):
+    return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_pragmas(sqlite_engine):
+    with sqlite_engine.connect() as connection:
+        assert pragma(connection, "journal_mode") == "wal"
+        # NORMAL
+        assert pragma(connection, "synchronous") == 1
+        assert pragma(connection, "cache_size") == -65536
+        assert pragma(connection, "foreign_keys") == 1
+
+
+def test_pragmas_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("DB_SQLITE_SYNCHRONOUS", "FULL")
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'cmc.sqlite'}")
+    with engine.connect() as connection:
+        assert pragma(connection, "synchronous") == 2
+
+
+def test_config(monkeypatch):
+    monkeypatch.setattr(data_model, "_db_config", None)
+    monkeypatch.setenv("DB_DRIVER", "sqlite")
+    monkeypatch.setenv("DB_NAME", "/data/cmc.sqlite")
+
+    assert load_config() == {
+        "drivername": "sqlite", "database": "/data/cmc.sqlite",
+    }
+
+
+def test_init_db(monkeypatch, tmp_path):
+    path = tmp_path / "cmc.sqlite"
+    monkeypatch.setattr(data_model, "_db_config", {"drivername": "sqlite"})
+
+    result = CliRunner().invoke(cli, ["init-db", "-d", str(path)])
+
+    assert result.exit_code == 0, result.output
+    engine = create_db_engine(f"sqlite:///{path}")
+    with engine.connect() as connection:
+        assert pragma(connection, "journal_mode") == "wal"
+        assert connection.execute(select(func.count()).select_from(
+            Market.__table__
+        )).scalar() == 0
+
+
+def test_bulk_ingestion_from_another_thread(sqlite_engine, listings):
+    with Session(sqlite_engine) as session:
+        session.connection()
+        with ThreadPoolExecutor(1) as executor:
+            rejected = executor.submit(
+                ingest_data, listings, bulk=True, session=session,
+            ).result()
+
+        assert rejected == 0
+        assert session.scalar(
+            select(func.count()).select_from(Market)
+        ) == len(listings)
+        assert session.scalar(
+            select(Platform.token_address).where(Platform.id == 825)
+        ) == b"0xdac17f958d2ee523a2206206994597c13d831ec7"
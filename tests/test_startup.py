@@ -0,0 +1,67 @@
+"""Test the lazy initialisation of the package and its database session."""
+
+# Import standard modules
+import subprocess
+import sys
+
+# Import third-party modules
+import pytest
+from sqlalchemy import select
+
+# Import local modules
+from cmc_data.data_model import session_scope
+from cmc_data.data_model.models import Coin
+
+HEAVY_MODULES = ("sqlalchemy", "requests", "bs4", "dotenv")
+
+
+def imported_modules(*args):
+    """Return the top-level modules imported by `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True, text=True, check=True,
+    )
+    return {
+        line.split("|")[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line
+    }
+
+
+@pytest.mark.parametrize("args", [
+    ("-c", "import cmc_data"),
+    ("-m", "cmc_data", "--help"),
+])
+def test_startup_skips_heavy_imports(args):
+    modules = imported_modules(*args)
+
+    assert not modules & set(HEAVY_MODULES)
+
+
+def test_ingestion_api_imported_on_access():
+    modules = imported_modules(
+        "-c", "import cmc_data; cmc_data.ingest_snapshot",
+    )
+
+    assert {"sqlalchemy", "requests"} <= modules
+
+
+def test_session_scope_commits(engine):
+    with session_scope(engine) as session:
+        session.add(Coin(id=1, name="Bitcoin", symbol="BTC", slug="bitcoin"))
+
+    with session_scope(engine) as session:
+        assert session.scalars(select(Coin.id)).all() == [1]
+
+
+def test_session_scope_rolls_back(engine):
+    with pytest.raises(RuntimeError):
+        with session_scope(engine) as session:
+            session.add(
+                Coin(id=1, name="Bitcoin", symbol="BTC", slug="bitcoin"),
+            )
+            session.flush()
+            raise RuntimeError
+
+    with session_scope(engine) as session:
+        assert session.scalars(select(Coin.id)).all() == []
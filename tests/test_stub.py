@@ -0,0 +1,119 @@
+"""Test the local stand-in server."""
+
+# Import standard modules
+import datetime
+
+# Import third-party modules
+import pytest
+import requests
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data.client import Client
+from cmc_data.data_model.models import Market
+from cmc_data.helpers import get_proxies
+from cmc_data.ingest import (
+    LISTINGS_ENDPOINT, base_url, extract_data, get_data, populate,
+)
+from cmc_data.ratelimit import RateLimiter
+from cmc_data.stub import StubServer
+from cmc_data.synthetic import synthetic_listings
+
+DATE = datetime.date(2021, 1, 3)
+
+
+@pytest.fixture
+def client():
+    with Client(
+        retries=5, backoff=0, jitter=0, timeout=5,
+        limiter=RateLimiter(1000, max_rate=1000),
+    ) as client:
+        yield client
+
+
+def test_pagination_matches_synthetic_listings(client):
+    with StubServer(coins=12) as server:
+        data = get_data(
+            server.url + LISTINGS_ENDPOINT, client,
+            params={"date": DATE, "start": 1, "limit": 5},
+        )
+
+        assert data == synthetic_listings(12, DATE)
+        assert server.stats() == {"listings 200": 3}
+
+
+def test_page_size_caps_limit(client):
+    with StubServer(coins=12, page_size=4) as server:
+        response = client.get_json(
+            server.url + LISTINGS_ENDPOINT,
+            params={"date": DATE, "start": 1, "limit": 10},
+        )
+
+    assert len(response["data"]) == 4
+
+
+def test_invalid_parameters(client):
+    with StubServer(coins=1) as server:
+        response = client.get(
+            server.url + LISTINGS_ENDPOINT, params={"start": 1},
+        )
+
+    assert response.status_code == 400
+
+
+def test_failures_are_retried(client):
+    with StubServer(
+        coins=3, error_rate=0.3, throttle_rate=0.3, retry_after=0, seed=1,
+    ) as server:
+        for _ in range(5):
+            assert len(extract_data(DATE, client=client, server=server.url)) \
+                == 3
+        stats = server.stats()
+
+    assert stats["listings 200"] == 5
+    assert stats["listings 429"] and stats["listings 500"]
+
+
+def test_proxy_list_and_forward_proxy(client):
+    with StubServer(coins=2, dead_proxies=2) as server:
+        proxies = get_proxies(client, server.proxy_list_url)
+        address = f"http://{proxies[0]['IP Address']}:{proxies[0]['Port']}"
+        response = client.get_json(
+            server.url + LISTINGS_ENDPOINT,
+            params={"date": DATE, "limit": 5000},
+            proxies={"http": address},
+        )
+        with pytest.raises(requests.ConnectionError):
+            requests.get(
+                server.url, timeout=1,
+                proxies={
+                    "http": f"http://{proxies[1]['IP Address']}:"
+                            f"{proxies[1]['Port']}",
+                },
+            )
+
+    assert len(proxies) == 3
+    assert address == server.url
+    assert len(response["data"]) == 2
+
+
+def test_base_url_from_environment(monkeypatch):
+    monkeypatch.delenv("CMC_BASE_URL", raising=False)
+    assert base_url() == "https://web-api.coinmarketcap.com"
+
+    monkeypatch.setenv("CMC_BASE_URL", "http://127.0.0.1:8000/")
+    assert base_url() == "http://127.0.0.1:8000"
+    assert base_url("http://localhost:1") == "http://localhost:1"
+
+
+def test_populate_from_stub(engine, client):
+    with StubServer(coins=30) as server, Session(engine) as session:
+        populate(
+            DATE, bulk=True, copy=False, client=client, session=session,
+            server=server.url,
+        )
+
+        assert session.scalar(
+            select(func.count()).select_from(Market)
+        ) == 30
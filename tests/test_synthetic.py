@@ -0,0 +1,68 @@
+"""Test the synthetic listings and the benchmark suite."""
+
+# Import standard modules
+import datetime
+
+# Import third-party modules
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Import local modules
+from benchmarks.suite import compare, run
+from cmc_data.data_model.models import Coin, Quote
+from cmc_data.ingest import ingest_data
+from cmc_data.records import decode_listings
+from cmc_data.synthetic import synthetic_listings, synthetic_snapshots
+
+DATE = datetime.date(2021, 1, 3)
+
+
+def test_listings_are_deterministic():
+    listings = synthetic_listings(50, DATE, seed=1)
+
+    assert listings == synthetic_listings(50, DATE, seed=1)
+    assert listings != synthetic_listings(50, DATE, seed=2)
+    assert [entry["cmc_rank"] for entry in listings] == list(range(1, 51))
+
+
+def test_coins_keep_their_identity_across_dates():
+    snapshots = dict(synthetic_snapshots(
+        20, [DATE, DATE + datetime.timedelta(7)],
+    ))
+
+    first, second = (
+        {entry["id"]: entry for entry in listings}
+        for listings in snapshots.values()
+    )
+    assert first.keys() == second.keys()
+    for coin_id, entry in first.items():
+        assert entry["slug"] == second[coin_id]["slug"]
+        assert entry["platform"] == second[coin_id]["platform"]
+
+
+def test_listings_pass_validation_and_ingest(engine):
+    listings = synthetic_listings(200, DATE)
+
+    page = decode_listings(listings)
+
+    assert not page.rejected
+    assert any(listing.platform for listing in page.listings)
+    with Session(engine) as session:
+        assert ingest_data(listings, bulk=True, session=session) == 0
+        assert session.scalar(select(func.count()).select_from(Coin)) == 200
+        assert session.scalar(
+            select(func.count()).select_from(Quote)
+        ) == 400
+
+
+def test_benchmark_results_are_comparable():
+    results = run(
+        coins=20, dates=2, repeat=1, only=["decode", "write_sqlite_bulk"],
+    )
+
+    assert set(results["results"]) == {"decode", "write_sqlite_bulk"}
+    assert results["parameters"]["coins"] == 20
+    assert results["results"]["decode"]["items"] == 40
+    assert [name for name, *_ in compare(results, results)] == \
+        ["decode", "write_sqlite_bulk"]
+    assert all(ratio == 1 for *_, ratio in compare(results, results))
@@ -0,0 +1,225 @@
+"""Test the work queue of snapshot dates."""
+
+# Import standard modules
+import asyncio
+import datetime
+
+# Import third-party modules
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+# Import local modules
+from cmc_data import backfill as backfill_module
+from cmc_data import workqueue
+from cmc_data.backfill import date_range
+from cmc_data.checkpoint import (
+    COMPLETE, FAILED, RUNNING, create_job_table, finish_job, start_job,
+)
+from cmc_data.data_model import create_db_engine
+from cmc_data.data_model.models import IngestionJob
+from cmc_data.workqueue import (
+    claim, enqueue, heartbeat, queue_stats, run_worker,
+)
+
+DATES = list(date_range(datetime.date(2021, 1, 3), datetime.date(2021, 2, 1)))
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def test_enqueue_is_idempotent(session):
+    assert enqueue(session, DATES[:3]) == 3
+    start_job(session, DATES[0])
+    finish_job(session, DATES[0], COMPLETE)
+
+    assert enqueue(session, DATES) == 4
+    assert queue_stats(session) == {
+        "pending": 4, "running": 0, "complete": 1, "failed": 0,
+    }
+
+
+def test_workers_claim_different_dates(session):
+    enqueue(session, DATES)
+
+    first = claim(session, "a", limit=2)
+    second = claim(session, "b", limit=2)
+
+    assert first == DATES[:2]
+    assert second == DATES[2:4]
+    assert claim(session, "c", limit=2) == DATES[4:]
+    assert claim(session, "c") == []
+    job = session.get(IngestionJob, DATES[0])
+    assert (job.status, job.claimed_by) == (RUNNING, "a")
+
+
+def test_expired_leases_are_claimed_again(session, monkeypatch):
+    enqueue(session, DATES[:2])
+    assert claim(session, "a", limit=2, lease=60) == DATES[:2]
+
+    later = datetime.datetime.now(datetime.timezone.utc).replace(
+        tzinfo=None,
+    ) + datetime.timedelta(seconds=90)
+    monkeypatch.setattr(workqueue, "_now", lambda: later)
+    assert claim(session, "b") == DATES[:1]
+
+    # The lease of "a" on the second date is renewed in time
+    monkeypatch.setattr(
+        workqueue, "_now", lambda: later - datetime.timedelta(seconds=60),
+    )
+    assert heartbeat(session, "a", lease=60) == 1
+    monkeypatch.setattr(workqueue, "_now", lambda: later)
+    assert claim(session, "b") == []
+
+
+def test_running_dates_without_lease_are_not_claimed(session):
+    # Started by a backfill outside of the queue
+    start_job(session, DATES[0])
+
+    assert claim(session, "a") == []
+
+
+def test_failed_dates_are_claimed_until_max_attempts(session):
+    enqueue(session, DATES[:1])
+    for attempt in range(2):
+        assert claim(session, "a", max_attempts=2) == DATES[:1]
+        start_job(session, DATES[0])
+        finish_job(session, DATES[0], FAILED, error="boom")
+
+    assert claim(session, "a", max_attempts=2) == []
+    job = session.get(IngestionJob, DATES[0])
+    assert (job.claimed_by, job.lease_expires) == (None, None)
+
+
+def test_failed_dates_back_off(session, monkeypatch):
+    enqueue(session, DATES[:1])
+    assert claim(session, "a", retry_backoff=60) == DATES[:1]
+    for backoff in (60, 120, None):
+        start_job(session, DATES[0])
+        finish_job(session, DATES[0], FAILED, error="boom")
+        finished = session.get(IngestionJob, DATES[0]).finished_at
+        if backoff is None:
+            break
+
+        monkeypatch.setattr(
+            workqueue, "_now",
+            lambda: finished + datetime.timedelta(seconds=backoff - 1),
+        )
+        assert claim(session, "a", retry_backoff=60) == []
+        assert workqueue._next_retry(session, 3, 60) == pytest.approx(1)
+        monkeypatch.setattr(
+            workqueue, "_now",
+            lambda: finished + datetime.timedelta(seconds=backoff),
+        )
+        assert claim(session, "a", retry_backoff=60) == DATES[:1]
+
+    # Out of attempts
+    assert workqueue._next_retry(session, 3, 60) is None
+
+
+def test_create_job_table_adds_queue_columns(engine):
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE ingestion_job"))
+        connection.execute(text(
+            "CREATE TABLE ingestion_job ("
+            "snapshot_date DATE PRIMARY KEY, status VARCHAR(10) NOT NULL, "
+            "attempts INTEGER NOT NULL)"
+        ))
+
+    create_job_table(engine)
+
+    columns = {
+        column["name"]
+        for column in inspect(engine).get_columns("ingestion_job")
+    }
+    assert {"claimed_by", "lease_expires", "error"} <= columns
+
+
+def test_workers_share_a_backfill(monkeypatch, tmp_path):
+    fetched = []
+
+    def extract_pages(date, proxy, client, server):
+        fetched.append(date)
+        yield [{"date": date}]
+
+    def ingest_snapshot(date, data, **options):
+        return {"entries": len(data), "rejected": 0}
+
+    monkeypatch.setattr(backfill_module, "extract_pages", extract_pages)
+    monkeypatch.setattr(backfill_module, "ingest_snapshot", ingest_snapshot)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'cmc.sqlite'}")
+    create_job_table(engine)
+
+    async def work():
+        sessions = [Session(engine) for _ in range(3)]
+        enqueue(sessions[0], DATES)
+        try:
+            return await asyncio.gather(*(
+                run_worker(session, worker=f"worker-{index}", batch=1)
+                for index, session in enumerate(sessions)
+            ))
+        finally:
+            for session in sessions:
+                session.close()
+
+    summaries = asyncio.run(work())
+
+    assert sorted(fetched) == DATES
+    assert sum(summary["claimed"] for summary in summaries) == len(DATES)
+    with Session(engine) as session:
+        assert queue_stats(session)["complete"] == len(DATES)
+    engine.dispose()
+
+
+def test_failed_date_is_not_claimed_twice_at_once(monkeypatch, tmp_path):
+    fetching = set()
+    fetched = []
+    failures = {DATES[0]: 1}
+
+    def extract_pages(date, proxy, client, server):
+        assert date not in fetching, f"{date} claimed by two workers"
+        fetching.add(date)
+        try:
+            fetched.append(date)
+            if failures.get(date):
+                failures[date] -= 1
+                raise RuntimeError("boom")
+            yield [{"date": date}]
+        finally:
+            fetching.discard(date)
+
+    def ingest_snapshot(date, data, **options):
+        return {"entries": len(data), "rejected": 0}
+
+    monkeypatch.setattr(backfill_module, "extract_pages", extract_pages)
+    monkeypatch.setattr(backfill_module, "ingest_snapshot", ingest_snapshot)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'cmc.sqlite'}")
+    create_job_table(engine)
+
+    async def work():
+        sessions = [Session(engine) for _ in range(2)]
+        enqueue(sessions[0], DATES[:4])
+        try:
+            return await asyncio.gather(*(
+                run_worker(
+                    session, worker=f"worker-{index}", batch=1,
+                    retry_backoff=0.05,
+                )
+                for index, session in enumerate(sessions)
+            ))
+        finally:
+            for session in sessions:
+                session.close()
+
+    asyncio.run(work())
+
+    assert sorted(fetched) == sorted(DATES[:4] + DATES[:1])
+    with Session(engine) as session:
+        job = session.get(IngestionJob, DATES[0])
+        assert (job.status, job.attempts, job.claimed_by) \
+            == (COMPLETE, 2, None)
+        assert queue_stats(session)["complete"] == 4
+    engine.dispose()